@@ -1,39 +1,134 @@
 from fastapi import APIRouter, HTTPException, Query
-from fastapi.responses import StreamingResponse, Response
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from typing import Optional, List
 import io
-import csv
+import importlib.util
+import itertools
+import uuid
 from datetime import datetime
 from supabase_client import get_supabase_client
+from dataset_query import COUNT_MODES, CountCache, apply_filters, keyset_page, encode_cursor, decode_cursor, iter_pages
+from dataset_export import (
+    BASE_EXPORT_COLUMNS, EXPORT_COLUMNS, EXPORT_FORMATS, ZIP_COLUMNS, export_chunks, is_missing_column, zip_chunks
+)
+import config
 
 router = APIRouter(prefix="/api/admin", tags=["admin"])
 
+# Exact dataset counts per filter combination, reused across page loads
+count_cache = CountCache(ttl_seconds=config.DATASET_COUNT_TTL_SECONDS)
+
 class RelabelRequest(BaseModel):
     label: str
 
+class BulkFilter(BaseModel):
+    """Same filters as GET /dataset"""
+    category: Optional[str] = None
+    from_date: Optional[str] = None
+    to_date: Optional[str] = None
+    q: Optional[str] = None
+
+class BulkSelection(BaseModel):
+    """Either explicit ids or a filter (ids win if both are given)"""
+    ids: Optional[List[str]] = None
+    filter: Optional[BulkFilter] = None
+
+class BulkRelabelRequest(BulkSelection):
+    label: str
+
+def chunked(items, size):
+    """Consecutive slices of at most `size` items"""
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+def canonical_id(value):
+    """Canonical form of a prediction id (a UUID), or None if it is not one"""
+    try:
+        return str(uuid.UUID(str(value)))
+    except ValueError:
+        return None
+
+def resolve_selection(supabase, selection, columns="id"):
+    """
+    (rows, invalid ids) targeted by a bulk request
+    
+    Explicit ids are returned without a lookup, in canonical UUID form and
+    deduplicated, with the id as sent kept in `requested_id`; ids that no
+    longer exist show up as not_found in the results. Ids that are not UUIDs
+    are returned separately: PostgREST rejects a whole IN (...) list over a
+    single one, so they never reach the query. A filter is resolved to the
+    matching rows with the keyset pager. Selections larger than
+    FITO_BULK_MAX_ITEMS are rejected so one call cannot wipe the table.
+    """
+    if selection.ids:
+        requested = list(dict.fromkeys(selection.ids))
+        if len(requested) > config.BULK_MAX_ITEMS:
+            raise HTTPException(status_code=400, detail=f"At most {config.BULK_MAX_ITEMS} ids per request")
+        rows, invalid = {}, []
+        for row_id in requested:
+            canonical = canonical_id(row_id)
+            if canonical is None:
+                invalid.append(row_id)
+            else:
+                rows.setdefault(canonical, {"id": canonical, "requested_id": row_id})
+        return list(rows.values()), invalid
+    
+    selected = selection.filter or BulkFilter()
+    filters = {"category": selected.category, "from_date": selected.from_date, "to_date": selected.to_date, "q": selected.q}
+    if not any(filters.values()):
+        raise HTTPException(status_code=400, detail="Provide ids or at least one filter")
+    
+    rows = []
+    for page in iter_pages(supabase, f"{columns}, created_at", filters, config.EXPORT_PAGE_SIZE):
+        rows.extend(page)
+        if len(rows) > config.BULK_MAX_ITEMS:
+            raise HTTPException(status_code=400, detail=f"Filter matches more than {config.BULK_MAX_ITEMS} rows, narrow it down")
+    return rows, []
+
+def bulk_response(rows, status, invalid=()):
+    """Per-item results (status by row id, invalid ids last) plus a count per status"""
+    results = [
+        {"id": row.get("requested_id", row["id"]), "status": status.get(row["id"], "not_found")}
+        for row in rows
+    ]
+    results.extend({"id": row_id, "status": "invalid_id"} for row_id in invalid)
+    summary = {}
+    for item in results:
+        summary[item["status"]] = summary.get(item["status"], 0) + 1
+    return {
+        "success": True,
+        "requested": len(results),
+        "summary": summary,
+        "results": results
+    }
+
 @router.get("/stats")
 async def get_stats():
-    """Get category statistics"""
+    """
+    Get category statistics
+    
+    Counts come from the trigger-maintained prediction_counts table
+    (database/prediction_counts_schema.sql) through one RPC, so the cost does
+    not grow with the predictions table. Until that migration has run, the
+    grouping is done by the category_stats view instead.
+    """
     try:
         supabase = get_supabase_client()
         
-        # Fetch all predictions
-        response = supabase.table("predictions").select("predicted_label, final_label").execute()
-        
-        # Count by category
-        counts = {}
-        for item in response.data:
-            label = item.get("final_label") or item.get("predicted_label")
-            counts[label] = counts.get(label, 0) + 1
+        try:
+            rows = supabase.rpc("get_prediction_counts").execute().data
+        except Exception as rpc_error:
+            print(f"[WARNING] get_prediction_counts unavailable, grouping with category_stats instead: {rpc_error}")
+            rows = supabase.table("category_stats").select("category, count").execute().data
         
-        # Convert to list
-        stats = [{"category": k, "count": v} for k, v in counts.items()]
+        stats = [{"category": row["category"], "count": int(row["count"])} for row in rows or []]
         
         return {
             "success": True,
             "stats": stats,
-            "total": len(response.data)
+            "total": sum(item["count"] for item in stats)
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -45,41 +140,65 @@ async def get_dataset(
     to_date: Optional[str] = Query(None, alias="to"),
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
-    q: Optional[str] = Query(None)
+    q: Optional[str] = Query(None),
+    cursor: Optional[str] = Query(None),
+    count: str = Query("exact")
 ):
-    """Get paginated dataset with filters"""
+    """
+    Get paginated dataset with filters
+    
+    Pass the returned `next_cursor` as `cursor` to fetch the next page: pages
+    are read with keyset pagination on (created_at, id), so page 10,000 costs
+    the same as page 1. Without a cursor, `page` still selects an offset page.
+    
+    `count` picks how `total` is computed: "exact" (cached per filter for a
+    short TTL), "planned" or "estimated" (Postgres planner statistics, no
+    scan) or "none".
+    """
+    if count not in COUNT_MODES:
+        raise HTTPException(status_code=400, detail=f"count must be one of: {', '.join(COUNT_MODES)}")
+    if cursor:
+        try:
+            decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
     try:
         supabase = get_supabase_client()
         
-        # Build query
-        query = supabase.table("predictions").select("*", count="exact")
-        
-        # Apply filters
-        if category and category != "All Categories":
-            # Filter by either final_label or predicted_label
-            query = query.or_(f"final_label.eq.{category},and(final_label.is.null,predicted_label.eq.{category})")
-        
-        if from_date:
-            query = query.gte("created_at", from_date)
+        # An exact count is only recomputed once its cached value expires
+        filter_key = (category, from_date, to_date, q)
+        total = count_cache.get(filter_key) if count == "exact" else None
+        count_option = None if count == "none" or total is not None else count
         
-        if to_date:
-            query = query.lte("created_at", to_date)
-        
-        if q:
-            query = query.or_(f"storage_path.ilike.%{q}%,uploader_name.ilike.%{q}%,predicted_label.ilike.%{q}%")
+        # Build query
+        query = supabase.table("predictions").select("*", count=count_option)
+        query = apply_filters(query, category, from_date, to_date, q)
         
-        # Order and paginate
-        offset = (page - 1) * page_size
-        query = query.order("created_at", desc=True).range(offset, offset + page_size - 1)
+        # One extra row tells whether there is a next page
+        if cursor:
+            query = keyset_page(query, cursor, page_size + 1)
+        else:
+            offset = (page - 1) * page_size
+            query = query.order("created_at", desc=True).order("id", desc=True).range(offset, offset + page_size)
         
         response = query.execute()
+        rows = response.data[:page_size]
+        has_more = len(response.data) > page_size
+        
+        if count_option is not None:
+            total = response.count
+            if count == "exact":
+                count_cache.put(filter_key, total)
         
         return {
             "success": True,
-            "data": response.data,
-            "total": response.count,
+            "data": rows,
+            "total": total,
+            "total_estimated": count in ("planned", "estimated"),
             "page": page,
-            "page_size": page_size
+            "page_size": page_size,
+            "next_cursor": encode_cursor(rows[-1]) if has_more and rows else None
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -139,6 +258,81 @@ async def delete_prediction(id: str):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/dataset/bulk/relabel")
+def bulk_relabel(request: BulkRelabelRequest):
+    """
+    Set the final label of many predictions
+    
+    A plain def, so FastAPI runs it in the threadpool: resolving a filter and
+    the batched round-trips must not block /predict on the event loop.
+    One UPDATE ... WHERE id IN (...) per FITO_BULK_BATCH_SIZE ids. Each id is
+    reported as updated, not_found or invalid_id; relabelling again is
+    harmless, so a failed call can simply be retried.
+    """
+    try:
+        supabase = get_supabase_client()
+        rows, invalid = resolve_selection(supabase, request)
+        
+        status = {}
+        for batch in chunked([row["id"] for row in rows], config.BULK_BATCH_SIZE):
+            response = supabase.table("predictions").update({
+                "final_label": request.label,
+                "updated_at": datetime.utcnow().isoformat()
+            }).in_("id", batch).execute()
+            status.update((row["id"], "updated") for row in response.data or [])
+        
+        count_cache.clear()
+        return bulk_response(rows, status, invalid)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/dataset/bulk/delete")
+def bulk_delete(request: BulkSelection):
+    """
+    Delete many predictions and their images (a plain def, run in the threadpool)
+    
+    Storage objects are removed with one remove([...]) call per batch and the
+    rows with one DELETE ... WHERE id IN (...). A row is only deleted once
+    its image is gone, so an id reported as storage_failed can be retried;
+    ids that are already gone are reported as not_found, and ids that are
+    not UUIDs as invalid_id.
+    """
+    try:
+        supabase = get_supabase_client()
+        rows, invalid = resolve_selection(supabase, request, columns="id, storage_path")
+        bucket = supabase.storage.from_("tomato-leaves")
+        
+        status = {}
+        for batch in chunked(rows, config.BULK_BATCH_SIZE):
+            batch_ids = [row["id"] for row in batch]
+            if any("storage_path" not in row for row in batch):
+                found = supabase.table("predictions").select("id, storage_path").in_("id", batch_ids).execute().data or []
+                paths = {row["id"]: row["storage_path"] for row in found}
+            else:
+                paths = {row["id"]: row["storage_path"] for row in batch}
+            
+            deletable = [row_id for row_id in batch_ids if row_id in paths]
+            if deletable:
+                try:
+                    bucket.remove([paths[row_id] for row_id in deletable])
+                except Exception as storage_error:
+                    print(f"⚠️ Failed to delete {len(deletable)} objects from storage: {storage_error}")
+                    status.update((row_id, "storage_failed") for row_id in deletable)
+                    deletable = []
+            
+            if deletable:
+                response = supabase.table("predictions").delete().in_("id", deletable).execute()
+                status.update((row["id"], "deleted") for row in response.data or [])
+        
+        count_cache.clear()
+        return bulk_response(rows, status, invalid)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/dataset/{id}/download")
 async def download_image(id: str):
     """Download a single image"""
@@ -168,65 +362,100 @@ async def download_image(id: str):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/dataset/export")
+async def export_dataset(
+    category: Optional[str] = Query(None),
+    from_date: Optional[str] = Query(None, alias="from"),
+    to_date: Optional[str] = Query(None, alias="to"),
+    q: Optional[str] = Query(None),
+    fmt: str = Query("csv", alias="format"),
+    compress: bool = Query(False, alias="gzip")
+):
+    """
+    Stream the filtered dataset as CSV, Parquet or an Arrow IPC stream
+    
+    Rows are read in keyset pages of FITO_EXPORT_PAGE_SIZE and written out
+    page by page, so memory stays flat however many rows match. Parquet and
+    Arrow (for retraining jobs) need pyarrow and add a `label` column with
+    the effective label. With gzip=true the output is gzip-compressed.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of: {', '.join(EXPORT_FORMATS)}")
+    if fmt != "csv" and importlib.util.find_spec("pyarrow") is None:
+        raise HTTPException(status_code=501, detail=f"{fmt} export requires pyarrow (pip install pyarrow)")
+    
+    try:
+        supabase = get_supabase_client()
+        filters = {"category": category, "from_date": from_date, "to_date": to_date, "q": q}
+        pages = iter_pages(supabase, EXPORT_COLUMNS, filters, config.EXPORT_PAGE_SIZE)
+        # Fetch the first page before answering, so query errors still return a 500
+        try:
+            first_page = await run_in_threadpool(next, pages, None)
+        except Exception as e:
+            if not is_missing_column(e, "model_version"):
+                raise
+            print("[WARNING] predictions.model_version is missing (run database/model_versions_schema.sql); exporting without it")
+            pages = iter_pages(supabase, BASE_EXPORT_COLUMNS, filters, config.EXPORT_PAGE_SIZE)
+            first_page = await run_in_threadpool(next, pages, None)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    media_type, extension = EXPORT_FORMATS[fmt]
+    filename = f"dataset_{category or 'all'}_{datetime.now().strftime('%Y%m%d')}.{extension}"
+    if compress:
+        media_type, filename = "application/gzip", f"{filename}.gz"
+    
+    rows = itertools.chain([first_page] if first_page else [], pages)
+    return StreamingResponse(
+        export_chunks(rows, fmt, compress),
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f"attachment; filename={filename}"
+        }
+    )
+
 @router.get("/dataset/export/csv")
 async def export_csv(
+    category: Optional[str] = Query(None),
+    from_date: Optional[str] = Query(None, alias="from"),
+    to_date: Optional[str] = Query(None, alias="to"),
+    q: Optional[str] = Query(None),
+    compress: bool = Query(False, alias="gzip")
+):
+    """Export filtered dataset as CSV (streamed)"""
+    return await export_dataset(category=category, from_date=from_date, to_date=to_date, q=q, fmt="csv", compress=compress)
+
+@router.get("/dataset/export/zip")
+async def export_zip(
     category: Optional[str] = Query(None),
     from_date: Optional[str] = Query(None, alias="from"),
     to_date: Optional[str] = Query(None, alias="to"),
     q: Optional[str] = Query(None)
 ):
-    """Export filtered dataset as CSV"""
+    """
+    Stream the filtered images as a ZIP laid out as training/<label>/<id>.jpg
+    
+    The label is the effective one (final_label, else predicted_label), so the
+    extracted training/ folder can be passed straight to flow_from_directory.
+    Images are downloaded by FITO_EXPORT_DOWNLOAD_WORKERS threads and written
+    to the archive as they arrive; neither the archive nor the image set is
+    ever held in memory as a whole.
+    """
     try:
         supabase = get_supabase_client()
-        
-        # Build query (same as dataset endpoint but without pagination)
-        query = supabase.table("predictions").select("*")
-        
-        if category and category != "All Categories":
-            query = query.or_(f"final_label.eq.{category},and(final_label.is.null,predicted_label.eq.{category})")
-        
-        if from_date:
-            query = query.gte("created_at", from_date)
-        
-        if to_date:
-            query = query.lte("created_at", to_date)
-        
-        if q:
-            query = query.or_(f"storage_path.ilike.%{q}%,uploader_name.ilike.%{q}%,predicted_label.ilike.%{q}%")
-        
-        response = query.order("created_at", desc=True).execute()
-        
-        # Create CSV
-        output = io.StringIO()
-        writer = csv.writer(output)
-        
-        # Write header
-        writer.writerow(["ID", "Predicted Label", "Confidence", "Final Label", "Uploader", "Created At", "Image URL"])
-        
-        # Write data
-        for item in response.data:
-            writer.writerow([
-                item.get("id"),
-                item.get("predicted_label"),
-                item.get("confidence"),
-                item.get("final_label", ""),
-                item.get("uploader_name", ""),
-                item.get("created_at"),
-                item.get("image_url", "")
-            ])
-        
-        csv_content = output.getvalue()
-        output.close()
-        
-        filename = f"dataset_{category or 'all'}_{datetime.now().strftime('%Y%m%d')}.csv"
-        
-        return Response(
-            content=csv_content,
-            media_type="text/csv",
-            headers={
-                "Content-Disposition": f"attachment; filename={filename}"
-            }
-        )
+        filters = {"category": category, "from_date": from_date, "to_date": to_date, "q": q}
+        pages = iter_pages(supabase, ZIP_COLUMNS, filters, config.EXPORT_PAGE_SIZE)
+        first_page = await run_in_threadpool(next, pages, None)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-
+    
+    bucket = supabase.storage.from_("tomato-leaves")
+    rows = itertools.chain([first_page] if first_page else [], pages)
+    filename = f"training_{category or 'all'}_{datetime.now().strftime('%Y%m%d')}.zip"
+    return StreamingResponse(
+        zip_chunks(rows, bucket.download, workers=config.EXPORT_DOWNLOAD_WORKERS),
+        media_type="application/zip",
+        headers={
+            "Content-Disposition": f"attachment; filename={filename}"
+        }
+    )
@@ -1,24 +1,79 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException
+import time
+_import_started = time.perf_counter()
+
+from fastapi import FastAPI, File, UploadFile, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse, Response
+from starlette.concurrency import run_in_threadpool
+from typing import List, Optional
 import uvicorn
 import os
+import json
 import uuid
 import io
+import asyncio
+from contextlib import asynccontextmanager
 from datetime import datetime
-from model_handler import TomatoDiseasePredictor
+import numpy as np
+from model_handler import TomatoDiseasePredictor, DEFAULT_CLASS_NAMES
+from batching import MicroBatcher
+from inference_backends import THREAD_BOUNDED_BACKENDS, infer_backend_name
+from inference_executor import InferenceExecutor, InferenceOverloaded
+from persistence_outbox import PredictionOutbox
+from prediction_cache import PredictionCache, model_fingerprint
+from warmup import ModelWarmup
+from model_registry import ModelRegistry, ModelManager, ServingModel, ModelNotReady
+from model_routes import router as model_router
+from shadow import ShadowEvaluator
+from leaf_gate import LeafGate
+from tta import TestTimeAugmentation
+from explain import ExplainerUnavailable
+from near_duplicates import NearDuplicateIndex
 from supabase_client import get_supabase_client
+import metrics
+import config
 from admin_routes import router as admin_router
 
+@asynccontextmanager
+async def lifespan(app):
+    """
+    Start background services without blocking the server
+    
+    The model loads and warms up on a background thread while the outbox,
+    the shadow evaluator and the Supabase client start alongside it, so
+    /health answers right away and /ready turns 200 once the model is warm.
+    """
+    loop = asyncio.get_running_loop()
+    loop.run_in_executor(None, load_initial_model)
+    loop.run_in_executor(None, connect_supabase)
+    outbox.start()
+    if shadow_evaluator is not None:
+        shadow_evaluator.start()
+    follower = asyncio.create_task(follow_registry()) if config.WORKERS > 1 else None
+    
+    yield
+    
+    # Drain and stop the background workers
+    if follower is not None:
+        follower.cancel()
+    if model_manager.active is not None:
+        model_manager.active.batcher.stop()
+    if shadow_evaluator is not None:
+        shadow_evaluator.stop()
+    inference_executor.shutdown(wait=False)
+    outbox.stop()
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Fito - Tomato Leaf Disease Detection API",
     description="AI-powered tomato leaf disease detection using deep learning",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Include admin routes
 app.include_router(admin_router)
+app.include_router(model_router)
 
 # Add CORS middleware
 app.add_middleware(
@@ -29,13 +84,448 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize model predictor
-# Get absolute path to model file (relative to this script)
-model_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "trained_model_fito_outdoor.h5")
+# Decode, preprocess and predict run on a dedicated pool, never on the event loop
+inference_executor = InferenceExecutor(
+    max_workers=config.INFERENCE_WORKERS,
+    max_pending=config.INFERENCE_MAX_PENDING
+)
+
+# Storage uploads and DB inserts are journaled and drained in the background
+outbox = PredictionOutbox(
+    config.OUTBOX_PATH,
+    workers=config.OUTBOX_WORKERS,
+    batch_size=config.OUTBOX_BATCH_SIZE,
+    max_attempts=config.OUTBOX_MAX_ATTEMPTS
+)
+
+# Optional first stage of the cascade, shared by every loaded model version
+leaf_gate = None
+if os.path.exists(config.LEAF_GATE_PATH):
+    leaf_gate = LeafGate(config.LEAF_GATE_PATH, threshold=config.LEAF_GATE_THRESHOLD)
+    print(f"[SUCCESS] Leaf gate loaded from {config.LEAF_GATE_PATH} (threshold {leaf_gate.threshold:.3f})")
+else:
+    print(f"[INFO] No leaf gate at {config.LEAF_GATE_PATH}; every upload goes to the main model")
+
+# Optional test-time augmentation for borderline predictions
+tta = None
+if config.TTA_ENABLED:
+    tta = TestTimeAugmentation(config.TTA_VIEWS, band=config.TTA_BAND, crop_fraction=config.TTA_CROP_FRACTION)
+
+explain_options = {
+    "model_path": config.EXPLAIN_MODEL_PATH,
+    "layer_name": config.EXPLAIN_LAYER,
+    "target_ms": config.EXPLAIN_TARGET_MS,
+    "overlay_alpha": config.EXPLAIN_OVERLAY_ALPHA,
+    "jpeg_quality": config.EXPLAIN_JPEG_QUALITY
+}
+
+def load_serving_model(version, model_path, manifest=None):
+    """Load a model version with its own micro-batcher and warm-up plan"""
+    manifest = manifest or {}
+    predictor = TomatoDiseasePredictor(
+        model_path,
+        backend=manifest.get("backend") or config.INFERENCE_BACKEND,
+        num_threads=config.INFERENCE_THREADS,
+        class_names=manifest.get("class_names"),
+        leaf_gate=leaf_gate,
+        tta=tta,
+        explain_options=explain_options,
+        call_mode=config.KERAS_CALL_MODE,
+        jit_compile=config.XLA_JIT,
+        xnnpack=config.TFLITE_XNNPACK
+    )
+    
+    # Build and trace the Grad-CAM function now, not on the first /predict/explain
+    if config.EXPLAIN_ENABLED:
+        try:
+            predictor.explainer()
+        except Exception as e:
+            print(f"[INFO] Grad-CAM explanations unavailable for {version}: {e}")
+    
+    expected_size = manifest.get("input_size")
+    if expected_size and tuple(expected_size) != tuple(predictor.preprocessor.input_shape):
+        raise ValueError(f"Model input {predictor.preprocessor.input_shape} does not match manifest {expected_size}")
+    
+    # Requests arriving within the batching window share a single model call
+    batcher = MicroBatcher(
+        predictor.predict_proba,
+        max_batch_size=config.BATCH_MAX_SIZE,
+        window_ms=config.BATCH_WINDOW_MS
+    )
+    batcher.start()
+    
+    # Synthetic batches run through the serving path before /ready reports true
+    warmup = ModelWarmup(
+        batch_sizes=config.WARMUP_BATCH_SIZES,
+        iterations=config.WARMUP_ITERATIONS
+    )
+    
+    fingerprint = manifest.get("sha256") or model_fingerprint(model_path)
+    return ServingModel(version, model_path, fingerprint, predictor, batcher, warmup)
+
+# Versioned model registry; without an active registry version the API serves config.MODEL_PATH
+model_registry = ModelRegistry(config.MODEL_REGISTRY_DIR)
+active_version = model_registry.active_version()
+if active_version:
+    model_path = model_registry.artifact_path(active_version)
+    initial_manifest = model_registry.manifest(active_version)
+else:
+    # Get absolute path to model file (relative to this script)
+    model_path = config.MODEL_PATH
+    active_version = os.path.splitext(os.path.basename(model_path))[0]
+    initial_manifest = None
+
 if not os.path.exists(model_path):
     raise FileNotFoundError(f"Model file not found: {model_path}")
 
-predictor = TomatoDiseasePredictor(model_path)
+# Repeated uploads of the same image reuse the earlier result (scoped to the model once it is loaded)
+prediction_cache = PredictionCache(
+    max_entries=config.CACHE_MAX_ENTRIES,
+    disk_dir=config.CACHE_DIR
+)
+
+# Re-encoded, resized or slightly cropped copies of earlier uploads reuse their prediction
+near_duplicates = None
+if config.NEAR_DUP_ENABLED:
+    near_duplicates = NearDuplicateIndex(
+        len(DEFAULT_CLASS_NAMES),
+        max_entries=config.NEAR_DUP_MAX_ENTRIES,
+        max_distance=config.NEAR_DUP_MAX_DISTANCE,
+        method=config.NEAR_DUP_METHOD
+    )
+
+def rescope_caches(serving):
+    """Scope the prediction cache and near-duplicate index to a newly active model"""
+    prediction_cache.rescope(serving.model_path, serving.fingerprint)
+    if near_duplicates is not None:
+        near_duplicates.rescope(serving.fingerprint, len(serving.predictor.class_names))
+
+model_manager = ModelManager(
+    model_registry,
+    load_serving_model,
+    on_swap=rescope_caches
+)
+app.state.model_manager = model_manager
+startup_status = {"model_error": None}
+
+def load_initial_model():
+    """Load and warm up the startup model version (runs in the background from lifespan)"""
+    try:
+        serving = load_serving_model(active_version, model_path, initial_manifest)
+        rescope_caches(serving)
+        model_manager.set_initial(serving)
+    except Exception as e:
+        startup_status["model_error"] = str(e)
+        print(f"[ERROR] Failed to load model {active_version}: {e}")
+        return
+    serving.warmup.run(serving.predictor, serving.batcher)
+
+async def follow_registry():
+    """Keep this worker on the registry's ACTIVE version when another worker hot-swaps"""
+    while True:
+        await asyncio.sleep(config.REGISTRY_POLL_SECONDS)
+        try:
+            await run_in_threadpool(model_manager.follow_registry)
+        except Exception as e:
+            print(f"[WARNING] Registry poll failed: {e}")
+
+def connect_supabase():
+    """Create the Supabase client ahead of the first save (runs in the background from lifespan)"""
+    try:
+        get_supabase_client()
+        print("[SUCCESS] Supabase client ready")
+    except Exception as e:
+        print(f"[WARNING] Supabase client unavailable, predictions stay in the outbox until it is: {e}")
+
+def load_shadow_predictor():
+    """
+    Load the shadow model (registry version or plain path) with its own small thread budget
+    
+    Only TFLite and ONNX shadows are accepted: their interpreters get their own
+    FITO_SHADOW_THREADS-sized pool. A Keras or SavedModel shadow would run on
+    TensorFlow's process-wide intra-op pool, which the primary model uses too,
+    so it could take every core; export it with scripts/export_tflite.py first.
+    """
+    if config.SHADOW_VERSION:
+        model_registry.verify(config.SHADOW_VERSION)
+        shadow_path = model_registry.artifact_path(config.SHADOW_VERSION)
+        manifest = model_registry.manifest(config.SHADOW_VERSION)
+    else:
+        shadow_path = config.SHADOW_MODEL_PATH
+        manifest = {}
+    backend = manifest.get("backend") or infer_backend_name(shadow_path)
+    if backend not in THREAD_BOUNDED_BACKENDS:
+        raise ValueError(
+            f"Shadow model must be TFLite or ONNX so FITO_SHADOW_THREADS is enforced, got {backend} "
+            f"(convert {os.path.basename(shadow_path)} with scripts/export_tflite.py)"
+        )
+    return TomatoDiseasePredictor(
+        shadow_path,
+        backend=backend,
+        num_threads=config.SHADOW_THREADS,
+        class_names=manifest.get("class_names"),
+        call_mode=config.KERAS_CALL_MODE,
+        xnnpack=config.TFLITE_XNNPACK
+    )
+
+# Optional shadow model compared against the active one on sampled live traffic
+shadow_evaluator = None
+if config.SHADOW_VERSION or config.SHADOW_MODEL_PATH:
+    shadow_evaluator = ShadowEvaluator(
+        load_shadow_predictor,
+        config.SHADOW_VERSION or os.path.splitext(os.path.basename(config.SHADOW_MODEL_PATH))[0],
+        sample_rate=config.SHADOW_SAMPLE_RATE,
+        cpu_fraction=config.SHADOW_CPU_FRACTION,
+        max_pending=config.SHADOW_MAX_PENDING,
+        log_path=config.SHADOW_LOG_PATH
+    )
+app.state.shadow_evaluator = shadow_evaluator
+
+def find_near_duplicate(serving, pixels):
+    """
+    Perceptual-hash lookup on already decoded pixels
+    
+    Returns:
+        (result rebuilt from the earlier image's probabilities or None, perceptual hash or None)
+    """
+    if near_duplicates is None:
+        return None, None
+    with metrics.stage("dedupe"):
+        perceptual = near_duplicates.hash(pixels)
+        match = near_duplicates.find(perceptual, serving.fingerprint)
+    if match is None:
+        return None, perceptual
+    probabilities, source, distance = match
+    result = serving.predictor.build_result(probabilities)
+    result['near_duplicate'] = {"of": source, "distance": distance}
+    result['model_version'] = serving.version
+    return result, perceptual
+
+def remember_near_duplicate(serving, perceptual, probabilities, image_hash):
+    """Index an image's probabilities for later near-duplicate lookups"""
+    if near_duplicates is not None and perceptual is not None:
+        near_duplicates.add(perceptual, probabilities, image_hash[:16], serving.fingerprint)
+
+def run_inference(image_bytes):
+    """
+    Decode, preprocess and predict one image (runs on the inference executor)
+    
+    Returns:
+        (result, already_saved) - cache hits skip decode and inference entirely;
+        near-duplicates skip inference and, with FITO_NEAR_DUP_SKIP_STORAGE, storage
+    """
+    with metrics.component("predict"):
+        serving = model_manager.acquire()
+        try:
+            with metrics.stage("cache_lookup"):
+                image_hash = prediction_cache.hash_image(image_bytes)
+                cached = prediction_cache.get(image_hash, serving.fingerprint)
+            if cached is not None:
+                metrics.CACHE_LOOKUPS.inc("hit")
+                return cached, True
+            metrics.CACHE_LOOKUPS.inc("miss")
+        
+            # Obvious non-leaf images are rejected by the leaf gate in a few milliseconds
+            rejected = serving.predictor.screen(image_bytes)
+            if rejected is not None:
+                rejected['model_version'] = serving.version
+                prediction_cache.put(image_hash, rejected, serving.fingerprint)
+                return rejected, False
+        
+            started = time.perf_counter()
+            # Safe to reuse this worker's buffer: the thread blocks until the batch has run
+            processed_image = serving.predictor.preprocess_image(image_bytes, reuse_buffer=True)
+            # Re-encoded or resized copies of an earlier upload reuse its prediction
+            duplicate, perceptual = find_near_duplicate(serving, processed_image[0])
+            if duplicate is not None:
+                metrics.CACHE_LOOKUPS.inc("near_duplicate")
+                prediction_cache.put(image_hash, duplicate, serving.fingerprint)
+                return duplicate, config.NEAR_DUP_SKIP_STORAGE
+            # Inference is batched with concurrent requests (queue wait + model call)
+            with metrics.stage("batch"):
+                predictions = serving.batcher.submit(processed_image).result()
+            # Borderline predictions get a second, augmented look (the views share the micro-batcher)
+            probabilities, tta_views = serving.predictor.refine(
+                image_bytes, predictions[0], lambda views: serving.batcher.submit(views).result()
+            )
+            with metrics.stage("postprocess"):
+                result = serving.predictor.build_result(probabilities)
+            if tta_views:
+                result['tta_views'] = tta_views
+            result['model_version'] = serving.version
+            latency_ms = (time.perf_counter() - started) * 1000.0
+        
+            prediction_cache.put(image_hash, result, serving.fingerprint)
+            remember_near_duplicate(serving, perceptual, probabilities, image_hash)
+        
+            # Sampled requests are compared against the shadow model in the background
+            if shadow_evaluator is not None and shadow_evaluator.version != serving.version:
+                shadow_evaluator.maybe_submit(image_bytes, result, latency_ms, serving.version)
+            return result, False
+        finally:
+            serving.release()
+
+def build_prediction_record(result, filename):
+    """Row for the predictions table (image_url is filled in after upload)"""
+    # Generate unique filename
+    file_id = str(uuid.uuid4())
+    file_ext = filename.split('.')[-1] if '.' in filename else 'jpg'
+    storage_path = f"{result['predicted_class']}/{file_id}.{file_ext}"
+    
+    return {
+        "id": file_id,
+        "storage_path": storage_path,
+        "image_url": None,
+        "predicted_label": result['predicted_class'],
+        "confidence": float(result['confidence']),
+        "uploader_name": "anonymous",
+        "model_version": result.get('model_version'),
+        "created_at": datetime.utcnow().isoformat(),
+        "updated_at": datetime.utcnow().isoformat()
+    }
+
+def save_prediction(result, image_bytes, filename, content_type):
+    """Queue the image and prediction row for background upload to Supabase"""
+    prediction_data = build_prediction_record(result, filename)
+    outbox.enqueue(prediction_data, image_bytes, content_type)
+    return prediction_data["id"]
+
+def unidentified_payload(result, filename):
+    """Response body for an image the model could not identify"""
+    return {
+        "success": False,
+        "error": "Image not recognized",
+        "prediction": "Unidentified",
+        "confidence": result['confidence'],
+        "message": "This image does not appear to be a tomato leaf or the disease is not clearly identifiable.",
+        "recommendations": result['safety_recommendations']['next_steps'],
+        "filename": filename
+    }
+
+def prediction_payload(result, filename):
+    """Response body for a successful prediction"""
+    payload = {
+        "success": True,
+        "prediction": result['predicted_class'],
+        "confidence": result['confidence'],
+        "all_predictions": result['all_predictions'],
+        "filename": filename
+    }
+    if 'near_duplicate' in result:
+        payload["near_duplicate"] = result['near_duplicate']
+    return payload
+
+def decode_for_batch(serving, image_bytes):
+    """
+    Cache lookup, decode and preprocess one file of a batch upload (runs on the inference executor)
+    
+    Returns:
+        (image_hash, cached / gate-rejected / near-duplicate result or None, whether that result
+        is already saved, preprocessed (1, H, W, C) array or None, perceptual hash or None)
+    """
+    with metrics.component("predict"):
+        image_hash = prediction_cache.hash_image(image_bytes)
+        cached = prediction_cache.get(image_hash, serving.fingerprint)
+        if cached is not None:
+            return image_hash, cached, True, None, None
+        rejected = serving.predictor.screen(image_bytes)
+        if rejected is not None:
+            rejected['model_version'] = serving.version
+            prediction_cache.put(image_hash, rejected, serving.fingerprint)
+            return image_hash, rejected, True, None, None
+        processed_image = serving.predictor.preprocess_image(image_bytes)
+        duplicate, perceptual = find_near_duplicate(serving, processed_image[0])
+        if duplicate is not None:
+            prediction_cache.put(image_hash, duplicate, serving.fingerprint)
+            return image_hash, duplicate, config.NEAR_DUP_SKIP_STORAGE, None, None
+        return image_hash, None, False, processed_image, perceptual
+
+async def predict_batch_chunk(serving, offset, files):
+    """
+    Predict one model-sized chunk of a batch upload
+    
+    Files are decoded in parallel on the inference executor, then every image
+    that missed the cache runs through the model in a single batch.
+    
+    Returns:
+        (NDJSON result lines, outbox items for new identified predictions)
+    """
+    lines = [None] * len(files)
+    contents = [None] * len(files)
+    decode_jobs = {}
+    
+    for i, file in enumerate(files):
+        if not (file.content_type or '').startswith('image/'):
+            lines[i] = {"index": offset + i, "success": False, "error": "File must be an image", "filename": file.filename}
+            continue
+        contents[i] = await file.read()
+        try:
+            decode_jobs[i] = asyncio.wrap_future(inference_executor.submit(decode_for_batch, serving, contents[i]))
+        except InferenceOverloaded as overloaded:
+            lines[i] = {"index": offset + i, "success": False, "error": f"Server is busy: {overloaded}", "filename": file.filename}
+    
+    decoded = dict(zip(decode_jobs, await asyncio.gather(*decode_jobs.values(), return_exceptions=True)))
+    
+    results = {}
+    pending = []
+    for i, outcome in decoded.items():
+        if isinstance(outcome, Exception):
+            lines[i] = {"index": offset + i, "success": False, "error": f"Prediction failed: {outcome}", "filename": files[i].filename}
+            continue
+        image_hash, cached, already_saved, processed_image, perceptual = outcome
+        if cached is not None:
+            results[i] = (cached, already_saved)
+        else:
+            pending.append((i, image_hash, processed_image, perceptual))
+    
+    if pending:
+        batch = np.concatenate([processed_image for _, _, processed_image, _ in pending])
+        try:
+            predictions = await asyncio.wrap_future(serving.batcher.submit(batch, component="predict"))
+            refined = [(row, 0) for row in predictions]
+            if serving.predictor.tta is not None:
+                # Borderline rows are re-checked with augmented views, in parallel. A row
+                # whose refine job cannot be queued or fails keeps its first-pass prediction.
+                refine_jobs = {}
+                for row, (i, _, _, _) in enumerate(pending):
+                    try:
+                        refine_jobs[row] = asyncio.wrap_future(inference_executor.submit(
+                            serving.predictor.refine, contents[i], predictions[row],
+                            lambda views: serving.batcher.submit(views).result()
+                        ))
+                    except InferenceOverloaded:
+                        metrics.ERRORS.inc("predict_batch", "tta_overloaded")
+                outcomes = await asyncio.gather(*refine_jobs.values(), return_exceptions=True)
+                for row, outcome in zip(refine_jobs, outcomes):
+                    if isinstance(outcome, Exception):
+                        metrics.ERRORS.inc("predict_batch", "tta_refine")
+                        print(f"[WARNING] TTA refine failed, keeping first-pass prediction: {outcome}")
+                    else:
+                        refined[row] = outcome
+            for row, (i, image_hash, _, perceptual) in enumerate(pending):
+                probabilities, tta_views = refined[row]
+                result = serving.predictor.build_result(probabilities)
+                if tta_views:
+                    result['tta_views'] = tta_views
+                result['model_version'] = serving.version
+                prediction_cache.put(image_hash, result, serving.fingerprint)
+                remember_near_duplicate(serving, perceptual, probabilities, image_hash)
+                results[i] = (result, False)
+        except Exception as e:
+            for i, _, _, _ in pending:
+                lines[i] = {"index": offset + i, "success": False, "error": f"Prediction failed: {e}", "filename": files[i].filename}
+    
+    outbox_items = []
+    for i, (result, already_saved) in results.items():
+        file = files[i]
+        if result.get('is_unidentified', False):
+            lines[i] = {"index": offset + i, **unidentified_payload(result, file.filename)}
+            continue
+        lines[i] = {"index": offset + i, **prediction_payload(result, file.filename)}
+        if not already_saved:
+            outbox_items.append((build_prediction_record(result, file.filename), contents[i], file.content_type))
+    
+    return lines, outbox_items
 
 @app.get("/")
 async def root():
@@ -48,12 +538,31 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    """Health check endpoint"""
+    """Health check endpoint (answers immediately, even while the model is still loading)"""
+    serving = model_manager.active
     return {
         "status": "healthy",
-        "model_loaded": predictor.model is not None
+        "model_loaded": serving is not None and serving.predictor.model is not None,
+        "model_version": serving.version if serving else active_version,
+        "ready": serving is not None and serving.warmup.ready,
+        "model_error": startup_status["model_error"]
     }
 
+@app.get("/ready")
+async def readiness_check():
+    """Readiness endpoint: 200 only once model warm-up has completed"""
+    serving = model_manager.active
+    if serving is None:
+        status = {
+            "ready": False,
+            "state": "failed" if startup_status["model_error"] else "loading",
+            "error": startup_status["model_error"],
+            "model_version": active_version
+        }
+        return JSONResponse(status_code=503, content=status)
+    status = {**serving.warmup.status(), "model_version": serving.version}
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
+
 @app.post("/predict")
 async def predict_disease(file: UploadFile = File(...)):
     """
@@ -65,96 +574,289 @@ async def predict_disease(file: UploadFile = File(...)):
     Returns:
         JSON with prediction results
     """
+    started = time.perf_counter()
+    outcome = "error"
     try:
         # Validate file type
         if not file.content_type.startswith('image/'):
+            outcome = "invalid"
             raise HTTPException(
                 status_code=400, 
                 detail="File must be an image"
             )
         
         # Read image bytes
-        image_bytes = await file.read()
+        with metrics.stage("upload_read", component="predict"):
+            image_bytes = await file.read()
         
-        # Make prediction
-        result = predictor.predict(image_bytes)
+        # Make prediction off the event loop (rejected with 503 when the backlog is full)
+        try:
+            result, already_saved = await inference_executor.run(run_inference, image_bytes)
+        except InferenceOverloaded as overloaded:
+            outcome = "overloaded"
+            raise HTTPException(
+                status_code=503,
+                detail=f"Server is busy: {overloaded}",
+                headers={"Retry-After": str(config.RETRY_AFTER_SECONDS)}
+            )
+        except ModelNotReady as not_ready:
+            outcome = "not_ready"
+            raise HTTPException(
+                status_code=503,
+                detail=str(not_ready),
+                headers={"Retry-After": str(config.RETRY_AFTER_SECONDS)}
+            )
+        
+        metrics.PREDICTIONS.inc(result['predicted_class'])
         
         # Check if image is unidentified
         if result.get('is_unidentified', False):
+            outcome = "unidentified"
             return JSONResponse(
                 status_code=400,
-                content={
-                    "success": False,
-                    "error": "Image not recognized",
-                    "prediction": "Unidentified",
-                    "confidence": result['confidence'],
-                    "message": "This image does not appear to be a tomato leaf or the disease is not clearly identifiable.",
-                    "recommendations": result['safety_recommendations']['next_steps'],
-                    "filename": file.filename
-                }
+                content=unidentified_payload(result, file.filename)
             )
         
-        # Save to Supabase (only for healthy and diseased predictions)
-        try:
-            supabase = get_supabase_client()
-            
-            # Generate unique filename
-            file_id = str(uuid.uuid4())
-            file_ext = file.filename.split('.')[-1] if '.' in file.filename else 'jpg'
-            storage_path = f"{result['predicted_class']}/{file_id}.{file_ext}"
-            
-            # Upload to Supabase Storage
-            supabase.storage.from_("tomato-leaves").upload(
-                storage_path,
-                image_bytes,
-                file_options={"content-type": file.content_type}
-            )
-            
-            # Get public URL
-            image_url = supabase.storage.from_("tomato-leaves").get_public_url(storage_path)
-            
-            # Insert record into database
-            prediction_data = {
-                "id": file_id,
-                "storage_path": storage_path,
-                "image_url": image_url,
-                "predicted_label": result['predicted_class'],
-                "confidence": float(result['confidence']),
-                "uploader_name": "anonymous",
-                "created_at": datetime.utcnow().isoformat(),
-                "updated_at": datetime.utcnow().isoformat()
-            }
-            
-            supabase.table("predictions").insert(prediction_data).execute()
-            
-            print(f"[SUCCESS] Saved prediction to Supabase: {file_id} - {result['predicted_class']}")
-        except Exception as db_error:
-            print(f"[WARNING] Failed to save to Supabase: {db_error}")
-            # Continue even if database save fails
+        # Queue for Supabase (only for healthy and diseased predictions, not for
+        # exact repeats and, if configured, not for near-duplicates)
+        if not already_saved:
+            try:
+                with metrics.stage("outbox_enqueue", component="predict"):
+                    await run_in_threadpool(save_prediction, result, image_bytes, file.filename, file.content_type)
+            except Exception as db_error:
+                metrics.ERRORS.inc("predict", "outbox_enqueue")
+                print(f"[WARNING] Failed to queue prediction for Supabase: {db_error}")
+                # Continue even if database save fails
         
-        return JSONResponse(content={
-            "success": True,
-            "prediction": result['predicted_class'],
-            "confidence": result['confidence'],
-            "all_predictions": result['all_predictions'],
-            "filename": file.filename
-        })
+        outcome = "success"
+        return JSONResponse(content=prediction_payload(result, file.filename))
         
+    except HTTPException:
+        raise
     except Exception as e:
+        metrics.ERRORS.inc("predict", "inference")
         print(f"[ERROR] Prediction error: {e}")
         raise HTTPException(
             status_code=500,
             detail=f"Prediction failed: {str(e)}"
         )
+    finally:
+        metrics.OUTCOMES.inc(outcome)
+        metrics.REQUEST_SECONDS.observe(time.perf_counter() - started, "/predict", outcome)
+
+def run_explain(image_bytes, class_name):
+    """Grad-CAM for one image with the active model (runs on the inference executor)"""
+    with metrics.component("explain"):
+        serving = model_manager.acquire()
+        try:
+            explanation = serving.predictor.explain(image_bytes, class_name)
+            explanation['model_version'] = serving.version
+            return explanation
+        finally:
+            serving.release()
+
+@app.post("/predict/explain")
+async def explain_prediction(file: UploadFile = File(...), target_class: Optional[str] = Query(None)):
+    """
+    Grad-CAM heatmap showing which parts of the leaf drove the prediction
+    
+    Args:
+        file: Image file (JPEG, PNG, etc.)
+        target_class: Class to explain (default: the predicted class)
+    
+    Returns:
+        JSON with the raw heatmap (last conv feature-map grid, values in [0, 1]),
+        a base64 JPEG overlay at the model input size, the prediction and timings
+    """
+    if not config.EXPLAIN_ENABLED:
+        raise HTTPException(status_code=404, detail="Explanations are disabled")
+    if not file.content_type.startswith('image/'):
+        raise HTTPException(status_code=400, detail="File must be an image")
+    
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        image_bytes = await file.read()
+        explanation = await inference_executor.run(run_explain, image_bytes, target_class)
+        outcome = "success"
+        return {"success": True, "filename": file.filename, **explanation}
+    except InferenceOverloaded as overloaded:
+        outcome = "overloaded"
+        raise HTTPException(status_code=503, detail=f"Server is busy: {overloaded}", headers={"Retry-After": str(config.RETRY_AFTER_SECONDS)})
+    except ModelNotReady as not_ready:
+        outcome = "not_ready"
+        raise HTTPException(status_code=503, detail=str(not_ready), headers={"Retry-After": str(config.RETRY_AFTER_SECONDS)})
+    except ExplainerUnavailable as unavailable:
+        outcome = "unavailable"
+        raise HTTPException(status_code=501, detail=str(unavailable))
+    except ValueError as invalid:
+        outcome = "invalid"
+        raise HTTPException(status_code=400, detail=str(invalid))
+    except Exception as e:
+        metrics.ERRORS.inc("explain", "gradcam")
+        print(f"[ERROR] Explanation error: {e}")
+        raise HTTPException(status_code=500, detail=f"Explanation failed: {str(e)}")
+    finally:
+        metrics.REQUEST_SECONDS.observe(time.perf_counter() - started, "/predict/explain", outcome)
+
+@app.post("/predict/batch")
+async def predict_disease_batch(files: List[UploadFile] = File(...)):
+    """
+    Predict many leaf images from one multipart upload
+    
+    Files are processed in model-sized chunks (decoded in parallel, then run
+    as one batch) and results are streamed back as NDJSON, one line per file
+    as each chunk finishes, followed by a summary line. New predictions for
+    the whole upload are queued together and saved with bulk inserts.
+    
+    Args:
+        files: Image files (JPEG, PNG, etc.)
+    
+    Returns:
+        application/x-ndjson stream of per-file results
+    """
+    if len(files) > config.BATCH_UPLOAD_MAX_FILES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many files: at most {config.BATCH_UPLOAD_MAX_FILES} per request"
+        )
+    
+    if not inference_executor.has_capacity():
+        raise HTTPException(
+            status_code=503,
+            detail="Server is busy",
+            headers={"Retry-After": str(config.RETRY_AFTER_SECONDS)}
+        )
+    
+    if model_manager.active is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Model is still loading",
+            headers={"Retry-After": str(config.RETRY_AFTER_SECONDS)}
+        )
+    
+    async def stream_results():
+        summary = {"done": True, "total": len(files), "succeeded": 0, "unidentified": 0, "failed": 0}
+        started = time.perf_counter()
+        try:
+            for offset in range(0, len(files), config.BATCH_MAX_SIZE):
+                serving = model_manager.acquire()
+                try:
+                    lines, outbox_items = await predict_batch_chunk(serving, offset, files[offset:offset + config.BATCH_MAX_SIZE])
+                finally:
+                    serving.release()
+                
+                # Journal now (so a disconnect loses nothing); workers are woken once at the end
+                try:
+                    await run_in_threadpool(outbox.enqueue_many, outbox_items, False)
+                except Exception as db_error:
+                    metrics.ERRORS.inc("predict_batch", "outbox_enqueue")
+                    print(f"[WARNING] Failed to queue batch predictions for Supabase: {db_error}")
+                
+                for line in lines:
+                    if line.get("success"):
+                        summary["succeeded"] += 1
+                        metrics.OUTCOMES.inc("success")
+                        metrics.PREDICTIONS.inc(line["prediction"])
+                    elif line.get("prediction") == "Unidentified":
+                        summary["unidentified"] += 1
+                        metrics.OUTCOMES.inc("unidentified")
+                        metrics.PREDICTIONS.inc("Unidentified")
+                    else:
+                        summary["failed"] += 1
+                        metrics.OUTCOMES.inc("error")
+                    yield json.dumps(line) + "\n"
+            
+            yield json.dumps(summary) + "\n"
+        finally:
+            outbox.wake()
+            outcome = "success" if summary["failed"] == 0 else "partial"
+            metrics.REQUEST_SECONDS.observe(time.perf_counter() - started, "/predict/batch", outcome)
+    
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
+# Queue depths are read at scrape time
+metrics.REGISTRY.gauge("fito_inference_pending", "Requests queued or running on the inference executor", lambda: inference_executor.stats()["pending"])
+metrics.REGISTRY.gauge("fito_batch_queue_depth", "Items waiting in the active model's micro-batcher", lambda: model_manager.active.batcher.stats()["queue_depth"] if model_manager.active else 0)
+metrics.REGISTRY.gauge("fito_outbox_pending", "Predictions journaled but not yet saved to Supabase", lambda: outbox.stats()["pending"])
+metrics.REGISTRY.gauge("fito_outbox_dead_letter", "Predictions that ran out of save attempts and are no longer retried", lambda: outbox.stats()["dead_letter"])
+
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus metrics: per-stage latency histograms, outcome and class counters"""
+    return Response(content=await run_in_threadpool(metrics.REGISTRY.render), media_type=metrics.CONTENT_TYPE)
+
+@app.get("/stats/batching")
+async def get_batching_stats():
+    """Get micro-batching queue depth, batch-size histogram and wait times"""
+    if model_manager.active is None:
+        raise HTTPException(status_code=503, detail="Model is still loading")
+    return model_manager.active.batcher.stats()
+
+@app.get("/stats/inference")
+async def get_inference_stats():
+    """Get inference executor backlog and admission-control statistics"""
+    return inference_executor.stats()
+
+@app.get("/stats/outbox")
+async def get_outbox_stats():
+    """Get persistence outbox depth and retry statistics"""
+    return await run_in_threadpool(outbox.stats)
+
+@app.get("/stats/cache")
+async def get_cache_stats():
+    """Get prediction cache hit/miss counters"""
+    return prediction_cache.stats()
+
+@app.get("/stats/near_duplicates")
+async def get_near_duplicate_stats():
+    """Get near-duplicate lookups, matches and match distances"""
+    if near_duplicates is None:
+        return {"enabled": False}
+    return {"enabled": True, "skip_storage": config.NEAR_DUP_SKIP_STORAGE, **near_duplicates.stats()}
+
+@app.get("/stats/leaf_gate")
+async def get_leaf_gate_stats():
+    """Get leaf gate rejection counts and latency"""
+    if leaf_gate is None:
+        return {"enabled": False}
+    return {"enabled": True, **leaf_gate.stats()}
+
+@app.get("/stats/tta")
+async def get_tta_stats():
+    """Get test-time augmentation trigger rate, changed predictions and added latency"""
+    if tta is None:
+        return {"enabled": False}
+    return {"enabled": True, **tta.stats()}
+
+@app.get("/stats/explain")
+async def get_explain_stats():
+    """Get Grad-CAM request count and latency against the target"""
+    serving = model_manager.active
+    if not config.EXPLAIN_ENABLED or serving is None:
+        return {"enabled": False}
+    try:
+        explainer = await run_in_threadpool(serving.predictor.explainer)
+    except ExplainerUnavailable as unavailable:
+        return {"enabled": False, "error": str(unavailable)}
+    return {"enabled": True, **explainer.stats()}
 
 @app.get("/classes")
 async def get_classes():
     """Get list of all disease classes"""
+    if model_manager.active is None:
+        raise HTTPException(status_code=503, detail="Model is still loading")
     return {
-        "classes": predictor.class_names,
-        "total_classes": len(predictor.class_names)
+        "classes": model_manager.active.predictor.class_names,
+        "total_classes": len(model_manager.active.predictor.class_names)
     }
 
+# Module-level work must stay cheap: the model, TensorFlow and Supabase all load in lifespan
+import_seconds = time.perf_counter() - _import_started
+if import_seconds > config.IMPORT_BUDGET_SECONDS:
+    print(f"[WARNING] Importing app took {import_seconds:.2f}s (budget {config.IMPORT_BUDGET_SECONDS:.2f}s); "
+          "profile with: python -X importtime -c \"import app\"")
+
 if __name__ == "__main__":
     print("[FITO] Starting Fito API Server...")
     print("=" * 50)
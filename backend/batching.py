@@ -0,0 +1,194 @@
+import threading
+import queue
+import time
+from collections import deque
+from concurrent.futures import Future
+import numpy as np
+import metrics
+
+
+class MicroBatcher:
+    """
+    Gathers preprocessed images submitted from many requests into one model call.
+
+    The worker thread waits for the first item, then keeps collecting until either
+    `window_ms` has passed or `max_batch_size` rows are queued, runs `predict_fn`
+    once on the stacked batch and resolves each caller's future with its own rows.
+    """
+
+    def __init__(self, predict_fn, max_batch_size=16, window_ms=10):
+        """Initialize the batching scheduler"""
+        self.predict_fn = predict_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.window = max(0.0, window_ms) / 1000.0
+        self._queue = queue.Queue()
+        self._worker = None
+        self._lock = threading.Lock()
+        self._batch_buffer = None
+        self._stopped = False
+
+        # Statistics for tuning the window and batch size
+        self._batch_size_histogram = {}
+        self._total_requests = 0
+        self._total_batches = 0
+        self._total_rows = 0
+        self._recent_waits = deque(maxlen=1000)
+        self._max_wait = 0.0
+
+    def start(self):
+        """Start the background batching thread"""
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._lock:
+            self._stopped = False
+        self._worker = threading.Thread(target=self._run, name="fito-micro-batcher", daemon=True)
+        self._worker.start()
+        print(f"[SUCCESS] Micro-batcher started (max_batch_size={self.max_batch_size}, window={self.window * 1000:.1f}ms)")
+
+    def stop(self, timeout=5.0):
+        """
+        Stop the batching thread after draining queued work
+
+        Work already queued is still run; anything submitted afterwards fails
+        immediately with a RuntimeError instead of waiting on a future that no
+        worker will ever resolve.
+        """
+        with self._lock:
+            if self._stopped:
+                return
+            self._stopped = True
+            if self._worker is not None:
+                self._queue.put(None)
+        if self._worker is None:
+            return
+        self._worker.join(timeout=timeout)
+        if not self._worker.is_alive():
+            self._fail_pending()
+        self._worker = None
+
+    def _fail_pending(self):
+        """Fail every item left in the queue (only once the worker has exited)"""
+        error = RuntimeError("Micro-batcher is stopped")
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if item is not None and not item[1].cancelled():
+                item[1].set_exception(error)
+
+    def submit(self, image_batch, component=None):
+        """
+        Queue a preprocessed batch of shape (n, H, W, C) for inference
+
+        `component` labels the inference stage timings (default: the calling
+        thread's metrics component), so warm-up and TTA views stay out of the
+        request-path series.
+
+        Returns:
+            concurrent.futures.Future resolving to the probability rows for this batch
+        """
+        future = Future()
+        with self._lock:
+            if self._stopped:
+                future.set_exception(RuntimeError("Micro-batcher is stopped"))
+                return future
+            self._queue.put((image_batch, future, time.perf_counter(), component or metrics.current_component()))
+        return future
+
+    def _run(self):
+        """Worker loop: collect a batch within the window, then run it"""
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+
+            items = [first]
+            rows = len(first[0])
+            deadline = time.perf_counter() + self.window
+            stopping = False
+
+            while rows < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                items.append(item)
+                rows += len(item[0])
+
+            self._process(items)
+            if stopping:
+                return
+
+    def _process(self, items):
+        """Run one model call for the collected items and resolve their futures"""
+        started = time.perf_counter()
+
+        try:
+            batch = self._stack([item[0] for item in items])
+            components = {item[3] for item in items}
+            with metrics.component(components.pop() if len(components) == 1 else "mixed"):
+                predictions = np.asarray(self.predict_fn(batch))
+        except Exception as e:
+            print(f"[ERROR] Batched prediction failed: {e}")
+            for _, future, _, _ in items:
+                if not future.cancelled():
+                    future.set_exception(e)
+            return
+
+        self._record(len(batch), [started - enqueued for _, _, enqueued, _ in items])
+
+        offset = 0
+        for image_batch, future, _, _ in items:
+            count = len(image_batch)
+            if not future.cancelled():
+                future.set_result(predictions[offset:offset + count])
+            offset += count
+
+    def _stack(self, arrays):
+        """Concatenate request arrays into a reusable batch buffer (only used by the worker thread)"""
+        rows = sum(len(array) for array in arrays)
+        sample = arrays[0]
+        buffer = self._batch_buffer
+        if buffer is None or buffer.shape[1:] != sample.shape[1:] or buffer.dtype != sample.dtype:
+            buffer = np.empty((self.max_batch_size,) + sample.shape[1:], dtype=sample.dtype)
+            self._batch_buffer = buffer
+        if rows > len(buffer):
+            return np.concatenate(arrays, axis=0)
+        return np.concatenate(arrays, axis=0, out=buffer[:rows])
+
+    def _record(self, batch_size, waits):
+        """Update batch-size histogram and wait-time statistics"""
+        with self._lock:
+            self._batch_size_histogram[batch_size] = self._batch_size_histogram.get(batch_size, 0) + 1
+            self._total_batches += 1
+            self._total_requests += len(waits)
+            self._total_rows += batch_size
+            self._recent_waits.extend(waits)
+            self._max_wait = max(self._max_wait, max(waits))
+
+    def stats(self):
+        """Get queue depth, batch-size histogram and wait-time statistics"""
+        with self._lock:
+            waits_ms = np.array(self._recent_waits) * 1000.0
+            return {
+                "queue_depth": self._queue.qsize(),
+                "max_batch_size": self.max_batch_size,
+                "window_ms": self.window * 1000.0,
+                "total_requests": self._total_requests,
+                "total_batches": self._total_batches,
+                "avg_batch_size": (self._total_rows / self._total_batches) if self._total_batches else 0.0,
+                "batch_size_histogram": {str(k): v for k, v in sorted(self._batch_size_histogram.items())},
+                "wait_ms": {
+                    "avg": float(waits_ms.mean()) if len(waits_ms) else 0.0,
+                    "p50": float(np.percentile(waits_ms, 50)) if len(waits_ms) else 0.0,
+                    "p95": float(np.percentile(waits_ms, 95)) if len(waits_ms) else 0.0,
+                    "max": self._max_wait * 1000.0
+                }
+            }
@@ -0,0 +1,139 @@
+import os
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Model file served by the API (relative to the backend directory)
+MODEL_PATH = os.getenv("FITO_MODEL_PATH", os.path.join(BACKEND_DIR, "trained_model_fito_outdoor.h5"))
+
+# Micro-batching: requests arriving within the window are run as one model call
+BATCH_WINDOW_MS = float(os.getenv("FITO_BATCH_WINDOW_MS", "10"))
+BATCH_MAX_SIZE = int(os.getenv("FITO_BATCH_MAX_SIZE", "16"))
+
+# Inference executor: decode + preprocess + predict run off the event loop
+INFERENCE_WORKERS = int(os.getenv("FITO_INFERENCE_WORKERS", str(BATCH_MAX_SIZE)))
+# Admission control: requests beyond this backlog are rejected with 503
+INFERENCE_MAX_PENDING = int(os.getenv("FITO_INFERENCE_MAX_PENDING", "64"))
+RETRY_AFTER_SECONDS = int(os.getenv("FITO_RETRY_AFTER_SECONDS", "1"))
+
+# Persistence outbox: predictions are journaled locally and saved to Supabase in the background
+OUTBOX_PATH = os.getenv("FITO_OUTBOX_PATH", os.path.join(BACKEND_DIR, "outbox", "outbox.db"))
+OUTBOX_WORKERS = int(os.getenv("FITO_OUTBOX_WORKERS", "2"))
+OUTBOX_BATCH_SIZE = int(os.getenv("FITO_OUTBOX_BATCH_SIZE", "200"))
+# Entries failing this many times are dead-lettered (kept in the journal, no longer retried)
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("FITO_OUTBOX_MAX_ATTEMPTS", "50"))
+
+# Prediction cache keyed by image SHA-256 + model fingerprint (set FITO_CACHE_DIR to also cache on disk)
+CACHE_MAX_ENTRIES = int(os.getenv("FITO_CACHE_MAX_ENTRIES", "1024"))
+CACHE_DIR = os.getenv("FITO_CACHE_DIR", "")
+
+# Inference backend: 'keras', 'savedmodel', 'tflite' or 'onnx' (empty = inferred from the model artifact)
+INFERENCE_BACKEND = os.getenv("FITO_INFERENCE_BACKEND", "") or None
+# Worker processes serving on this node (set by serve.py; uvicorn --workers alone does not set it)
+WORKERS = max(1, int(os.getenv("FITO_WORKERS", "1")))
+
+def available_cpus():
+    """CPU cores this process may run on"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+# TFLite's default XNNPACK delegate is faster but repacks weights into private
+# per-process buffers, so with several workers each one holds its own packed copy. Set
+# FITO_TFLITE_XNNPACK=0 to run the built-in kernels straight from the shared mmapped
+# file instead; compare PSS and latency with scripts/benchmark_workers.py --xnnpack on off.
+TFLITE_XNNPACK = os.getenv("FITO_TFLITE_XNNPACK", "1").lower() in ("1", "true", "yes")
+
+# Intra-op threads for the TFLite and ONNX Runtime backends (empty = runtime default, or an
+# even share of the cores per worker when several workers serve on this node)
+INFERENCE_THREADS = int(os.getenv("FITO_INFERENCE_THREADS", "0")) or (
+    max(1, available_cpus() // WORKERS) if WORKERS > 1 else None
+)
+
+# Keras backend call path: 'compiled' (traced tf.function), 'call' or 'predict'; optional XLA JIT
+KERAS_CALL_MODE = os.getenv("FITO_KERAS_CALL_MODE", "compiled")
+XLA_JIT = os.getenv("FITO_XLA_JIT", "0").lower() in ("1", "true", "yes")
+
+# Startup warm-up: batch sizes run through the serving path before /ready turns true
+WARMUP_BATCH_SIZES = [int(size) for size in os.getenv("FITO_WARMUP_BATCH_SIZES", f"1,{BATCH_MAX_SIZE}").split(",") if size.strip()]
+WARMUP_ITERATIONS = int(os.getenv("FITO_WARMUP_ITERATIONS", "3"))
+
+# /predict/batch: maximum number of files accepted in one multipart request
+BATCH_UPLOAD_MAX_FILES = int(os.getenv("FITO_BATCH_UPLOAD_MAX_FILES", "200"))
+
+# Versioned model registry (see model_registry.py); its ACTIVE version takes precedence over FITO_MODEL_PATH
+MODEL_REGISTRY_DIR = os.getenv("FITO_MODEL_REGISTRY_DIR", os.path.join(BACKEND_DIR, "models"))
+
+# Shadow evaluation: mirror a sample of /predict traffic to a candidate model (registry
+# version or model path; empty = off). The shadow must be a .tflite or .onnx artifact so
+# its interpreter is limited to FITO_SHADOW_THREADS threads (Keras models would share
+# TensorFlow's process-wide pool with the primary). It runs on one background thread
+# busy at most FITO_SHADOW_CPU_FRACTION of the time, i.e. about
+# FITO_SHADOW_THREADS x FITO_SHADOW_CPU_FRACTION cores.
+SHADOW_VERSION = os.getenv("FITO_SHADOW_VERSION", "") or None
+SHADOW_MODEL_PATH = os.getenv("FITO_SHADOW_MODEL_PATH", "") or None
+SHADOW_SAMPLE_RATE = float(os.getenv("FITO_SHADOW_SAMPLE_RATE", "0.1"))
+SHADOW_CPU_FRACTION = float(os.getenv("FITO_SHADOW_CPU_FRACTION", "0.25"))
+SHADOW_THREADS = max(1, int(os.getenv("FITO_SHADOW_THREADS", "1")))
+SHADOW_MAX_PENDING = int(os.getenv("FITO_SHADOW_MAX_PENDING", "4"))
+SHADOW_LOG_PATH = os.getenv("FITO_SHADOW_LOG_PATH", os.path.join(BACKEND_DIR, "shadow", "comparisons.jsonl"))
+
+# Leaf gate: cheap colour/texture classifier that rejects obvious non-leaf uploads before
+# the main model (trained by scripts/train_leaf_gate.py; disabled when the file is missing)
+LEAF_GATE_PATH = os.getenv("FITO_LEAF_GATE_PATH", os.path.join(BACKEND_DIR, "leaf_gate.json"))
+LEAF_GATE_THRESHOLD = float(os.getenv("FITO_LEAF_GATE_THRESHOLD", "-1"))
+if LEAF_GATE_THRESHOLD < 0:
+    LEAF_GATE_THRESHOLD = None
+
+# Startup: importing app.py must stay under this budget (heavy work belongs in the lifespan hook)
+IMPORT_BUDGET_SECONDS = float(os.getenv("FITO_IMPORT_BUDGET_SECONDS", "2.0"))
+
+# With several workers, each one follows the registry's ACTIVE version (a hot-swap requested
+# through one worker is picked up by the others within this interval)
+REGISTRY_POLL_SECONDS = float(os.getenv("FITO_REGISTRY_POLL_SECONDS", "5"))
+
+# Test-time augmentation: re-check predictions whose first-pass confidence falls inside
+# the band with flipped / rotated / cropped views in one batched pass (off by default)
+TTA_ENABLED = os.getenv("FITO_TTA_ENABLED", "0").lower() in ("1", "true", "yes")
+TTA_BAND = tuple(float(bound) for bound in os.getenv("FITO_TTA_BAND", "0.5,0.9").split(","))
+TTA_VIEWS = [view.strip() for view in os.getenv("FITO_TTA_VIEWS", "hflip,vflip,rot90,rot270,crops").split(",") if view.strip()]
+TTA_CROP_FRACTION = float(os.getenv("FITO_TTA_CROP_FRACTION", "0.85"))
+
+# Grad-CAM explanations (/predict/explain). Keras models are explained directly; for TFLite,
+# ONNX or SavedModel serving, point FITO_EXPLAIN_MODEL_PATH at the matching Keras .h5.
+# The explainer is built with each model version so requests only run the traced function.
+EXPLAIN_ENABLED = os.getenv("FITO_EXPLAIN_ENABLED", "1").lower() in ("1", "true", "yes")
+EXPLAIN_MODEL_PATH = os.getenv("FITO_EXPLAIN_MODEL_PATH", "") or None
+EXPLAIN_LAYER = os.getenv("FITO_EXPLAIN_LAYER", "") or None
+EXPLAIN_TARGET_MS = float(os.getenv("FITO_EXPLAIN_TARGET_MS", "300"))
+EXPLAIN_OVERLAY_ALPHA = float(os.getenv("FITO_EXPLAIN_OVERLAY_ALPHA", "0.4"))
+EXPLAIN_JPEG_QUALITY = int(os.getenv("FITO_EXPLAIN_JPEG_QUALITY", "85"))
+
+# Near-duplicate detection: uploads whose perceptual hash is within FITO_NEAR_DUP_MAX_DISTANCE
+# bits (of 64) of an earlier image reuse its prediction instead of running the model.
+# With FITO_NEAR_DUP_SKIP_STORAGE they are also not saved to the bucket/table again.
+# Opt-in: a different leaf within the distance gets that leaf's diagnosis, so check the
+# cross-class false-match rate in scripts/benchmark_near_duplicates.py before enabling.
+NEAR_DUP_ENABLED = os.getenv("FITO_NEAR_DUP_ENABLED", "0").lower() in ("1", "true", "yes")
+NEAR_DUP_METHOD = os.getenv("FITO_NEAR_DUP_METHOD", "dhash")
+NEAR_DUP_MAX_DISTANCE = int(os.getenv("FITO_NEAR_DUP_MAX_DISTANCE", "6"))
+NEAR_DUP_MAX_ENTRIES = int(os.getenv("FITO_NEAR_DUP_MAX_ENTRIES", "100000"))
+NEAR_DUP_SKIP_STORAGE = os.getenv("FITO_NEAR_DUP_SKIP_STORAGE", "0").lower() in ("1", "true", "yes")
+
+# Admin dataset browser: exact row counts per filter are reused for this long (0 = always recount)
+DATASET_COUNT_TTL_SECONDS = float(os.getenv("FITO_DATASET_COUNT_TTL_SECONDS", "30"))
+
+# Dataset exports read this many rows per keyset page (keep <= the PostgREST max-rows setting)
+EXPORT_PAGE_SIZE = int(os.getenv("FITO_EXPORT_PAGE_SIZE", "1000"))
+
+# ZIP dataset exports download images from storage with this many threads
+EXPORT_DOWNLOAD_WORKERS = max(1, int(os.getenv("FITO_EXPORT_DOWNLOAD_WORKERS", "8")))
+
+# Bulk relabel/delete: largest selection per request, and ids per UPDATE/DELETE ... IN (...)
+# and storage remove() call (ids travel in the URL, so keep batches to a few hundred)
+BULK_MAX_ITEMS = int(os.getenv("FITO_BULK_MAX_ITEMS", "10000"))
+BULK_BATCH_SIZE = max(1, int(os.getenv("FITO_BULK_BATCH_SIZE", "200")))
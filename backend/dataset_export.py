@@ -0,0 +1,225 @@
+import io
+import os
+import csv
+import zlib
+import zipfile
+import itertools
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# Columns fetched for exports (created_at and id also drive the keyset cursor)
+BASE_EXPORT_COLUMNS = "id, predicted_label, confidence, final_label, uploader_name, created_at, image_url, storage_path"
+# model_version comes from database/model_versions_schema.sql; without that migration
+# exports fall back to BASE_EXPORT_COLUMNS and leave the column empty
+EXPORT_COLUMNS = f"{BASE_EXPORT_COLUMNS}, model_version"
+
+# Columns needed to lay out the ZIP export
+ZIP_COLUMNS = "id, predicted_label, final_label, storage_path, created_at"
+
+CSV_HEADER = ["ID", "Predicted Label", "Confidence", "Final Label", "Uploader", "Created At", "Image URL"]
+
+# format -> (media type, file extension)
+EXPORT_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrows")
+}
+
+
+def is_missing_column(error, column):
+    """True if a PostgREST error says `column` does not exist (migration not applied yet)"""
+    message = str(error)
+    return column in message and ("42703" in message or "does not exist" in message)
+
+
+def csv_chunks(pages):
+    """UTF-8 CSV bytes, one chunk per page of rows"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_HEADER)
+    for rows in pages:
+        for item in rows:
+            writer.writerow([
+                item.get("id"),
+                item.get("predicted_label"),
+                item.get("confidence"),
+                item.get("final_label", ""),
+                item.get("uploader_name", ""),
+                item.get("created_at"),
+                item.get("image_url", "")
+            ])
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def gzip_chunks(chunks, level=6):
+    """Gzip a stream of byte chunks incrementally"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+class _ChunkSink:
+    """Write-only file object that hands written bytes back to a generator"""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def writable(self):
+        return True
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        """Bytes written since the last drain"""
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def arrow_schema():
+    """Schema of the Parquet / Arrow exports"""
+    import pyarrow as pa
+    return pa.schema([
+        ("id", pa.string()),
+        ("storage_path", pa.string()),
+        ("image_url", pa.string()),
+        ("predicted_label", pa.string()),
+        ("final_label", pa.string()),
+        ("label", pa.string()),
+        ("confidence", pa.float64()),
+        ("uploader_name", pa.string()),
+        ("model_version", pa.string()),
+        ("created_at", pa.string())
+    ])
+
+
+def arrow_chunks(pages, fmt, row_group_rows=65536):
+    """
+    Parquet or Arrow IPC stream bytes for pages of rows
+
+    `label` is the effective label (final_label if set, otherwise
+    predicted_label), i.e. the training target. Arrow record batches are
+    emitted per page; Parquet buffers pages into row groups of about
+    row_group_rows rows so the file stays efficient to scan.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = arrow_schema()
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression="zstd") if fmt == "parquet" else pa.ipc.new_stream(sink, schema)
+
+    pending, pending_rows = [], 0
+    for rows in pages:
+        for row in rows:
+            row["label"] = row.get("final_label") or row.get("predicted_label")
+        batch = pa.RecordBatch.from_pylist(rows, schema=schema)
+        if fmt == "parquet":
+            pending.append(batch)
+            pending_rows += batch.num_rows
+            if pending_rows < row_group_rows:
+                continue
+            writer.write_table(pa.Table.from_batches(pending, schema=schema))
+            pending, pending_rows = [], 0
+        else:
+            writer.write_batch(batch)
+        data = sink.drain()
+        if data:
+            yield data
+
+    if pending:
+        writer.write_table(pa.Table.from_batches(pending, schema=schema))
+    writer.close()
+    yield sink.drain()
+
+
+def export_chunks(pages, fmt="csv", compress=False):
+    """Byte chunks of an export in `fmt`, optionally gzipped"""
+    chunks = csv_chunks(pages) if fmt == "csv" else arrow_chunks(pages, fmt)
+    return gzip_chunks(chunks) if compress else chunks
+
+
+def safe_path_component(value, fallback):
+    """
+    One archive path component built from free-form text
+
+    Separators (/ and \\), drive colons and control characters become '_', and
+    leading/trailing dots and spaces are stripped, so '.', '..' and friends can
+    never climb out of the folder they are placed in.
+    """
+    cleaned = "".join("_" if ch in '/\\:' or ord(ch) < 32 else ch for ch in str(value))
+    cleaned = cleaned.strip(". ")
+    return cleaned or fallback
+
+
+def zip_entry_name(row, root="training"):
+    """<root>/<effective label>/<id><ext>, the layout flow_from_directory expects"""
+    label = safe_path_component(row.get("final_label") or row.get("predicted_label") or "", "Unlabeled")
+    extension = os.path.splitext(row.get("storage_path") or "")[1]
+    if not extension[1:].isalnum():
+        extension = ".jpg"
+    return f"{root}/{label}/{safe_path_component(row['id'], 'image')}{extension}"
+
+
+def _downloads_in_order(rows, download, workers):
+    """(row, future) in row order, with at most 2 * workers downloads in flight"""
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="fito-export")
+    pending = deque()
+    try:
+        for row in rows:
+            pending.append((row, executor.submit(download, row["storage_path"])))
+            if len(pending) >= workers * 2:
+                yield pending.popleft()
+        while pending:
+            yield pending.popleft()
+    finally:
+        # Client went away: drop the queued downloads instead of finishing them
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def zip_chunks(pages, download, workers=8, root="training"):
+    """
+    Streamed ZIP of the images behind pages of rows
+
+    `download(storage_path)` returns the object's bytes and runs in a pool of
+    `workers` threads. Images are written (stored, JPEGs don't compress) as
+    they arrive and the archive bytes are handed out right away, so memory
+    holds at most the in-flight downloads. Objects that fail to download are
+    listed in missing.txt at the end of the archive.
+    """
+    sink = _ChunkSink()
+    missing = []
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_STORED) as archive:
+        for row, future in _downloads_in_order(itertools.chain.from_iterable(pages), download, workers):
+            try:
+                data = future.result()
+            except Exception as e:
+                missing.append(f"{row['id']}\t{row.get('storage_path')}\t{e}")
+                continue
+            archive.writestr(zip_entry_name(row, root), data)
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+        if missing:
+            print(f"[WARNING] ZIP export: {len(missing)} images could not be downloaded")
+            archive.writestr("missing.txt", "\n".join(missing) + "\n")
+    yield sink.drain()
@@ -0,0 +1,129 @@
+import json
+import time
+import base64
+import threading
+
+# Postgres planner row estimates are served by PostgREST as count="planned"
+COUNT_MODES = ("exact", "planned", "estimated", "none")
+
+
+def apply_filters(query, category=None, from_date=None, to_date=None, q=None):
+    """Apply the admin dataset filters (shared by the browser, CSV and ZIP exports)"""
+    if category and category != "All Categories":
+        # Filter by either final_label or predicted_label
+        query = query.or_(f"final_label.eq.{category},and(final_label.is.null,predicted_label.eq.{category})")
+
+    if from_date:
+        query = query.gte("created_at", from_date)
+
+    if to_date:
+        query = query.lte("created_at", to_date)
+
+    if q:
+        query = query.or_(f"storage_path.ilike.%{q}%,uploader_name.ilike.%{q}%,predicted_label.ilike.%{q}%")
+
+    return query
+
+
+def encode_cursor(row):
+    """Opaque cursor pointing just past a row in (created_at, id) descending order"""
+    payload = json.dumps([row["created_at"], row["id"]], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """(created_at, id) from a cursor (raises ValueError if it is malformed)"""
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, row_id = json.loads(payload)
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not isinstance(created_at, str) or not isinstance(row_id, str):
+        raise ValueError("Invalid cursor")
+    return created_at, row_id
+
+
+def keyset_page(query, cursor=None, limit=20):
+    """
+    Order by (created_at, id) descending and start after `cursor`
+
+    Backed by idx_predictions_created_at_id (database/dataset_pagination_schema.sql):
+    every page is an index range scan of `limit` rows, however deep it is.
+    PostgREST cannot express the row comparison (created_at, id) < (c, i), so
+    the plain `created_at <= c` bound is what starts the index scan at the
+    cursor; the or() only drops rows tied on created_at.
+    """
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        query = query.lte("created_at", created_at)
+        # Timestamps contain ':' and '.', so the values are quoted inside the or() filter
+        query = query.or_(f'created_at.lt."{created_at}",and(created_at.eq."{created_at}",id.lt."{row_id}")')
+    return query.order("created_at", desc=True).order("id", desc=True).limit(limit)
+
+
+def iter_pages(supabase, columns, filters, page_size=1000):
+    """
+    Yield every row matching the filters, newest first, one keyset page (list of rows) at a time
+
+    `columns` must include created_at and id. Paging stops at the first empty
+    page rather than the first short one, so a PostgREST max-rows limit below
+    page_size cannot end the export early.
+    """
+    cursor = None
+    while True:
+        query = apply_filters(supabase.table("predictions").select(columns), **filters)
+        rows = keyset_page(query, cursor, page_size).execute().data
+        if not rows:
+            return
+        yield rows
+        cursor = encode_cursor(rows[-1])
+
+
+class CountCache:
+    """
+    Short-lived cache of exact row counts per filter combination.
+
+    An exact count is a full scan of the matching rows; the dataset browser
+    asks for it on every page load although it barely changes between pages.
+    """
+
+    def __init__(self, ttl_seconds=30.0, max_entries=256):
+        """Initialize an empty cache"""
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, key):
+        """Cached count for a filter key, or None if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > time.monotonic():
+                self._hits += 1
+                return entry[0]
+            self._misses += 1
+            return None
+
+    def put(self, key, count):
+        """Store a count for ttl_seconds"""
+        if count is None or self.ttl_seconds <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            if len(self._entries) >= self.max_entries:
+                self._entries = {k: v for k, v in self._entries.items() if v[1] > now}
+                if len(self._entries) >= self.max_entries:
+                    self._entries.pop(next(iter(self._entries)))
+            self._entries[key] = (count, now + self.ttl_seconds)
+
+    def clear(self):
+        """Drop every cached count (e.g. after bulk deletes)"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Get hit/miss counters"""
+        with self._lock:
+            return {"entries": len(self._entries), "ttl_seconds": self.ttl_seconds, "hits": self._hits, "misses": self._misses}
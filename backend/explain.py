@@ -0,0 +1,205 @@
+import io
+import time
+import base64
+import threading
+from collections import deque
+import numpy as np
+from PIL import Image
+from image_decode import decode_image
+import metrics
+
+
+class ExplainerUnavailable(Exception):
+    """Raised when the serving model cannot produce Grad-CAM explanations"""
+
+
+def find_target_layer(layers):
+    """Index of the last layer with a spatial (4D) output, e.g. the last conv block or a nested base model"""
+    for index in range(len(layers) - 1, -1, -1):
+        output = getattr(layers[index], 'output', None)
+        if output is not None and len(output.shape) == 4:
+            return index
+    raise ExplainerUnavailable("Model has no layer with a spatial output to explain")
+
+
+def jet_colormap(values):
+    """Map values in [0, 1] to uint8 RGB with the 'jet' palette (blue -> red)"""
+    values = np.asarray(values, dtype=np.float32)[..., np.newaxis]
+    centers = np.array([3.0, 2.0, 1.0], dtype=np.float32)
+    rgb = np.clip(1.5 - np.abs(4.0 * values - centers), 0.0, 1.0)
+    return (rgb * 255.0).astype(np.uint8)
+
+
+class GradCamExplainer:
+    """
+    Grad-CAM heatmaps for a Keras classifier.
+
+    The target layer is looked up and the gradient function is built and
+    traced once, when the explainer is created: a tf.function with a fixed
+    [None, H, W, C] signature that returns per-image heatmaps for a whole
+    batch in a single forward/backward pass. Requests only call it.
+
+    Models whose base network is nested as a single layer (e.g. the
+    MobileNetV2 model from train_model_outdoor_optimized.py) cannot be cut
+    at an inner layer, so their top-level layers are replayed in order and
+    the nested model's output is used as the feature map.
+    """
+
+    def __init__(self, model, layer_name=None, target_ms=300.0, overlay_alpha=0.4, jpeg_quality=85, window=1000):
+        """
+        Args:
+            model: Loaded tf.keras model (outputs class probabilities)
+            layer_name: Layer whose feature maps are explained (default: last layer with a 4D output)
+            target_ms: Per-request latency target; slower explanations are counted in stats()
+            overlay_alpha: Heatmap opacity in the JPEG overlay
+            jpeg_quality: JPEG quality of the overlay
+            window: Recent latencies kept for the percentiles in stats()
+        """
+        import tensorflow as tf
+        from preprocessing import model_input_spec
+
+        self.model = model
+        self.input_shape, self.input_dtype = model_input_spec(model)
+        self.target_ms = float(target_ms)
+        self.overlay_alpha = float(overlay_alpha)
+        self.jpeg_quality = int(jpeg_quality)
+        self.scale = self.input_dtype.type(1.0 / 255.0)
+
+        layers = [layer for layer in model.layers if not isinstance(layer, tf.keras.layers.InputLayer)]
+        index = layers.index(model.get_layer(layer_name)) if layer_name else find_target_layer(layers)
+        self.layer_name = layers[index].name
+        forward = self._build_forward(tf, model, layers, index)
+
+        signature = [
+            tf.TensorSpec([None, *self.input_shape], tf.as_dtype(self.input_dtype), name="image"),
+            tf.TensorSpec([None], tf.int32, name="class_index")
+        ]
+
+        @tf.function(input_signature=signature)
+        def gradcam(images, class_indices):
+            with tf.GradientTape() as tape:
+                features, probabilities = forward(images)
+                top = tf.argmax(probabilities, axis=-1, output_type=tf.int32)
+                targets = tf.where(class_indices >= 0, class_indices, top)
+                scores = tf.gather(probabilities, targets, axis=1, batch_dims=1)
+            # Images are independent in inference mode, so one gradient of the summed scores gives every row's own
+            grads = tape.gradient(scores, features)
+            weights = tf.reduce_mean(grads, axis=(1, 2))
+            heatmaps = tf.nn.relu(tf.einsum('bhwc,bc->bhw', features, weights))
+            peaks = tf.reduce_max(heatmaps, axis=(1, 2), keepdims=True)
+            return tf.math.divide_no_nan(heatmaps, peaks), probabilities, targets
+
+        # Trace once now so the first request doesn't pay for it
+        gradcam.get_concrete_function()
+        self._gradcam = gradcam
+
+        self._lock = threading.Lock()
+        self._latencies_ms = deque(maxlen=window)
+        self._requests = 0
+        self._over_target = 0
+
+    @staticmethod
+    def _build_forward(tf, model, layers, index):
+        """forward(images) -> (feature maps of layers[index], model outputs)"""
+        target = layers[index]
+        if not isinstance(target, tf.keras.Model):
+            try:
+                grad_model = tf.keras.Model(model.inputs, [target.output, model.output])
+                return lambda images: grad_model(images, training=False)
+            except ValueError:
+                pass
+
+        def forward(images):
+            x = images
+            features = None
+            for i, layer in enumerate(layers):
+                x = layer(x, training=False)
+                if i == index:
+                    features = x
+            return features, x
+        return forward
+
+    def explain_batch(self, images, class_indices=None):
+        """
+        Grad-CAM for a preprocessed batch in one pass
+
+        Args:
+            images: (N, H, W, C) pixels scaled to [0, 1]
+            class_indices: Class to explain per image (-1 or None = top prediction)
+
+        Returns:
+            (heatmaps (N, h, w) in [0, 1], probabilities (N, classes), explained class per image)
+        """
+        images = np.asarray(images, dtype=self.input_dtype)
+        if class_indices is None:
+            class_indices = np.full(len(images), -1, dtype=np.int32)
+        heatmaps, probabilities, targets = self._gradcam(images, np.asarray(class_indices, dtype=np.int32))
+        return heatmaps.numpy(), probabilities.numpy(), targets.numpy()
+
+    def overlay(self, image, heatmap):
+        """JPEG bytes of the heatmap blended over an RGB image"""
+        size = image.size
+        upscaled = Image.fromarray(np.uint8(np.clip(heatmap, 0.0, 1.0) * 255.0)).resize(size, Image.BILINEAR)
+        colors = jet_colormap(np.asarray(upscaled, dtype=np.float32) / 255.0)
+        blended = np.asarray(image, dtype=np.float32) * (1.0 - self.overlay_alpha) + colors * self.overlay_alpha
+        buffer = io.BytesIO()
+        Image.fromarray(blended.astype(np.uint8)).save(buffer, format='JPEG', quality=self.jpeg_quality)
+        return buffer.getvalue()
+
+    def explain(self, image_bytes, class_index=None):
+        """
+        Explain one upload
+
+        The image is decoded once at the model input size; the same pixels feed
+        the model and the overlay.
+
+        Returns:
+            Dict with the raw heatmap, base64 JPEG overlay, probabilities, explained class index and timings
+        """
+        started = time.perf_counter()
+        height, width = self.input_shape[:2]
+        image = decode_image(image_bytes, (width, height))
+        batch = np.empty((1,) + tuple(self.input_shape), dtype=self.input_dtype)
+        np.copyto(batch[0], np.asarray(image).reshape(self.input_shape), casting='unsafe')
+        np.multiply(batch, self.scale, out=batch)
+
+        gradcam_started = time.perf_counter()
+        with metrics.stage("explain"):
+            heatmaps, probabilities, targets = self.explain_batch(batch, [-1 if class_index is None else class_index])
+        overlay_started = time.perf_counter()
+        with metrics.stage("explain_overlay"):
+            overlay = self.overlay(image, heatmaps[0])
+        finished = time.perf_counter()
+
+        total_ms = (finished - started) * 1000.0
+        with self._lock:
+            self._requests += 1
+            self._over_target += int(total_ms > self.target_ms)
+            self._latencies_ms.append(total_ms)
+
+        return {
+            'heatmap': np.round(heatmaps[0], 4).tolist(),
+            'overlay_jpeg': base64.b64encode(overlay).decode('ascii'),
+            'probabilities': probabilities[0],
+            'class_index': int(targets[0]),
+            'layer': self.layer_name,
+            'timing_ms': {
+                'decode': (gradcam_started - started) * 1000.0,
+                'gradcam': (overlay_started - gradcam_started) * 1000.0,
+                'overlay': (finished - overlay_started) * 1000.0,
+                'total': total_ms
+            }
+        }
+
+    def stats(self):
+        """Get explanation count, latency percentiles and how often the target was missed"""
+        with self._lock:
+            latencies = np.array(self._latencies_ms)
+            return {
+                "layer": self.layer_name,
+                "requests": self._requests,
+                "target_ms": self.target_ms,
+                "over_target": self._over_target,
+                "p50_ms": float(np.percentile(latencies, 50)) if len(latencies) else 0.0,
+                "p95_ms": float(np.percentile(latencies, 95)) if len(latencies) else 0.0
+            }
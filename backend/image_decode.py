@@ -0,0 +1,49 @@
+import io
+from PIL import Image, ImageOps
+import metrics
+
+EXIF_ORIENTATION_TAG = 0x0112
+
+
+def decode_image(image_bytes, target_size=(224, 224)):
+    """
+    Decode an upload straight to an RGB image of `target_size`
+
+    JPEGs are decoded in draft mode: libjpeg scales the image down in the DCT
+    domain (by 1/2, 1/4 or 1/8) to the smallest size that is still at least
+    `target_size`, so a 12 MP phone photo never gets fully decoded. Other
+    formats (PNG, WebP, ...) are decoded normally. EXIF orientation is applied
+    before the final resize.
+
+    Args:
+        image_bytes: Raw uploaded image
+        target_size: (width, height) expected by the model
+
+    Returns:
+        PIL.Image in RGB mode with size `target_size`
+    """
+    with metrics.stage("decode"):
+        image = Image.open(io.BytesIO(image_bytes))
+
+        if image.format == 'JPEG':
+            # Rotated EXIF orientations swap width and height, so request a draft
+            # that covers the larger target side in both dimensions
+            side = max(target_size)
+            image.draft('RGB', (side, side))
+
+        # Decode here (PIL is lazy) so the resize stage is timed on its own
+        image.load()
+
+        # Only transpose when needed (exif_transpose otherwise returns a full copy)
+        if image.getexif().get(EXIF_ORIENTATION_TAG, 1) != 1:
+            image = ImageOps.exif_transpose(image)
+
+        # Convert to RGB if needed
+        if image.mode != 'RGB':
+            image = image.convert('RGB')
+
+    with metrics.stage("resize"):
+        if image.size != tuple(target_size):
+            image = image.resize(target_size)
+
+    return image
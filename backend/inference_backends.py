@@ -0,0 +1,267 @@
+import os
+import threading
+import numpy as np
+from preprocessing import model_input_spec
+
+
+def normalize_probabilities(outputs):
+    """
+    Turn raw model outputs into a (batch, classes) float32 probability matrix
+
+    Softmax outputs are renormalized so each row sums to exactly 1 (quantized
+    runtimes drift slightly); outputs that are not already a distribution are
+    treated as logits.
+    """
+    outputs = np.asarray(outputs, dtype=np.float32)
+    outputs = outputs.reshape(outputs.shape[0], -1)
+    sums = outputs.sum(axis=1, keepdims=True)
+    if outputs.min() >= 0 and np.allclose(sums, 1.0, atol=0.05):
+        return outputs / sums
+    shifted = np.exp(outputs - outputs.max(axis=1, keepdims=True))
+    return shifted / shifted.sum(axis=1, keepdims=True)
+
+
+class InferenceBackend:
+    """
+    Interface every model runtime implements.
+
+    Subclasses load their artifact in __init__, set `model` (the underlying
+    runtime object), `input_shape` (H, W, C) and `input_dtype`, and implement
+    `_run(batch)`. Callers use `predict(batch)`, which always takes float32
+    pixels in [0, 1] and returns normalized float32 probabilities. Backend
+    specific options are passed as keyword arguments; backends ignore options
+    they do not use.
+    """
+
+    name = None
+
+    def __init__(self, model_path, num_threads=None, **options):
+        self.model_path = model_path
+        self.num_threads = num_threads
+        self.model = None
+        self.input_shape = None
+        self.input_dtype = np.dtype(np.float32)
+
+    def _run(self, image_batch):
+        """Raw model outputs for a preprocessed batch"""
+        raise NotImplementedError
+
+    def predict(self, image_batch):
+        """Class probabilities for a preprocessed batch"""
+        return normalize_probabilities(self._run(image_batch))
+
+
+class KerasBackend(InferenceBackend):
+    """
+    Serves a Keras `.h5` model through tf.keras.
+
+    `model.predict` builds a data adapter and execution loop on every call,
+    which dominates latency for small batches. By default the model is instead
+    wrapped in a tf.function with a fixed [None, H, W, C] float32 signature
+    (optionally XLA-compiled), traced once at load time and called directly.
+
+    call_mode: 'compiled' (default), 'call' (eager model.__call__) or 'predict'
+    """
+
+    name = "keras"
+    CALL_MODES = ("compiled", "call", "predict")
+
+    def __init__(self, model_path, num_threads=None, call_mode="compiled", jit_compile=False, **options):
+        """Load the Keras model and trace the serving function"""
+        super().__init__(model_path, num_threads)
+        import tensorflow as tf
+
+        if call_mode not in self.CALL_MODES:
+            raise ValueError(f"Unknown Keras call mode '{call_mode}' (choose from {', '.join(self.CALL_MODES)})")
+
+        self.model = tf.keras.models.load_model(model_path)
+        self.input_shape, self.input_dtype = model_input_spec(self.model)
+        self.call_mode = call_mode
+        self.jit_compile = bool(jit_compile)
+        self._serve = None
+
+        if call_mode == "compiled":
+            model = self.model
+            signature = [tf.TensorSpec([None, *self.input_shape], tf.as_dtype(self.input_dtype), name="image")]
+
+            @tf.function(input_signature=signature, jit_compile=self.jit_compile)
+            def serve(image_batch):
+                return model(image_batch, training=False)
+
+            # Trace once now so the first request doesn't pay for it
+            serve.get_concrete_function()
+            self._serve = serve
+
+    def _run(self, image_batch):
+        if self.call_mode == "compiled":
+            return self._serve(image_batch).numpy()
+        if self.call_mode == "call":
+            return self.model(image_batch, training=False).numpy()
+        return self.model.predict(image_batch, verbose=0)
+
+
+class SavedModelBackend(InferenceBackend):
+    """Serves a TensorFlow SavedModel directory through its `serving_default` tf.function signature"""
+
+    name = "savedmodel"
+
+    def __init__(self, model_path, num_threads=None, **options):
+        """Load the SavedModel and its serving signature"""
+        super().__init__(model_path, num_threads)
+        import tensorflow as tf
+
+        self._tf = tf
+        self.model = tf.saved_model.load(model_path)
+        self._signature = self.model.signatures["serving_default"]
+
+        _, input_specs = self._signature.structured_input_signature
+        self._input_name, input_spec = next(iter(input_specs.items()))
+        self.input_shape = tuple(int(dim) for dim in input_spec.shape[1:])
+        self.input_dtype = np.dtype(input_spec.dtype.as_numpy_dtype)
+
+    def _run(self, image_batch):
+        outputs = self._signature(**{self._input_name: self._tf.constant(image_batch, dtype=self.input_dtype)})
+        return next(iter(outputs.values())).numpy()
+
+
+def _load_tflite_interpreter(model_path, num_threads, xnnpack=True):
+    """
+    Prefer the standalone tflite_runtime package, fall back to tf.lite
+
+    Loading from model_path (not model_content) memory-maps the flatbuffer
+    read-only, so worker processes serving the same file share its pages.
+    The default XNNPACK delegate, however, repacks the weights of the ops it
+    takes over into private buffers of each process; with xnnpack=False the
+    built-in kernels read the weights straight from the shared mapping
+    (slower, notably for float models).
+    """
+    try:
+        from tflite_runtime.interpreter import Interpreter, OpResolverType
+    except ImportError:
+        import tensorflow as tf
+        Interpreter = tf.lite.Interpreter
+        OpResolverType = tf.lite.experimental.OpResolverType
+    if xnnpack:
+        return Interpreter(model_path=model_path, num_threads=num_threads)
+    return Interpreter(
+        model_path=model_path,
+        num_threads=num_threads,
+        experimental_op_resolver_type=OpResolverType.BUILTIN_WITHOUT_DEFAULT_DELEGATES
+    )
+
+
+class TFLiteBackend(InferenceBackend):
+    """
+    Serves a `.tflite` flatbuffer (float32, float16 or int8) through the TFLite interpreter.
+
+    Quantized inputs/outputs are (de)quantized here. The interpreter is not
+    thread-safe, so calls are serialized with a lock.
+    """
+
+    name = "tflite"
+
+    def __init__(self, model_path, num_threads=None, xnnpack=True, **options):
+        """Load the TFLite model (xnnpack=False skips the default XNNPACK delegate)"""
+        super().__init__(model_path, num_threads)
+        self.model = _load_tflite_interpreter(model_path, num_threads, xnnpack)
+        self.model.allocate_tensors()
+        self._lock = threading.Lock()
+        self._batch_size = None
+
+        input_details = self.model.get_input_details()[0]
+        self._input_index = input_details['index']
+        self._output_index = self.model.get_output_details()[0]['index']
+        self.input_shape = tuple(int(dim) for dim in input_details['shape'][1:])
+
+    def _resize(self, batch_size):
+        """Resize the input tensor for a new batch size (re-allocates tensors)"""
+        if batch_size == self._batch_size:
+            return
+        self.model.resize_tensor_input(self._input_index, (batch_size,) + self.input_shape)
+        self.model.allocate_tensors()
+        self._batch_size = batch_size
+
+    def _run(self, image_batch):
+        with self._lock:
+            self._resize(len(image_batch))
+
+            input_details = self.model.get_input_details()[0]
+            scale, zero_point = input_details['quantization']
+            if input_details['dtype'] != np.float32:
+                info = np.iinfo(input_details['dtype'])
+                image_batch = np.clip(np.round(image_batch / scale + zero_point), info.min, info.max)
+            self.model.set_tensor(self._input_index, image_batch.astype(input_details['dtype'], copy=False))
+            self.model.invoke()
+
+            output_details = self.model.get_output_details()[0]
+            predictions = self.model.get_tensor(self._output_index)
+            scale, zero_point = output_details['quantization']
+            if output_details['dtype'] != np.float32:
+                predictions = (predictions.astype(np.float32) - zero_point) * scale
+            return predictions
+
+
+class OnnxBackend(InferenceBackend):
+    """Serves an `.onnx` model through ONNX Runtime on CPU"""
+
+    name = "onnx"
+
+    def __init__(self, model_path, num_threads=None, **options):
+        """Create the ONNX Runtime session"""
+        super().__init__(model_path, num_threads)
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.model = ort.InferenceSession(model_path, sess_options=options, providers=["CPUExecutionProvider"])
+
+        model_input = self.model.get_inputs()[0]
+        self._input_name = model_input.name
+        # Symbolic dimensions (e.g. the batch axis) come back as strings or None
+        dims = [dim if isinstance(dim, int) else None for dim in model_input.shape[1:]]
+        if None in dims:
+            raise ValueError(f"ONNX model input has dynamic spatial dimensions: {model_input.shape}")
+        self.input_shape = tuple(dims)
+
+    def _run(self, image_batch):
+        return self.model.run(None, {self._input_name: image_batch.astype(np.float32, copy=False)})[0]
+
+
+BACKENDS = {
+    backend.name: backend
+    for backend in (KerasBackend, SavedModelBackend, TFLiteBackend, OnnxBackend)
+}
+
+
+# Backends whose num_threads bounds the model's own thread pool; Keras and
+# SavedModel run on TensorFlow's process-wide intra-op pool instead
+THREAD_BOUNDED_BACKENDS = (TFLiteBackend.name, OnnxBackend.name)
+
+
+def infer_backend_name(model_path):
+    """Pick a backend from the artifact: SavedModel directory or file extension"""
+    if os.path.isdir(model_path):
+        return SavedModelBackend.name
+    extension = os.path.splitext(model_path)[1].lower()
+    if extension == '.tflite':
+        return TFLiteBackend.name
+    if extension == '.onnx':
+        return OnnxBackend.name
+    return KerasBackend.name
+
+
+def load_backend(model_path, backend=None, num_threads=None, **options):
+    """
+    Create an inference backend for a model artifact
+
+    Args:
+        model_path: Model file (.h5, .tflite, .onnx) or SavedModel directory
+        backend: Backend name; inferred from the artifact when None
+        num_threads: Intra-op thread count (TFLite and ONNX Runtime)
+        **options: Backend-specific options (e.g. call_mode, jit_compile for Keras)
+    """
+    backend = backend or infer_backend_name(model_path)
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown inference backend '{backend}' (choose from {', '.join(BACKENDS)})")
+    return BACKENDS[backend](model_path, num_threads=num_threads, **options)
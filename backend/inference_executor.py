@@ -0,0 +1,78 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class InferenceOverloaded(Exception):
+    """Raised when the inference backlog is full and a request must be rejected"""
+
+    def __init__(self, pending, max_pending):
+        super().__init__(f"Inference backlog full ({pending}/{max_pending} requests pending)")
+        self.pending = pending
+        self.max_pending = max_pending
+
+
+class InferenceExecutor:
+    """
+    Dedicated thread pool for decode, preprocess and predict work.
+
+    Keeps blocking TensorFlow / PIL calls off the asyncio event loop and applies
+    admission control: once `max_pending` requests are queued or running, new
+    work is rejected with InferenceOverloaded instead of piling up.
+    """
+
+    def __init__(self, max_workers=16, max_pending=64):
+        """Initialize the executor"""
+        self.max_workers = max(1, int(max_workers))
+        self.max_pending = max(self.max_workers, int(max_pending))
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="fito-inference")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._rejected = 0
+        self._completed = 0
+
+    def submit(self, fn, *args, **kwargs):
+        """Submit work to the pool, or raise InferenceOverloaded if the backlog is full"""
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._rejected += 1
+                raise InferenceOverloaded(self._pending, self.max_pending)
+            self._pending += 1
+
+        try:
+            future = self._pool.submit(fn, *args, **kwargs)
+        except Exception:
+            self._release(None)
+            raise
+        future.add_done_callback(self._release)
+        return future
+
+    def has_capacity(self):
+        """True if at least one more request would currently be admitted"""
+        with self._lock:
+            return self._pending < self.max_pending
+
+    async def run(self, fn, *args, **kwargs):
+        """Run work on the pool and await its result from the event loop"""
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    def _release(self, _future):
+        """Free an admission slot once work has finished"""
+        with self._lock:
+            self._pending -= 1
+            self._completed += 1
+
+    def shutdown(self, wait=True):
+        """Stop accepting work and shut the pool down"""
+        self._pool.shutdown(wait=wait)
+
+    def stats(self):
+        """Get backlog and admission-control statistics"""
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_pending": self.max_pending,
+                "pending": self._pending,
+                "completed": self._completed,
+                "rejected": self._rejected
+            }
@@ -0,0 +1,146 @@
+import json
+import time
+import threading
+import numpy as np
+from image_decode import decode_image
+
+# Gate input size: JPEGs decode at 1/8 scale in draft mode, so this costs a few milliseconds
+GATE_SIZE = (64, 64)
+
+HUE_BINS = 12
+
+FEATURE_NAMES = (
+    [f"hue_{i}" for i in range(HUE_BINS)] +
+    [
+        "saturation_mean", "saturation_std", "value_mean", "value_std",
+        "green_fraction", "yellow_brown_fraction", "skin_fraction",
+        "gray_fraction", "white_fraction",
+        "gradient_mean", "gradient_std", "edge_fraction",
+        "colourfulness", "distinct_colours"
+    ]
+)
+
+
+def _hue_range(low_degrees, high_degrees):
+    """Hue bounds on PIL's 0-255 scale"""
+    return low_degrees * 255 / 360, high_degrees * 255 / 360
+
+
+GREEN_HUE = _hue_range(60, 170)
+YELLOW_BROWN_HUE = _hue_range(20, 60)
+SKIN_HUE = _hue_range(0, 25)
+
+
+def extract_features(image_bytes):
+    """
+    Colour and texture features for the leaf gate
+
+    Returns:
+        float32 vector ordered as FEATURE_NAMES
+    """
+    image = decode_image(image_bytes, GATE_SIZE)
+    rgb = np.asarray(image, dtype=np.float32)
+    hsv = np.asarray(image.convert('HSV'), dtype=np.float32)
+    hue, saturation, value = hsv[..., 0], hsv[..., 1], hsv[..., 2]
+
+    # Saturation-weighted hue histogram (gray pixels carry no hue information)
+    hue_histogram, _ = np.histogram(hue, bins=HUE_BINS, range=(0, 256), weights=saturation)
+    hue_histogram /= max(float(saturation.sum()), 1.0)
+
+    coloured = (saturation > 40) & (value > 40)
+    green = coloured & (hue >= GREEN_HUE[0]) & (hue < GREEN_HUE[1])
+    yellow_brown = coloured & (hue >= YELLOW_BROWN_HUE[0]) & (hue < YELLOW_BROWN_HUE[1])
+    skin = (hue < SKIN_HUE[1]) & (saturation > 40) & (saturation < 170) & (value > 80)
+    gray = saturation < 25
+    white = gray & (value > 230)
+
+    # Texture: leaves have dense mid-strength edges, screenshots have flat areas and sharp lines
+    luminance = rgb @ np.array([0.299, 0.587, 0.114], dtype=np.float32)
+    gradient = np.abs(np.diff(luminance, axis=0))[:, :-1] + np.abs(np.diff(luminance, axis=1))[:-1, :]
+
+    # Hasler-Suesstrunk colourfulness
+    rg = rgb[..., 0] - rgb[..., 1]
+    yb = 0.5 * (rgb[..., 0] + rgb[..., 1]) - rgb[..., 2]
+    colourfulness = np.hypot(rg.std(), yb.std()) + 0.3 * np.hypot(rg.mean(), yb.mean())
+
+    # Screenshots and graphics use few distinct colours (counted on a 16-level grid)
+    quantized = (rgb.astype(np.int32) >> 4).reshape(-1, 3)
+    distinct = len(np.unique(quantized[:, 0] << 8 | quantized[:, 1] << 4 | quantized[:, 2]))
+
+    return np.concatenate([
+        hue_histogram,
+        [
+            saturation.mean() / 255, saturation.std() / 255, value.mean() / 255, value.std() / 255,
+            green.mean(), yellow_brown.mean(), skin.mean(),
+            gray.mean(), white.mean(),
+            gradient.mean() / 255, gradient.std() / 255, (gradient > 40).mean(),
+            colourfulness / 255, distinct / 4096
+        ]
+    ]).astype(np.float32)
+
+
+class LeafGate:
+    """
+    Cheap first stage of the prediction cascade.
+
+    A logistic regression over colour/texture features (trained by
+    scripts/train_leaf_gate.py on the leaf classes vs the Unidentified
+    folder) scores how leaf-like an upload is. Images scoring below the
+    threshold are rejected as Unidentified without running the main model.
+    """
+
+    def __init__(self, path, threshold=None):
+        """
+        Load a trained gate
+
+        Args:
+            path: JSON file written by scripts/train_leaf_gate.py
+            threshold: Override the trained rejection threshold (leaf score)
+        """
+        with open(path, 'r', encoding='utf-8') as f:
+            params = json.load(f)
+        if params.get("features") != FEATURE_NAMES:
+            raise ValueError(f"Leaf gate {path} was trained on different features; retrain it")
+
+        self.path = path
+        self.mean = np.array(params["mean"], dtype=np.float32)
+        self.std = np.array(params["std"], dtype=np.float32)
+        self.weights = np.array(params["weights"], dtype=np.float32)
+        self.bias = float(params["bias"])
+        self.threshold = float(threshold if threshold is not None else params["threshold"])
+        self.metrics = params.get("metrics", {})
+        self._lock = threading.Lock()
+        self._checked = 0
+        self._rejected = 0
+        self._total_seconds = 0.0
+
+    def score(self, image_bytes):
+        """Probability that the image is a leaf"""
+        features = (extract_features(image_bytes) - self.mean) / self.std
+        return float(1.0 / (1.0 + np.exp(-(features @ self.weights + self.bias))))
+
+    def check(self, image_bytes):
+        """
+        Returns:
+            (passed, leaf_score)
+        """
+        started = time.perf_counter()
+        leaf_score = self.score(image_bytes)
+        passed = leaf_score >= self.threshold
+        with self._lock:
+            self._checked += 1
+            self._rejected += int(not passed)
+            self._total_seconds += time.perf_counter() - started
+        return passed, leaf_score
+
+    def stats(self):
+        """Get rejection counts and gate latency"""
+        with self._lock:
+            return {
+                "threshold": self.threshold,
+                "checked": self._checked,
+                "rejected": self._rejected,
+                "rejection_rate": (self._rejected / self._checked) if self._checked else 0.0,
+                "avg_ms": (self._total_seconds / self._checked * 1000.0) if self._checked else 0.0,
+                "trained_metrics": self.metrics
+            }
@@ -0,0 +1,271 @@
+import time
+import threading
+from bisect import bisect_left
+
+# Latency buckets in seconds: sub-millisecond cache hits up to multi-second storage uploads
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value):
+    """Escape a label value for the Prometheus text format"""
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(names, values, extra=None):
+    """Render a {name="value",...} label set"""
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value):
+    """Render a sample value"""
+    if value == float('inf'):
+        return "+Inf"
+    return repr(float(value))
+
+
+class Counter:
+    """Monotonic counter with optional labels"""
+
+    def __init__(self, name, documentation, label_names=()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        """Increment the series for `label_values`"""
+        if not _enabled:
+            return
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def value(self, *label_values):
+        """Current value of one series"""
+        with self._lock:
+            return self._values.get(label_values, 0)
+
+    def render(self):
+        """Prometheus text-format lines"""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for label_values, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.label_names, label_values)} {_number(value)}")
+        return lines
+
+
+class Histogram:
+    """
+    Histogram with fixed buckets and optional labels
+
+    Observations store per-bucket counts; the cumulative `_bucket` series is
+    only built when the registry is rendered, so observe() is a bisect plus
+    three increments under a lock.
+    """
+
+    def __init__(self, name, documentation, label_names=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        """Record one observation for `label_values`"""
+        if not _enabled:
+            return
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def time(self, *label_values):
+        """Context manager observing the elapsed seconds of its block"""
+        return _Timer(self, label_values)
+
+    def count(self, *label_values):
+        """Number of observations of one series"""
+        with self._lock:
+            series = self._series.get(label_values)
+            return series[2] if series else 0
+
+    def render(self):
+        """Prometheus text-format lines"""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = [(key, list(series[0]), series[1], series[2]) for key, series in sorted(self._series.items())]
+        for label_values, counts, total, count in snapshot:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                le = f'le="{_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, label_values, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, label_values)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, label_values)} {count}")
+        return lines
+
+
+class Gauge:
+    """Gauge whose value is read from a callback at scrape time"""
+
+    def __init__(self, name, documentation, fn):
+        self.name = name
+        self.documentation = documentation
+        self.fn = fn
+
+    def render(self):
+        """Prometheus text-format lines"""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} gauge"]
+        try:
+            lines.append(f"{self.name} {_number(self.fn())}")
+        except Exception as e:
+            print(f"[WARNING] Failed to read gauge {self.name}: {e}")
+        return lines
+
+
+class _Timer:
+    """Times a block with perf_counter and records it in a histogram"""
+
+    __slots__ = ("histogram", "label_values", "started")
+
+    def __init__(self, histogram, label_values):
+        self.histogram = histogram
+        self.label_values = label_values
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.started, *self.label_values)
+        return False
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered together at /metrics"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric already registered: {metric.name}")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, label_names=()):
+        """Create and register a counter"""
+        return self._register(Counter(name, documentation, label_names))
+
+    def histogram(self, name, documentation, label_names=(), buckets=DEFAULT_BUCKETS):
+        """Create and register a histogram"""
+        return self._register(Histogram(name, documentation, label_names, buckets))
+
+    def gauge(self, name, documentation, fn):
+        """Create (or replace) a callback gauge"""
+        with self._lock:
+            self._metrics[name] = Gauge(name, documentation, fn)
+        return self._metrics[name]
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format (version 0.0.4)"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+_enabled = True
+
+
+def set_enabled(enabled):
+    """Turn recording on or off (rendering still works; used by the overhead benchmark)"""
+    global _enabled
+    _enabled = bool(enabled)
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+REGISTRY = MetricsRegistry()
+
+# Per-stage latency by component: component="predict" is the /predict and
+# /predict/batch request path; leaf_gate, tta, explain, warmup, shadow and
+# outbox work share helpers (decode, resize, inference) but not its series
+STAGE_SECONDS = REGISTRY.histogram(
+    "fito_stage_duration_seconds",
+    "Time spent in each prediction stage",
+    ("component", "stage")
+)
+REQUEST_SECONDS = REGISTRY.histogram(
+    "fito_request_duration_seconds",
+    "End-to-end request latency by endpoint and outcome",
+    ("endpoint", "outcome")
+)
+PREDICTIONS = REGISTRY.counter(
+    "fito_predictions_total",
+    "Predictions returned, by predicted class",
+    ("predicted_class",)
+)
+OUTCOMES = REGISTRY.counter(
+    "fito_prediction_outcomes_total",
+    "Prediction requests by outcome (success, unidentified, invalid, overloaded, not_ready, error)",
+    ("outcome",)
+)
+CACHE_LOOKUPS = REGISTRY.counter(
+    "fito_cache_lookups_total",
+    "Prediction cache lookups by result (hit, miss)",
+    ("result",)
+)
+ERRORS = REGISTRY.counter(
+    "fito_errors_total",
+    "Failures by component and stage",
+    ("component", "stage")
+)
+
+
+_context = threading.local()
+
+
+class _Component:
+    """Sets the calling thread's stage component for the duration of a block"""
+
+    __slots__ = ("name", "previous")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.previous = getattr(_context, "component", None)
+        _context.component = self.name
+        return self
+
+    def __exit__(self, *exc_info):
+        _context.component = self.previous
+        return False
+
+
+def component(name):
+    """Context manager attributing the stages timed inside it (on this thread) to `name`"""
+    return _Component(name)
+
+
+def current_component():
+    """Component of the calling thread ("other" outside any component block)"""
+    return getattr(_context, "component", None) or "other"
+
+
+def stage(name, component=None):
+    """Context manager timing one stage of the current (or the given) component"""
+    return STAGE_SECONDS.time(component or current_component(), name)
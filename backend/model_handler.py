@@ -1,26 +1,57 @@
-import tensorflow as tf
 import numpy as np
-from PIL import Image
-import io
 import os
+import time
+import threading
+from preprocessing import ImagePreprocessor
+from inference_backends import load_backend
+from explain import GradCamExplainer, ExplainerUnavailable
+import metrics
+
+# Class order of the model outputs (training order)
+DEFAULT_CLASS_NAMES = [
+    'Bacterial Spot',
+    'Early Blight',
+    'Late Blight',
+    'Leaf Mold',
+    'Septoria Leaf Spot',
+    'Spider Mites',
+    'Target Spot',
+    'Yellow Leaf Curl Virus',
+    'Mosaic Virus',
+    'Healthy',
+    'Unidentified'
+]
 
 class TomatoDiseasePredictor:
-    def __init__(self, model_path):
-        """Initialize the model predictor"""
+    def __init__(self, model_path, max_batch_size=1, backend=None, num_threads=None, class_names=None, leaf_gate=None, tta=None, explain_options=None, **backend_options):
+        """
+        Initialize the model predictor
+        
+        Args:
+            model_path: Keras .h5, .tflite or .onnx file, or a SavedModel directory
+            max_batch_size: Rows in each worker's preprocessing buffer
+            backend: 'keras', 'savedmodel', 'tflite' or 'onnx' (inferred from the artifact when None)
+            num_threads: Intra-op thread count for the TFLite and ONNX Runtime backends
+            class_names: Class order of the model outputs (defaults to DEFAULT_CLASS_NAMES)
+            leaf_gate: Optional LeafGate that rejects obvious non-leaf images before the model runs
+            tta: Optional TestTimeAugmentation re-checking borderline predictions
+            explain_options: GradCamExplainer options; 'model_path' points at a Keras model used for
+                explanations when the served artifact has no gradients (TFLite, ONNX, SavedModel)
+            **backend_options: Backend-specific options (e.g. call_mode, jit_compile for Keras)
+        """
         self.model = None
-        self.class_names = [
-            'Bacterial Spot',
-            'Early Blight',
-            'Late Blight',
-            'Leaf Mold',
-            'Septoria Leaf Spot',
-            'Spider Mites',
-            'Target Spot',
-            'Yellow Leaf Curl Virus',
-            'Mosaic Virus',
-            'Healthy',
-            'Unidentified'
-        ]
+        self.backend = None
+        self.preprocessor = None
+        self.max_batch_size = max_batch_size
+        self.backend_name = backend
+        self.num_threads = num_threads
+        self.backend_options = backend_options
+        self.class_names = list(class_names or DEFAULT_CLASS_NAMES)
+        self.leaf_gate = leaf_gate
+        self.tta = tta
+        self.explain_options = dict(explain_options or {})
+        self._explainer = None
+        self._explainer_lock = threading.Lock()
         # Confidence threshold: predictions below this will be marked as unidentified
         # Set to 0.50 (50%) to be less aggressive, as the model has a specific 'Unidentified' class
         self.confidence_threshold = 0.50
@@ -29,71 +60,170 @@ class TomatoDiseasePredictor:
     def load_model(self, model_path):
         """Load the trained model"""
         try:
-            self.model = tf.keras.models.load_model(model_path)
-            print(f"[SUCCESS] Model loaded successfully from {model_path}")
+            self.backend = load_backend(model_path, self.backend_name, self.num_threads, **self.backend_options)
+            self.model = self.backend.model
+            
+            # Input size and dtype come from the model itself
+            input_shape, input_dtype = self.backend.input_shape, self.backend.input_dtype
+            self.preprocessor = ImagePreprocessor(input_shape, input_dtype, self.max_batch_size)
+            print(f"[SUCCESS] Model loaded successfully from {model_path} ({self.backend.name}, input {input_shape}, {input_dtype})")
         except Exception as e:
             print(f"[ERROR] Error loading model: {e}")
             raise e
     
-    def preprocess_image(self, image_bytes):
-        """Preprocess image for model prediction"""
+    def preprocess_image(self, image_bytes, reuse_buffer=False):
+        """
+        Preprocess image for model prediction
+        
+        Decodes straight to the model's input size (JPEGs use reduced-size draft
+        decoding) and writes float32 pixels scaled to [0, 1] into a (1, H, W, C)
+        batch. With reuse_buffer=True the batch is a view into this worker's
+        preallocated buffer, valid until the same thread preprocesses again.
+        """
         try:
-            # Open image from bytes
-            image = Image.open(io.BytesIO(image_bytes))
-            
-            # Convert to RGB if needed
-            if image.mode != 'RGB':
-                image = image.convert('RGB')
-            
-            # Resize to 224x224 (same as training)
-            image = image.resize((224, 224))
-            
-            # Convert to numpy array and normalize
-            image_array = np.array(image) / 255.0
-            
-            # Add batch dimension
-            image_array = np.expand_dims(image_array, axis=0)
-            
-            return image_array
+            return self.preprocessor.preprocess(image_bytes, reuse_buffer=reuse_buffer)
             
         except Exception as e:
             print(f"[ERROR] Error preprocessing image: {e}")
             raise e
     
+    def predict_proba(self, image_batch):
+        """Run the model on a preprocessed batch and return class probabilities"""
+        with metrics.stage("inference"):
+            return self.backend.predict(image_batch)
+    
+    def screen(self, image_bytes):
+        """
+        First stage of the cascade: run the leaf gate (if any)
+        
+        Returns:
+            Unidentified result if the gate rejects the image, otherwise None
+        """
+        if self.leaf_gate is None:
+            return None
+        # The gate's own decode is timed under component="leaf_gate", not as the request's decode
+        with metrics.stage("leaf_gate"), metrics.component("leaf_gate"):
+            passed, leaf_score = self.leaf_gate.check(image_bytes)
+        if passed:
+            return None
+        result = self._unidentified_result(leaf_score)
+        result['gated'] = True
+        return result
+    
     def predict(self, image_bytes):
         """Make prediction on the image"""
         try:
+            # Obvious non-leaf images never reach the main model
+            rejected = self.screen(image_bytes)
+            if rejected is not None:
+                return rejected
+            
             # Preprocess image
             processed_image = self.preprocess_image(image_bytes)
             
             # Make prediction
-            predictions = self.model.predict(processed_image, verbose=0)
+            predictions = self.predict_proba(processed_image)
+            
+            # Borderline predictions get a second, augmented look
+            probabilities, tta_views = self.refine(image_bytes, predictions[0])
             
+            result = self.build_result(probabilities)
+            if tta_views:
+                result['tta_views'] = tta_views
+            return result
+            
+        except Exception as e:
+            print(f"[ERROR] Error making prediction: {e}")
+            raise e
+    
+    def refine(self, image_bytes, probabilities, predict_fn=None):
+        """
+        Re-check a borderline first-pass prediction with test-time augmentation
+        
+        Runs only if TTA is enabled and the first-pass confidence is inside its
+        band. All augmented views go through the model in one batch.
+        
+        Args:
+            image_bytes: The uploaded image
+            probabilities: First-pass probability vector
+            predict_fn: Batch predict function (defaults to predict_proba; the API passes its micro-batcher)
+        
+        Returns:
+            (probabilities, number of TTA views run - 0 if TTA did not trigger)
+        """
+        if self.tta is None or not self.tta.should_run(probabilities):
+            return probabilities, 0
+        
+        started = time.perf_counter()
+        with metrics.stage("tta"), metrics.component("tta"):
+            views = self.tta.build_views(image_bytes, self.preprocessor)
+            view_probabilities = (predict_fn or self.predict_proba)(views)
+            refined = self.tta.aggregate(probabilities, view_probabilities)
+        self.tta.record(probabilities, refined, time.perf_counter() - started, len(views))
+        return refined, len(views)
+    
+    def explainer(self):
+        """
+        Grad-CAM explainer held alongside this predictor (built and traced on first use)
+        
+        Raises:
+            ExplainerUnavailable: the served model has no gradients and no Keras model was configured
+        """
+        if self._explainer is not None:
+            return self._explainer
+        with self._explainer_lock:
+            if self._explainer is None:
+                options = dict(self.explain_options)
+                explain_model_path = options.pop('model_path', None)
+                if explain_model_path:
+                    import tensorflow as tf
+                    model = tf.keras.models.load_model(explain_model_path)
+                elif self.backend.name == 'keras':
+                    model = self.model
+                else:
+                    raise ExplainerUnavailable(
+                        f"The {self.backend.name} backend has no gradients; set FITO_EXPLAIN_MODEL_PATH to a Keras model"
+                    )
+                self._explainer = GradCamExplainer(model, **options)
+                print(f"[SUCCESS] Grad-CAM explainer ready (layer {self._explainer.layer_name})")
+        return self._explainer
+    
+    def explain(self, image_bytes, class_name=None):
+        """
+        Grad-CAM explanation of an upload
+        
+        Args:
+            image_bytes: The uploaded image
+            class_name: Class to explain (default: the predicted class)
+        
+        Returns:
+            Explanation dict with the explained and predicted classes
+        """
+        class_index = None
+        if class_name is not None:
+            if class_name not in self.class_names:
+                raise ValueError(f"Unknown class '{class_name}'")
+            class_index = self.class_names.index(class_name)
+        
+        explanation = self.explainer().explain(image_bytes, class_index)
+        probabilities = explanation.pop('probabilities')
+        predicted_idx = int(np.argmax(probabilities))
+        explanation['explained_class'] = self.class_names[explanation.pop('class_index')]
+        explanation['predicted_class'] = self.class_names[predicted_idx]
+        explanation['confidence'] = float(probabilities[predicted_idx])
+        return explanation
+    
+    def build_result(self, probabilities):
+        """Turn a single probability vector into the prediction response"""
+        try:
             # Get the predicted class and confidence
-            predicted_class_idx = np.argmax(predictions[0])
-            confidence = float(predictions[0][predicted_class_idx])
+            predicted_class_idx = np.argmax(probabilities)
+            confidence = float(probabilities[predicted_class_idx])
             predicted_class = self.class_names[predicted_class_idx]
             
             # Check if confidence is below threshold
             if confidence < self.confidence_threshold:
-                return {
-                    'predicted_class': 'Unidentified',
-                    'confidence': confidence,
-                    'confidence_level': 'low',
-                    'reliability': 'unreliable',
-                    'all_predictions': [],
-                    'safety_recommendations': {
-                        'disclaimer': 'This image does not appear to be a tomato leaf or the disease is not clearly identifiable.',
-                        'confidence_threshold': self.confidence_threshold,
-                        'next_steps': [
-                            'Image not recognized as a tomato leaf',
-                            'Please upload a clear image of a tomato leaf',
-                            'Ensure the image shows the leaf clearly',
-                            'Try a different angle or lighting'
-                        ]
-                    },
-                    'is_unidentified': True
-                }
+                return self._unidentified_result(confidence)
             
             # Determine confidence level and reliability
             if confidence >= 0.90:
@@ -108,7 +238,7 @@ class TomatoDiseasePredictor:
             
             # Get all predictions with confidence scores
             all_predictions = []
-            for i, (class_name, conf) in enumerate(zip(self.class_names, predictions[0])):
+            for i, (class_name, conf) in enumerate(zip(self.class_names, probabilities)):
                 all_predictions.append({
                     'class': class_name,
                     'confidence': float(conf)
@@ -131,9 +261,30 @@ class TomatoDiseasePredictor:
             }
             
         except Exception as e:
-            print(f"[ERROR] Error making prediction: {e}")
+            print(f"[ERROR] Error building prediction result: {e}")
             raise e
     
+    def _unidentified_result(self, confidence):
+        """Result for an image that is not a recognizable tomato leaf"""
+        return {
+            'predicted_class': 'Unidentified',
+            'confidence': confidence,
+            'confidence_level': 'low',
+            'reliability': 'unreliable',
+            'all_predictions': [],
+            'safety_recommendations': {
+                'disclaimer': 'This image does not appear to be a tomato leaf or the disease is not clearly identifiable.',
+                'confidence_threshold': self.confidence_threshold,
+                'next_steps': [
+                    'Image not recognized as a tomato leaf',
+                    'Please upload a clear image of a tomato leaf',
+                    'Ensure the image shows the leaf clearly',
+                    'Try a different angle or lighting'
+                ]
+            },
+            'is_unidentified': True
+        }
+    
     def _get_safety_recommendations(self, predicted_class, confidence_level):
         """Get safety recommendations based on prediction"""
         recommendations = {
@@ -0,0 +1,320 @@
+import os
+import json
+import shutil
+import tempfile
+import threading
+from datetime import datetime
+from prediction_cache import model_fingerprint
+
+MANIFEST_NAME = "manifest.json"
+ACTIVE_NAME = "ACTIVE"
+
+
+class ModelNotReady(Exception):
+    """Raised when a request arrives before the startup model has finished loading"""
+
+
+class ModelRegistry:
+    """
+    Directory of versioned model artifacts.
+
+    Layout:
+        <root>/<version>/manifest.json   version, artifact, class order, input size, sha256
+        <root>/<version>/<artifact>      .h5 / .tflite / .onnx file or SavedModel directory
+        <root>/ACTIVE                    version served after a restart
+    """
+
+    def __init__(self, root):
+        """Initialize the registry rooted at `root`"""
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    @staticmethod
+    def is_valid_version(version):
+        """True if `version` is a single plain directory name (no separators, '.' or '..')"""
+        return (
+            bool(version)
+            and version not in (".", "..")
+            and "/" not in version
+            and "\\" not in version
+            and os.path.basename(version) == version
+        )
+
+    def versions(self):
+        """Manifests of every registered version, oldest first"""
+        manifests = []
+        for name in sorted(os.listdir(self.root)):
+            if os.path.isfile(os.path.join(self.root, name, MANIFEST_NAME)):
+                manifests.append(self.manifest(name))
+        return sorted(manifests, key=lambda manifest: manifest.get("created_at", ""))
+
+    def manifest(self, version):
+        """Manifest for a version (raises KeyError if it is not registered)"""
+        if not self.is_valid_version(version):
+            raise KeyError(f"Model version not found: {version}")
+        path = os.path.join(self.root, version, MANIFEST_NAME)
+        if not os.path.isfile(path):
+            raise KeyError(f"Model version not found: {version}")
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def artifact_path(self, version):
+        """Path of a version's model artifact"""
+        return os.path.join(self.root, version, self.manifest(version)["artifact"])
+
+    def verify(self, version):
+        """Check the artifact against the manifest checksum; returns the fingerprint"""
+        fingerprint = model_fingerprint(self.artifact_path(version))
+        expected = self.manifest(version).get("sha256")
+        if expected and fingerprint != expected:
+            raise ValueError(f"Checksum mismatch for model version {version}")
+        return fingerprint
+
+    def active_version(self):
+        """Version recorded as active, or None"""
+        path = os.path.join(self.root, ACTIVE_NAME)
+        if not os.path.isfile(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read().strip() or None
+
+    def set_active(self, version):
+        """Record the active version (atomic replace)"""
+        path = os.path.join(self.root, ACTIVE_NAME)
+        # Unique temp name per writer: several serve.py workers may record a swap at once
+        with tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=self.root, prefix=f".{ACTIVE_NAME}.",
+                                         suffix=".tmp", delete=False) as f:
+            f.write(version)
+        try:
+            os.replace(f.name, path)
+        except OSError:
+            os.unlink(f.name)
+            raise
+
+    def register(self, source_path, version, class_names, input_size, backend=None, notes=None):
+        """
+        Copy a model artifact into the registry and write its manifest
+
+        Args:
+            source_path: Model file or SavedModel directory (e.g. output of train_model_outdoor_optimized.py)
+            version: Version name (directory name in the registry)
+            class_names: Class order of the model outputs
+            input_size: (height, width, channels)
+            backend: Inference backend name, or None to infer from the artifact
+        """
+        if not self.is_valid_version(version):
+            raise ValueError(f"Invalid model version name: {version!r}")
+        version_dir = os.path.join(self.root, version)
+        if os.path.exists(version_dir):
+            raise ValueError(f"Model version already registered: {version}")
+
+        artifact = os.path.basename(os.path.normpath(source_path))
+        os.makedirs(version_dir)
+        target = os.path.join(version_dir, artifact)
+        if os.path.isdir(source_path):
+            shutil.copytree(source_path, target)
+        else:
+            shutil.copy2(source_path, target)
+
+        manifest = {
+            "version": version,
+            "artifact": artifact,
+            "backend": backend,
+            "class_names": list(class_names),
+            "input_size": list(input_size),
+            "sha256": model_fingerprint(target),
+            "created_at": datetime.utcnow().isoformat(),
+            "notes": notes
+        }
+        with open(os.path.join(version_dir, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+        return manifest
+
+
+class ServingModel:
+    """
+    One loaded model version: predictor, its micro-batcher and warm-up state.
+
+    Requests acquire the serving model for their whole lifetime, so after a
+    swap the old version keeps serving its in-flight requests and is only
+    retired (batcher stopped) once the last of them has released it.
+    """
+
+    def __init__(self, version, model_path, fingerprint, predictor, batcher, warmup):
+        """Bundle a loaded model version"""
+        self.version = version
+        self.model_path = model_path
+        self.fingerprint = fingerprint
+        self.predictor = predictor
+        self.batcher = batcher
+        self.warmup = warmup
+        self._in_flight = 0
+        self._idle = threading.Condition()
+
+    def acquire(self):
+        """Mark a request as using this model"""
+        with self._idle:
+            self._in_flight += 1
+        return self
+
+    def release(self):
+        """Mark a request as finished with this model"""
+        with self._idle:
+            self._in_flight -= 1
+            if self._in_flight == 0:
+                self._idle.notify_all()
+
+    @property
+    def in_flight(self):
+        """Requests currently using this model"""
+        return self._in_flight
+
+    def retire(self, timeout=300.0):
+        """
+        Wait for in-flight requests to finish, then stop the batcher
+
+        If some are still running after `timeout`, the batcher is stopped
+        anyway; their queued batches still run, and any later submit fails
+        fast rather than hanging (see MicroBatcher.stop).
+        """
+        with self._idle:
+            drained = self._idle.wait_for(lambda: self._in_flight == 0, timeout=timeout)
+        if not drained:
+            print(f"[WARNING] Retiring model version {self.version} with {self._in_flight} request(s) still in flight")
+        self.batcher.stop()
+        print(f"[INFO] Retired model version {self.version}")
+
+
+class ModelManager:
+    """
+    Holds the active ServingModel and swaps versions without downtime.
+
+    `activate(version)` loads and warms the new version in a background
+    thread, then atomically replaces the active model; the previous version is
+    retired once its in-flight requests complete.
+    """
+
+    def __init__(self, registry, load_fn, on_swap=None):
+        """
+        Args:
+            registry: ModelRegistry
+            load_fn: load_fn(version, model_path, manifest) -> started ServingModel (not yet warmed up)
+            on_swap: Optional callback(serving_model) run right after a swap
+        """
+        self.registry = registry
+        self.load_fn = load_fn
+        self.on_swap = on_swap
+        self._active = None
+        self._lock = threading.Lock()
+        self._loading = None
+        self.last_swap = None
+
+    @property
+    def active(self):
+        """Currently active ServingModel"""
+        return self._active
+
+    def acquire(self):
+        """Active model with its in-flight count incremented; callers must release() it"""
+        with self._lock:
+            if self._active is None:
+                raise ModelNotReady("Model is still loading")
+            return self._active.acquire()
+
+    def set_initial(self, serving):
+        """Install the model loaded at startup"""
+        with self._lock:
+            self._active = serving
+
+    def activate(self, version):
+        """Start loading `version` in the background; returns immediately"""
+        with self._lock:
+            if self._active is None:
+                raise RuntimeError("The startup model is still loading")
+            if self._loading and self._loading["state"] in ("loading", "warming"):
+                raise RuntimeError(f"Model version {self._loading['version']} is already being loaded")
+            if self._active is not None and self._active.version == version:
+                raise ValueError(f"Model version {version} is already active")
+            self.registry.manifest(version)
+            self._loading = {"version": version, "state": "loading", "error": None, "started_at": datetime.utcnow().isoformat()}
+            loading = dict(self._loading)
+
+        threading.Thread(target=self._load_and_swap, args=(version,), name=f"fito-model-load-{version}", daemon=True).start()
+        return loading
+
+    def _set_loading_state(self, state, error=None):
+        """Update the background load's state (under the lock, so activate() always sees a consistent value)"""
+        with self._lock:
+            self._loading["state"] = state
+            if error is not None:
+                self._loading["error"] = error
+
+    def _load_and_swap(self, version):
+        """Load, verify, warm up and swap in a version (runs in a background thread)"""
+        serving = None
+        try:
+            manifest = self.registry.manifest(version)
+            self.registry.verify(version)
+            serving = self.load_fn(version, self.registry.artifact_path(version), manifest)
+
+            self._set_loading_state("warming")
+            serving.warmup.run(serving.predictor, serving.batcher)
+
+            with self._lock:
+                previous = self._active
+                self._active = serving
+                self._loading["state"] = "active"
+            self.registry.set_active(version)
+            self.last_swap = {
+                "from": previous.version if previous else None,
+                "to": version,
+                "at": datetime.utcnow().isoformat()
+            }
+            print(f"[SUCCESS] Swapped model {previous.version if previous else None} -> {version}")
+
+            if self.on_swap:
+                self.on_swap(serving)
+            if previous is not None:
+                previous.retire()
+        except Exception as e:
+            self._set_loading_state("failed", str(e))
+            if serving is not None and serving is not self._active:
+                serving.batcher.stop()
+            print(f"[ERROR] Failed to activate model version {version}: {e}")
+
+    def follow_registry(self):
+        """
+        Activate the registry's ACTIVE version if another process switched to it
+
+        Used when several workers serve on one node: the worker that handled
+        the activate request records the new version, the others pick it up
+        here. Returns True if a load was started.
+        """
+        version = self.registry.active_version()
+        with self._lock:
+            if version is None or self._active is None or self._active.version == version:
+                return False
+            if self._loading and self._loading["state"] in ("loading", "warming"):
+                return False
+            if self._loading and self._loading["version"] == version and self._loading["state"] == "failed":
+                # It failed here before; do not retry in a loop
+                return False
+        try:
+            self.activate(version)
+            return True
+        except (KeyError, ValueError, RuntimeError) as e:
+            print(f"[WARNING] Could not follow registry to model version {version}: {e}")
+            return False
+
+    def status(self):
+        """Active version, in-flight requests and the state of any background load"""
+        with self._lock:
+            active = self._active
+            loading = dict(self._loading) if self._loading else None
+        return {
+            "active_version": active.version if active else None,
+            "in_flight": active.in_flight if active else 0,
+            "ready": bool(active and active.warmup.ready),
+            "loading": loading,
+            "last_swap": self.last_swap
+        }
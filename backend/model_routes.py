@@ -0,0 +1,67 @@
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import JSONResponse
+
+router = APIRouter(prefix="/api/admin/models", tags=["admin"])
+
+@router.get("")
+async def list_models(request: Request):
+    """List registered model versions and the serving status"""
+    try:
+        manager = request.app.state.model_manager
+        return {
+            "success": True,
+            "versions": manager.registry.versions(),
+            "status": manager.status()
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/status")
+async def model_status(request: Request):
+    """Active version, in-flight requests and background load progress"""
+    return {
+        "success": True,
+        "status": request.app.state.model_manager.status()
+    }
+
+@router.get("/shadow")
+async def shadow_report(request: Request):
+    """Agreement, confidence deltas and latency of the shadow model vs the active one"""
+    shadow_evaluator = request.app.state.shadow_evaluator
+    if shadow_evaluator is None:
+        raise HTTPException(
+            status_code=404,
+            detail="No shadow model configured (set FITO_SHADOW_VERSION or FITO_SHADOW_MODEL_PATH)"
+        )
+    return {
+        "success": True,
+        "active_version": request.app.state.model_manager.status()["active_version"],
+        "report": shadow_evaluator.report()
+    }
+
+@router.post("/{version}/activate")
+async def activate_model(version: str, request: Request):
+    """Load, warm up and swap in a registered model version in the background"""
+    manager = request.app.state.model_manager
+    # Versions come straight from the URL; only plain names of registered versions may reach the filesystem
+    if not manager.registry.is_valid_version(version):
+        raise HTTPException(status_code=400, detail=f"Invalid model version name: {version}")
+    if version not in {manifest.get("version") for manifest in manager.registry.versions()}:
+        raise HTTPException(status_code=404, detail=f"Model version not found: {version}")
+    try:
+        loading = manager.activate(version)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+    except (ValueError, RuntimeError) as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return JSONResponse(
+        status_code=202,
+        content={
+            "success": True,
+            "message": f"Loading model version {version}; poll /api/admin/models/status for progress",
+            "loading": loading
+        }
+    )
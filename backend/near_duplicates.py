@@ -0,0 +1,241 @@
+import threading
+import numpy as np
+from PIL import Image
+
+HASH_BITS = 64
+HASH_METHODS = ("dhash", "phash")
+
+# Grayscale weights (ITU-R 601, as used by PIL's "L" conversion)
+_GRAY = np.array([0.299, 0.587, 0.114], dtype=np.float32)
+
+
+def _dct_matrix(n):
+    """Orthonormal DCT-II basis (n x n)"""
+    k = np.arange(n)[:, np.newaxis]
+    x = np.arange(n)[np.newaxis, :]
+    basis = np.cos(np.pi * (2 * x + 1) * k / (2 * n)) * np.sqrt(2.0 / n)
+    basis[0] /= np.sqrt(2.0)
+    return basis.astype(np.float32)
+
+
+_DCT_32 = _dct_matrix(32)
+
+
+def _pack_bits(bits):
+    """64 booleans -> Python int"""
+    return int.from_bytes(np.packbits(bits.ravel()).tobytes(), 'big')
+
+
+def _grayscale(pixels, size):
+    """Box-downsample H x W x C pixels (uint8 or [0, 1] floats) to a (height, width) float grayscale grid"""
+    pixels = np.asarray(pixels, dtype=np.float32)
+    gray = pixels @ _GRAY[:pixels.shape[-1]] if pixels.ndim == 3 and pixels.shape[-1] == 3 else pixels.reshape(pixels.shape[:2])
+    return np.asarray(Image.fromarray(gray).resize(size, Image.BOX))
+
+
+def dhash(pixels):
+    """Difference hash: sign of horizontal gradients on a 9x8 grayscale thumbnail"""
+    gray = _grayscale(pixels, (9, 8))
+    return _pack_bits(gray[:, 1:] > gray[:, :-1])
+
+
+def phash(pixels):
+    """DCT hash: low-frequency 8x8 DCT coefficients of a 32x32 thumbnail against their median"""
+    gray = _grayscale(pixels, (32, 32))
+    low = (_DCT_32 @ gray @ _DCT_32.T)[:8, :8]
+    # The DC term only reflects overall brightness
+    return _pack_bits(low > np.median(low.ravel()[1:]))
+
+
+def perceptual_hash(pixels, method="dhash"):
+    """64-bit perceptual hash of decoded pixels (H x W x C)"""
+    if method == "dhash":
+        return dhash(pixels)
+    if method == "phash":
+        return phash(pixels)
+    raise ValueError(f"Unknown hash method '{method}' (choose from {', '.join(HASH_METHODS)})")
+
+
+def hamming(a, b):
+    """Number of differing bits"""
+    return bin(a ^ b).count('1')
+
+
+class HammingIndex:
+    """
+    Multi-index hashing over 64-bit hashes.
+
+    Each hash is split into `chunks` 16-bit substrings, each with its own
+    table. If two hashes are within distance r, at least one substring is
+    within r // chunks of the query's (pigeonhole), so a lookup probes every
+    substring value at that radius and only verifies the few hashes found
+    there - the cost depends on bucket sizes, not on the number of entries.
+
+    Entries live in a fixed-capacity ring: once full, the oldest entry is
+    overwritten and removed from its buckets.
+    """
+
+    def __init__(self, capacity, chunks=4):
+        """Initialize an empty index holding at most `capacity` hashes"""
+        self.capacity = max(1, int(capacity))
+        self.chunks = chunks
+        self.chunk_bits = HASH_BITS // chunks
+        self._mask = (1 << self.chunk_bits) - 1
+        self._tables = [{} for _ in range(chunks)]
+        self._hashes = [None] * self.capacity
+        self._next = 0
+        self._size = 0
+        self._flip_masks = {}
+
+    def __len__(self):
+        return self._size
+
+    def _keys(self, hash_value):
+        """Substring of each chunk"""
+        return [(hash_value >> (i * self.chunk_bits)) & self._mask for i in range(self.chunks)]
+
+    def _neighbours(self, key, radius):
+        """Every chunk value within `radius` bits of `key`"""
+        masks = self._flip_masks.get(radius)
+        if masks is None:
+            masks = [0]
+            for _ in range(radius):
+                masks = sorted({mask | (1 << bit) for mask in masks for bit in range(self.chunk_bits)} | set(masks))
+            self._flip_masks[radius] = masks
+        return [key ^ mask for mask in masks]
+
+    def add(self, hash_value):
+        """Insert a hash; returns its slot (evicting the oldest entry when full)"""
+        slot = self._next
+        old = self._hashes[slot]
+        if old is not None:
+            for table, key in zip(self._tables, self._keys(old)):
+                bucket = table[key]
+                bucket.remove(slot)
+                if not bucket:
+                    del table[key]
+        self._hashes[slot] = hash_value
+        for table, key in zip(self._tables, self._keys(hash_value)):
+            table.setdefault(key, []).append(slot)
+        self._next = (slot + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+        return slot
+
+    def nearest(self, hash_value, max_distance):
+        """(slot, distance) of the closest stored hash within max_distance, or None"""
+        radius = max_distance // self.chunks
+        best = None
+        seen = set()
+        for table, key in zip(self._tables, self._keys(hash_value)):
+            for probe in self._neighbours(key, radius):
+                for slot in table.get(probe, ()):
+                    if slot in seen:
+                        continue
+                    seen.add(slot)
+                    distance = hamming(hash_value, self._hashes[slot])
+                    if distance <= max_distance and (best is None or distance < best[1]):
+                        best = (slot, distance)
+                        if distance == 0:
+                            return best
+        return best
+
+    def clear(self):
+        """Drop every entry"""
+        self._tables = [{} for _ in range(self.chunks)]
+        self._hashes = [None] * self.capacity
+        self._next = 0
+        self._size = 0
+
+
+class NearDuplicateIndex:
+    """
+    Reuses predictions for near-duplicate uploads.
+
+    Re-compressed, resized or slightly cropped copies of an image have
+    different bytes (so they miss the SHA-256 prediction cache) but nearly
+    identical perceptual hashes. The hash is computed from the pixels that
+    preprocessing already decoded for the model, and looked up in a
+    multi-index Hamming index; a match within `max_distance` bits returns the
+    earlier image's class probabilities instead of running the model.
+
+    Only probabilities are stored per entry (the full response is rebuilt
+    from them), and entries are scoped to one model fingerprint like the
+    prediction cache.
+    """
+
+    def __init__(self, num_classes, max_entries=100000, max_distance=6, method="dhash"):
+        """
+        Args:
+            num_classes: Length of the stored probability vectors
+            max_entries: Hashes kept (oldest are evicted first)
+            max_distance: Largest Hamming distance (of 64 bits) treated as a duplicate
+            method: 'dhash' or 'phash'
+        """
+        if method not in HASH_METHODS:
+            raise ValueError(f"Unknown hash method '{method}' (choose from {', '.join(HASH_METHODS)})")
+        self.method = method
+        self.max_distance = int(max_distance)
+        self.fingerprint = None
+        self._index = HammingIndex(max_entries)
+        self._probabilities = np.zeros((self._index.capacity, num_classes), dtype=np.float32)
+        self._sources = [None] * self._index.capacity
+        self._lock = threading.Lock()
+        self._lookups = 0
+        self._matches = 0
+        self._distance_counts = [0] * (self.max_distance + 1)
+
+    def hash(self, pixels):
+        """Perceptual hash of decoded pixels"""
+        return perceptual_hash(pixels, self.method)
+
+    def find(self, hash_value, fingerprint):
+        """
+        Look up a near-duplicate scored by the model `fingerprint`
+
+        Returns:
+            (probabilities, source image hash, distance) or None
+        """
+        with self._lock:
+            self._lookups += 1
+            if fingerprint != self.fingerprint:
+                return None
+            match = self._index.nearest(hash_value, self.max_distance)
+            if match is None:
+                return None
+            slot, distance = match
+            self._matches += 1
+            self._distance_counts[distance] += 1
+            return self._probabilities[slot].copy(), self._sources[slot], distance
+
+    def add(self, hash_value, probabilities, source, fingerprint):
+        """Remember the probabilities the model `fingerprint` gave an image (skipped if stale)"""
+        with self._lock:
+            if fingerprint != self.fingerprint or len(probabilities) != self._probabilities.shape[1]:
+                return
+            slot = self._index.add(hash_value)
+            self._probabilities[slot] = probabilities
+            self._sources[slot] = source
+
+    def rescope(self, fingerprint, num_classes=None):
+        """Point the index at a newly activated model; entries for the old model are dropped"""
+        with self._lock:
+            self.fingerprint = fingerprint
+            self._index.clear()
+            self._sources = [None] * self._index.capacity
+            if num_classes and num_classes != self._probabilities.shape[1]:
+                self._probabilities = np.zeros((self._index.capacity, num_classes), dtype=np.float32)
+
+    def stats(self):
+        """Get lookup and match counters and the distance histogram of matches"""
+        with self._lock:
+            return {
+                "method": self.method,
+                "max_distance": self.max_distance,
+                "model_fingerprint": self.fingerprint,
+                "entries": len(self._index),
+                "max_entries": self._index.capacity,
+                "lookups": self._lookups,
+                "matches": self._matches,
+                "match_rate": (self._matches / self._lookups) if self._lookups else 0.0,
+                "match_distances": {str(d): count for d, count in enumerate(self._distance_counts) if count}
+            }
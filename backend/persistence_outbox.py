@@ -0,0 +1,351 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from supabase_client import get_supabase_client
+import metrics
+
+STORAGE_BUCKET = "tomato-leaves"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id TEXT PRIMARY KEY,
+    storage_path TEXT NOT NULL,
+    content_type TEXT,
+    image BLOB,
+    record TEXT NOT NULL,
+    uploaded INTEGER NOT NULL DEFAULT 0,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL DEFAULT 0,
+    lease_until REAL NOT NULL DEFAULT 0,
+    last_error TEXT,
+    dead INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_outbox_due ON outbox (next_attempt_at, lease_until);
+"""
+
+
+class PredictionOutbox:
+    """
+    Durable local outbox for prediction persistence.
+
+    /predict appends the image and its prediction row to a SQLite journal and
+    returns immediately. Background workers drain the journal: each entry's
+    image is uploaded to Supabase Storage, then uploaded rows are written to
+    the `predictions` table in one batched upsert. Failures are retried with
+    exponential backoff, and entries stay in the journal across restarts until
+    both steps have succeeded. Uploads and inserts are upserts, so replaying an
+    entry after a crash never creates duplicates.
+
+    If a batched insert fails, its rows are retried one by one so a single bad
+    row cannot hold back the rest. An entry that fails `max_attempts` times is
+    dead-lettered: it stays in the journal (with its last error) but is no
+    longer retried, and is counted separately in stats().
+    """
+
+    def __init__(self, db_path, workers=2, batch_size=50, base_backoff=1.0, max_backoff=300.0, lease_seconds=120.0,
+                 max_attempts=50):
+        """Initialize the outbox and create the journal if needed"""
+        self.db_path = db_path
+        self.workers = max(1, int(workers))
+        self.batch_size = max(1, int(batch_size))
+        self.max_attempts = max(1, int(max_attempts))
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.lease_seconds = lease_seconds
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._threads = []
+
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            # Journals created before dead-lettering existed lack the column
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(outbox)")}
+            if "dead" not in columns:
+                conn.execute("ALTER TABLE outbox ADD COLUMN dead INTEGER NOT NULL DEFAULT 0")
+
+    def _connect(self):
+        """Open a connection to the journal (one per call, safe across threads)"""
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def enqueue(self, record, image_bytes, content_type):
+        """
+        Durably queue a prediction row and its image for persistence
+
+        Args:
+            record: Row for the `predictions` table (must contain id and storage_path)
+            image_bytes: Raw uploaded image
+            content_type: MIME type used for the storage upload
+        """
+        self.enqueue_many([(record, image_bytes, content_type)])
+
+    def enqueue_many(self, items, wake=True):
+        """
+        Durably queue several (record, image_bytes, content_type) items in one transaction
+
+        With wake=False the workers are not signalled, so callers adding a large
+        batch in several steps can call wake() once at the end and have the rows
+        drained together in as few bulk inserts as possible.
+        """
+        if not items:
+            return
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN")
+            conn.executemany(
+                "INSERT OR IGNORE INTO outbox (id, storage_path, content_type, image, record, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (record["id"], record["storage_path"], content_type, sqlite3.Binary(image_bytes),
+                     json.dumps(record), now)
+                    for record, image_bytes, content_type in items
+                ]
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        if wake:
+            self.wake()
+
+    def wake(self):
+        """Signal the workers that new entries are due"""
+        self._wakeup.set()
+
+    def start(self):
+        """Start the background drain workers"""
+        if self._threads:
+            return
+        self._stopping.clear()
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"fito-outbox-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        print(f"[SUCCESS] Persistence outbox started ({self.workers} workers, journal: {self.db_path})")
+
+    def stop(self, timeout=5.0):
+        """Stop the drain workers; undelivered entries stay in the journal"""
+        self._stopping.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout=timeout)
+        self._threads = []
+
+    def _run(self):
+        """Worker loop: claim due entries and deliver them"""
+        while not self._stopping.is_set():
+            try:
+                entries = self._claim()
+                if entries:
+                    with metrics.component("outbox"):
+                        self._deliver(entries)
+                    continue
+            except Exception as e:
+                metrics.ERRORS.inc("outbox", "worker")
+                print(f"[ERROR] Outbox worker error: {e}")
+
+            self._wakeup.wait(timeout=self._next_due_in())
+            self._wakeup.clear()
+
+    def _claim(self):
+        """
+        Lease a batch of due entries so no other worker (or process) picks them up
+
+        The image BLOBs are left in the journal and read one at a time at
+        upload time, so a worker never holds a whole batch of photos in memory.
+        """
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            rows = conn.execute(
+                "SELECT id, storage_path, content_type, record, uploaded, attempts FROM outbox "
+                "WHERE dead = 0 AND next_attempt_at <= ? AND lease_until <= ? ORDER BY created_at LIMIT ?",
+                (now, now, self.batch_size)
+            ).fetchall()
+            if rows:
+                conn.executemany(
+                    "UPDATE outbox SET lease_until = ? WHERE id = ?",
+                    [(now + self.lease_seconds, row[0]) for row in rows]
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+        return [
+            {
+                "id": row[0],
+                "storage_path": row[1],
+                "content_type": row[2],
+                "record": json.loads(row[3]),
+                "uploaded": bool(row[4]),
+                "attempts": row[5]
+            }
+            for row in rows
+        ]
+
+    def _deliver(self, entries):
+        """Upload pending images, then batch-insert every uploaded row"""
+        try:
+            supabase = get_supabase_client()
+            bucket = supabase.storage.from_(STORAGE_BUCKET)
+        except Exception as e:
+            metrics.ERRORS.inc("outbox", "client")
+            print(f"[WARNING] Outbox cannot reach Supabase, {len(entries)} prediction(s) will be retried: {e}")
+            self._reschedule(entries, e)
+            return
+
+        ready = []
+        for entry in entries:
+            if entry["uploaded"]:
+                ready.append(entry)
+                continue
+            try:
+                image = self._load_image(entry["id"])
+                with metrics.stage("storage_upload"):
+                    bucket.upload(
+                        entry["storage_path"],
+                        image,
+                        file_options={"content-type": entry["content_type"], "upsert": "true"}
+                    )
+                del image
+                entry["record"]["image_url"] = bucket.get_public_url(entry["storage_path"])
+                self._mark_uploaded(entry)
+                ready.append(entry)
+            except Exception as e:
+                metrics.ERRORS.inc("outbox", "storage_upload")
+                print(f"[WARNING] Outbox upload failed for {entry['id']}: {e}")
+                self._reschedule([entry], e)
+
+        if not ready:
+            return
+
+        try:
+            with metrics.stage("db_insert"):
+                supabase.table("predictions").upsert([entry["record"] for entry in ready]).execute()
+            self._remove(ready)
+            print(f"[SUCCESS] Outbox saved {len(ready)} prediction(s) to Supabase")
+        except Exception as e:
+            metrics.ERRORS.inc("outbox", "db_insert")
+            print(f"[WARNING] Outbox insert failed for {len(ready)} prediction(s): {e}")
+            if len(ready) == 1:
+                self._reschedule(ready, e)
+            else:
+                self._insert_each(supabase, ready)
+
+    def _insert_each(self, supabase, entries):
+        """Insert rows one at a time after a failed batch, so only the bad rows are retried"""
+        saved = 0
+        for entry in entries:
+            try:
+                with metrics.stage("db_insert"):
+                    supabase.table("predictions").upsert(entry["record"]).execute()
+                self._remove([entry])
+                saved += 1
+            except Exception as e:
+                metrics.ERRORS.inc("outbox", "db_insert")
+                print(f"[WARNING] Outbox insert failed for {entry['id']}: {e}")
+                self._reschedule([entry], e)
+        if saved:
+            print(f"[SUCCESS] Outbox saved {saved}/{len(entries)} prediction(s) to Supabase row by row")
+
+    def _load_image(self, entry_id):
+        """Read one entry's image from the journal"""
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT image FROM outbox WHERE id = ?", (entry_id,)).fetchone()
+        finally:
+            conn.close()
+        if row is None or row[0] is None:
+            raise LookupError(f"image for outbox entry {entry_id} is missing")
+        return bytes(row[0])
+
+    def _mark_uploaded(self, entry):
+        """Record a finished upload and drop the local image copy"""
+        conn = self._connect()
+        try:
+            conn.execute(
+                "UPDATE outbox SET uploaded = 1, image = NULL, record = ? WHERE id = ?",
+                (json.dumps(entry["record"]), entry["id"])
+            )
+        finally:
+            conn.close()
+
+    def _reschedule(self, entries, error):
+        """Release the lease and back off exponentially, or dead-letter entries out of attempts"""
+        now = time.time()
+        updates = []
+        for entry in entries:
+            attempts = entry["attempts"] + 1
+            dead = attempts >= self.max_attempts
+            if dead:
+                metrics.ERRORS.inc("outbox", "dead_letter")
+                print(f"[ERROR] Outbox gave up on {entry['id']} after {attempts} attempts: {error}")
+            updates.append((
+                attempts,
+                now + min(self.max_backoff, self.base_backoff * (2 ** entry["attempts"])),
+                str(error)[:500],
+                int(dead),
+                entry["id"]
+            ))
+
+        conn = self._connect()
+        try:
+            conn.executemany(
+                "UPDATE outbox SET attempts = ?, next_attempt_at = ?, lease_until = 0, last_error = ?, dead = ? WHERE id = ?",
+                updates
+            )
+        finally:
+            conn.close()
+
+    def _remove(self, entries):
+        """Delete delivered entries from the journal"""
+        conn = self._connect()
+        try:
+            conn.executemany("DELETE FROM outbox WHERE id = ?", [(entry["id"],) for entry in entries])
+        finally:
+            conn.close()
+
+    def _next_due_in(self):
+        """Seconds until the next entry becomes due (capped so leases are re-checked)"""
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT MIN(MAX(next_attempt_at, lease_until)) FROM outbox WHERE dead = 0").fetchone()
+        finally:
+            conn.close()
+        if row[0] is None:
+            return 30.0
+        return min(30.0, max(0.05, row[0] - time.time()))
+
+    def stats(self):
+        """Get journal depth and retry statistics"""
+        conn = self._connect()
+        try:
+            pending, awaiting_upload, retrying, oldest = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(uploaded = 0), 0), COALESCE(SUM(attempts > 0), 0), MIN(created_at) "
+                "FROM outbox WHERE dead = 0"
+            ).fetchone()
+            dead_letter = conn.execute("SELECT COUNT(*) FROM outbox WHERE dead = 1").fetchone()[0]
+        finally:
+            conn.close()
+        return {
+            "pending": pending,
+            "awaiting_upload": awaiting_upload,
+            "retrying": retrying,
+            "dead_letter": dead_letter,
+            "max_attempts": self.max_attempts,
+            "oldest_age_seconds": (time.time() - oldest) if oldest else 0.0,
+            "workers": self.workers
+        }
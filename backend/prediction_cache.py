@@ -0,0 +1,227 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+def _model_files(model_path):
+    """Files making up a model artifact (a single file, or every file in a SavedModel directory)"""
+    if not os.path.isdir(model_path):
+        return [model_path]
+    files = []
+    for root, _, names in os.walk(model_path):
+        files.extend(os.path.join(root, name) for name in names)
+    return sorted(files)
+
+
+def model_fingerprint(model_path, chunk_size=1024 * 1024):
+    """SHA-256 of the model artifact, used to scope cached predictions to one model"""
+    digest = hashlib.sha256()
+    for path in _model_files(model_path):
+        digest.update(os.path.relpath(path, model_path).encode())
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+class PredictionCache:
+    """
+    Content-addressed cache of prediction results.
+
+    Entries are keyed by the SHA-256 of the uploaded image bytes and stored in a
+    bounded in-memory LRU, optionally backed by JSON files on disk. Keys are
+    scoped by the model fingerprint: when the model file changes on disk the
+    in-memory entries are dropped and the old on-disk entries are removed.
+
+    Created with model_path=None the cache is unscoped (every lookup misses)
+    until rescope() points it at a loaded model, so it can be built before the
+    model without hashing the artifact.
+    """
+
+    def __init__(self, model_path=None, max_entries=1024, disk_dir=None, check_interval=1.0):
+        """Initialize the cache for the given model file"""
+        self.model_path = model_path
+        self.max_entries = max(0, int(max_entries))
+        self.disk_dir = disk_dir or None
+        self.check_interval = check_interval
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        self._model_stat = self._stat_model() if model_path else None
+        self._last_check = time.monotonic()
+        self.fingerprint = model_fingerprint(model_path) if model_path else None
+
+        self._hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+        if self.disk_dir and self.fingerprint:
+            os.makedirs(self._disk_scope(), exist_ok=True)
+
+    @staticmethod
+    def hash_image(image_bytes):
+        """Content hash of the uploaded image"""
+        return hashlib.sha256(image_bytes).hexdigest()
+
+    def get(self, image_hash, fingerprint=None):
+        """
+        Return the cached result for an image hash, or None on a miss
+
+        If `fingerprint` is given and is not the model the cache is currently
+        scoped to (e.g. a request still running on a model that was just
+        swapped out), the lookup is treated as a miss.
+        """
+        self._check_model()
+        if self.fingerprint is None or (fingerprint is not None and fingerprint != self.fingerprint):
+            with self._lock:
+                self._misses += 1
+            return None
+
+        with self._lock:
+            result = self._entries.get(image_hash)
+            if result is not None:
+                self._entries.move_to_end(image_hash)
+                self._hits += 1
+                return result
+
+        result = self._read_disk(image_hash)
+        with self._lock:
+            if result is None:
+                self._misses += 1
+                return None
+            self._disk_hits += 1
+            self._insert(image_hash, result)
+        return result
+
+    def put(self, image_hash, result, fingerprint=None):
+        """Store a prediction result for an image hash (skipped if `fingerprint` is stale)"""
+        if self.fingerprint is None or (fingerprint is not None and fingerprint != self.fingerprint):
+            return
+        with self._lock:
+            self._insert(image_hash, result)
+        self._write_disk(image_hash, result)
+
+    def clear(self):
+        """Drop every cached entry for the current model (memory and disk)"""
+        with self._lock:
+            self._entries.clear()
+            self._invalidations += 1
+        if self.disk_dir and self.fingerprint:
+            self._remove_disk_scope(self.fingerprint)
+            os.makedirs(self._disk_scope(), exist_ok=True)
+
+    def rescope(self, model_path, fingerprint=None):
+        """Point the cache at a newly activated model; entries for the old model are dropped from memory"""
+        fingerprint = fingerprint or model_fingerprint(model_path)
+        with self._lock:
+            self.model_path = model_path
+            self._model_stat = self._stat_model()
+            self.fingerprint = fingerprint
+            self._entries.clear()
+            self._invalidations += 1
+        if self.disk_dir:
+            os.makedirs(self._disk_scope(), exist_ok=True)
+
+    def _insert(self, image_hash, result):
+        """Insert into the LRU, evicting the least recently used entry when full (lock held)"""
+        if self.max_entries == 0:
+            return
+        self._entries[image_hash] = result
+        self._entries.move_to_end(image_hash)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+
+    def _stat_model(self):
+        """Latest modification time and total size of the model artifact"""
+        try:
+            stats = [os.stat(path) for path in _model_files(self.model_path)]
+            return (max(stat.st_mtime_ns for stat in stats), sum(stat.st_size for stat in stats))
+        except (OSError, ValueError):
+            return None
+
+    def _check_model(self):
+        """Invalidate the cache if the model file changed (checked at most once per interval)"""
+        now = time.monotonic()
+        if self.model_path is None or now - self._last_check < self.check_interval:
+            return
+        self._last_check = now
+
+        current = self._stat_model()
+        if current == self._model_stat or current is None:
+            return
+
+        fingerprint = model_fingerprint(self.model_path)
+        self._model_stat = current
+        if fingerprint == self.fingerprint:
+            return
+
+        print(f"[INFO] Model file changed, invalidating prediction cache ({(self.fingerprint or '')[:12]} -> {fingerprint[:12]})")
+        if self.disk_dir and self.fingerprint:
+            self._remove_disk_scope(self.fingerprint)
+        self.fingerprint = fingerprint
+        self.clear()
+
+    def _disk_scope(self, fingerprint=None):
+        """Directory holding on-disk entries for a model (the current one by default)"""
+        return os.path.join(self.disk_dir, (fingerprint or self.fingerprint)[:16])
+
+    def _remove_disk_scope(self, fingerprint):
+        """
+        Delete one model's on-disk entries
+
+        Only the per-fingerprint directory the cache created is removed, never
+        disk_dir itself, which may be shared with unrelated files.
+        """
+        shutil.rmtree(self._disk_scope(fingerprint), ignore_errors=True)
+
+    def _disk_path(self, image_hash):
+        """On-disk location of an entry"""
+        return os.path.join(self._disk_scope(), image_hash[:2], f"{image_hash}.json")
+
+    def _read_disk(self, image_hash):
+        """Load an entry from disk, or None if absent or unreadable"""
+        if not self.disk_dir:
+            return None
+        try:
+            with open(self._disk_path(image_hash), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_disk(self, image_hash, result):
+        """Write an entry to disk atomically"""
+        if not self.disk_dir:
+            return
+        path = self._disk_path(image_hash)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(result, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"[WARNING] Failed to write prediction cache entry: {e}")
+
+    def stats(self):
+        """Get hit/miss counters and cache size"""
+        with self._lock:
+            lookups = self._hits + self._disk_hits + self._misses
+            return {
+                "model_fingerprint": self.fingerprint,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "disk_enabled": bool(self.disk_dir),
+                "hits": self._hits,
+                "disk_hits": self._disk_hits,
+                "misses": self._misses,
+                "hit_rate": ((self._hits + self._disk_hits) / lookups) if lookups else 0.0,
+                "evictions": self._evictions,
+                "invalidations": self._invalidations
+            }
@@ -0,0 +1,92 @@
+import threading
+import numpy as np
+from image_decode import decode_image
+import metrics
+
+
+def model_input_spec(model, default_size=(224, 224)):
+    """
+    Read the expected input size and dtype from a loaded Keras model
+
+    Returns:
+        ((height, width, channels), numpy dtype)
+    """
+    shape = model.input_shape
+    if isinstance(shape, list):
+        shape = shape[0]
+    height = shape[1] or default_size[0]
+    width = shape[2] or default_size[1]
+    channels = shape[3] or 3
+
+    dtype = model.inputs[0].dtype
+    dtype = np.dtype(getattr(dtype, 'as_numpy_dtype', dtype))
+    if dtype.kind != 'f':
+        dtype = np.dtype(np.float32)
+
+    return (height, width, channels), dtype
+
+
+class ImagePreprocessor:
+    """
+    Decodes uploads and writes scaled pixels directly into float buffers.
+
+    Each worker thread gets its own preallocated (max_batch_size, H, W, C)
+    buffer. Pixels are cast from the decoded uint8 image into the buffer and
+    scaled in place, so no float64 or full-size float temporaries are created.
+    """
+
+    def __init__(self, input_shape=(224, 224, 3), dtype=np.float32, max_batch_size=1):
+        """Initialize the preprocessor for a model input shape"""
+        self.input_shape = tuple(input_shape)
+        self.dtype = np.dtype(dtype)
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.scale = self.dtype.type(1.0 / 255.0)
+        self._local = threading.local()
+
+    @property
+    def target_size(self):
+        """(width, height) for PIL"""
+        return (self.input_shape[1], self.input_shape[0])
+
+    def buffer(self):
+        """This thread's reusable (max_batch_size, H, W, C) input buffer"""
+        buffer = getattr(self._local, 'buffer', None)
+        if buffer is None:
+            buffer = np.empty((self.max_batch_size,) + self.input_shape, dtype=self.dtype)
+            self._local.buffer = buffer
+        return buffer
+
+    def fill(self, out, image_bytes):
+        """Decode an image and write its scaled pixels into `out` (shape H, W, C)"""
+        image = decode_image(image_bytes, self.target_size)
+        pixels = np.asarray(image)
+        if pixels.ndim == 2:
+            pixels = pixels[..., np.newaxis]
+        with metrics.stage("normalize"):
+            np.copyto(out, pixels, casting='unsafe')
+            np.multiply(out, self.scale, out=out)
+        return out
+
+    def preprocess(self, image_bytes, reuse_buffer=False):
+        """
+        Preprocess one image into a (1, H, W, C) batch
+
+        With reuse_buffer=True the result is a view into this thread's buffer and
+        is only valid until the same thread preprocesses again; otherwise a new
+        array is allocated once and filled in place.
+        """
+        if reuse_buffer:
+            batch = self.buffer()[:1]
+        else:
+            batch = np.empty((1,) + self.input_shape, dtype=self.dtype)
+        self.fill(batch[0], image_bytes)
+        return batch
+
+    def preprocess_many(self, images_bytes):
+        """Preprocess several images into a view of this thread's buffer"""
+        if len(images_bytes) > self.max_batch_size:
+            raise ValueError(f"At most {self.max_batch_size} images per batch, got {len(images_bytes)}")
+        batch = self.buffer()[:len(images_bytes)]
+        for i, image_bytes in enumerate(images_bytes):
+            self.fill(batch[i], image_bytes)
+        return batch
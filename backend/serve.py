@@ -0,0 +1,98 @@
+"""
+Multi-worker launcher for the Fito API
+
+Starts N uvicorn worker processes serving the same model file:
+
+- The model should be a .tflite flatbuffer (see scripts/export_tflite.py).
+  The TFLite interpreter memory-maps it read-only from disk, so every
+  worker maps the same page-cache pages for the file itself (Keras .h5 /
+  SavedModel weights are read into each worker's own heap).
+- That does not by itself make the weights shared: TFLite's default XNNPACK
+  delegate repacks the weights of the ops it runs into private buffers in
+  every worker. With FITO_TFLITE_XNNPACK=0 the built-in kernels read the
+  weights from the shared mapping instead, trading speed for memory. Check
+  which side of that trade a model lands on with the PSS column of
+  scripts/benchmark_workers.py --xnnpack on off.
+- Before the workers start, the launcher maps the file once and asks the
+  kernel to prefetch it, so workers map pages that are already resident.
+- Cores are split between workers: each one gets cpus // workers intra-op
+  threads (TFLite / ONNX Runtime via FITO_INFERENCE_THREADS, TensorFlow
+  and oneDNN via TF_NUM_INTRAOP_THREADS / OMP_NUM_THREADS).
+
+Workers are spawned, not forked after loading: the TensorFlow and TFLite
+runtimes start thread pools that do not survive fork(), and whatever can be
+shared (the file-backed mapping) is shared without it.
+
+Usage:
+    FITO_MODEL_PATH=trained_model_fito_outdoor.int8.tflite python serve.py --workers 4
+"""
+import os
+import sys
+import mmap
+import argparse
+import uvicorn
+import config
+from model_registry import ModelRegistry
+
+
+def serving_model_path():
+    """Model the workers will load: the registry's ACTIVE version, else FITO_MODEL_PATH"""
+    registry = ModelRegistry(config.MODEL_REGISTRY_DIR)
+    version = registry.active_version()
+    return registry.artifact_path(version) if version else config.MODEL_PATH
+
+
+def prefetch(model_path):
+    """Map the model file read-only and ask the kernel to load it into the page cache"""
+    with open(model_path, 'rb') as f:
+        mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if hasattr(mapping, 'madvise') and hasattr(mmap, 'MADV_WILLNEED'):
+        mapping.madvise(mmap.MADV_WILLNEED)
+    return mapping
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the Fito API with several worker processes")
+    parser.add_argument("--workers", type=int, default=config.available_cpus())
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--threads-per-worker", type=int, default=None,
+                        help="Intra-op threads per worker (default: cores // workers)")
+    args = parser.parse_args()
+
+    workers = max(1, args.workers)
+    threads = args.threads_per_worker or max(1, config.available_cpus() // workers)
+
+    # Inherited by the spawned workers (config.py reads them on import)
+    os.environ["FITO_WORKERS"] = str(workers)
+    os.environ["FITO_INFERENCE_THREADS"] = str(threads)
+    os.environ.setdefault("TF_NUM_INTRAOP_THREADS", str(threads))
+    os.environ.setdefault("OMP_NUM_THREADS", str(threads))
+
+    model_path = serving_model_path()
+    if not os.path.exists(model_path):
+        print(f"[ERROR] Model file not found: {model_path}")
+        sys.exit(1)
+
+    mapping = None
+    if model_path.endswith(".tflite"):
+        # Held for the server's lifetime so the pages stay cached for every worker
+        mapping = prefetch(model_path)
+        print(f"[SUCCESS] Shared model mapping ready: {model_path} ({len(mapping) / 1e6:.1f} MB)")
+        if config.TFLITE_XNNPACK and workers > 1:
+            print("[INFO] XNNPACK is on: each worker keeps its own packed copy of the weights "
+                  "(FITO_TFLITE_XNNPACK=0 serves them from the shared mapping)")
+    else:
+        print(f"[WARNING] {model_path} is not a .tflite model; each worker will hold its own copy of the weights "
+              "(export one with scripts/export_tflite.py to share them)")
+
+    print(f"[FITO] Starting {workers} worker(s) with {threads} intra-op thread(s) each")
+    try:
+        uvicorn.run("app:app", host=args.host, port=args.port, workers=workers)
+    finally:
+        if mapping is not None:
+            mapping.close()
+
+
+if __name__ == "__main__":
+    main()
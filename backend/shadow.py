@@ -0,0 +1,216 @@
+import os
+import json
+import time
+import queue
+import random
+import threading
+from collections import deque, Counter
+from datetime import datetime
+import numpy as np
+import metrics
+
+
+def _latency_summary(samples_ms):
+    """avg / p50 / p95 of a latency window in milliseconds"""
+    values = np.array(samples_ms)
+    if not len(values):
+        return {"avg": 0.0, "p50": 0.0, "p95": 0.0}
+    return {
+        "avg": float(values.mean()),
+        "p50": float(np.percentile(values, 50)),
+        "p95": float(np.percentile(values, 95))
+    }
+
+
+class ShadowEvaluator:
+    """
+    Runs a candidate ("shadow") model on a sample of live /predict traffic.
+
+    Sampled requests hand their image and the primary result to a bounded
+    queue and return immediately; a single background thread runs the shadow
+    model and records agreement, confidence deltas and latency of both models.
+    The shadow never delays primary inference: when the queue is full the
+    sample is dropped, and after each shadow prediction the worker idles long
+    enough to keep its duty cycle under `cpu_fraction`. The duty cycle only
+    bounds CPU if the shadow model's own thread pool is bounded too, which is
+    why the API loads shadows through TFLite or ONNX Runtime only. Its stage
+    timings are recorded under component="shadow", apart from /predict's.
+    """
+
+    def __init__(self, load_fn, version, sample_rate=0.1, cpu_fraction=0.25, max_pending=4, log_path=None, window=1000):
+        """
+        Args:
+            load_fn: load_fn() -> TomatoDiseasePredictor for the shadow model (called on the worker thread)
+            version: Shadow model version name (for reports and the comparison log)
+            sample_rate: Fraction of eligible requests mirrored to the shadow model
+            cpu_fraction: Maximum share of time the shadow worker may spend predicting
+            max_pending: Samples queued beyond this are dropped
+            log_path: Optional JSONL file receiving one line per comparison
+            window: Number of recent comparisons kept for latency/delta percentiles
+        """
+        self.load_fn = load_fn
+        self.version = version
+        self.sample_rate = min(1.0, max(0.0, float(sample_rate)))
+        self.cpu_fraction = min(1.0, max(0.01, float(cpu_fraction)))
+        self.log_path = log_path or None
+        self.predictor = None
+        self.error = None
+        self._queue = queue.Queue(maxsize=max(1, int(max_pending)))
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stopping = threading.Event()
+
+        self._sampled = 0
+        self._dropped = 0
+        self._failed = 0
+        self._compared = 0
+        self._agreed = 0
+        self._per_class = {}
+        self._disagreements = Counter()
+        self._primary_latency_ms = deque(maxlen=window)
+        self._shadow_latency_ms = deque(maxlen=window)
+        self._confidence_deltas = deque(maxlen=window)
+
+        if self.log_path:
+            os.makedirs(os.path.dirname(os.path.abspath(self.log_path)), exist_ok=True)
+
+    def start(self):
+        """Start the worker thread (the shadow model is loaded there, off the startup path)"""
+        if self._thread is not None:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="fito-shadow", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5.0):
+        """Stop the worker; queued samples are discarded"""
+        self._stopping.set()
+        try:
+            self._queue.put_nowait(None)
+        except queue.Full:
+            pass
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+
+    def maybe_submit(self, image_bytes, primary_result, primary_latency_ms, primary_version):
+        """
+        Mirror a request to the shadow model with probability `sample_rate`
+
+        Never blocks: returns False if the request was not sampled, the shadow
+        model is not loaded, or the queue is full.
+        """
+        if self.predictor is None or random.random() >= self.sample_rate:
+            return False
+        try:
+            self._queue.put_nowait((image_bytes, primary_result, primary_latency_ms, primary_version))
+        except queue.Full:
+            with self._lock:
+                self._dropped += 1
+            return False
+        with self._lock:
+            self._sampled += 1
+        return True
+
+    def _run(self):
+        """Worker loop: load the shadow model, then compare sampled requests"""
+        try:
+            self.predictor = self.load_fn()
+            print(f"[SUCCESS] Shadow model {self.version} loaded (sampling {self.sample_rate:.0%} of traffic)")
+        except Exception as e:
+            self.error = str(e)
+            print(f"[ERROR] Failed to load shadow model {self.version}: {e}")
+            return
+
+        while not self._stopping.is_set():
+            item = self._queue.get()
+            if item is None:
+                break
+            image_bytes, primary_result, primary_latency_ms, primary_version = item
+
+            started = time.perf_counter()
+            try:
+                with metrics.component("shadow"):
+                    shadow_result = self.predictor.predict(image_bytes)
+            except Exception as e:
+                with self._lock:
+                    self._failed += 1
+                print(f"[WARNING] Shadow prediction failed: {e}")
+                continue
+            elapsed = time.perf_counter() - started
+
+            self._record(primary_result, shadow_result, primary_latency_ms, elapsed * 1000.0, primary_version)
+
+            # Duty cycle: busy for `elapsed`, so idle long enough to stay within cpu_fraction
+            self._stopping.wait(elapsed * (1.0 - self.cpu_fraction) / self.cpu_fraction)
+
+    def _record(self, primary, shadow, primary_latency_ms, shadow_latency_ms, primary_version):
+        """Aggregate one comparison and append it to the log"""
+        primary_class = primary['predicted_class']
+        shadow_class = shadow['predicted_class']
+        agreed = primary_class == shadow_class
+        confidence_delta = float(shadow['confidence']) - float(primary['confidence'])
+
+        with self._lock:
+            self._compared += 1
+            self._agreed += int(agreed)
+            per_class = self._per_class.setdefault(primary_class, {"samples": 0, "agreed": 0})
+            per_class["samples"] += 1
+            per_class["agreed"] += int(agreed)
+            if not agreed:
+                self._disagreements[f"{primary_class} -> {shadow_class}"] += 1
+            self._primary_latency_ms.append(primary_latency_ms)
+            self._shadow_latency_ms.append(shadow_latency_ms)
+            self._confidence_deltas.append(confidence_delta)
+
+            if self.log_path:
+                entry = {
+                    "at": datetime.utcnow().isoformat(),
+                    "primary_version": primary_version,
+                    "shadow_version": self.version,
+                    "primary_class": primary_class,
+                    "shadow_class": shadow_class,
+                    "agreed": agreed,
+                    "primary_confidence": float(primary['confidence']),
+                    "shadow_confidence": float(shadow['confidence']),
+                    "confidence_delta": confidence_delta,
+                    "primary_latency_ms": primary_latency_ms,
+                    "shadow_latency_ms": shadow_latency_ms
+                }
+                try:
+                    with open(self.log_path, 'a', encoding='utf-8') as f:
+                        f.write(json.dumps(entry) + "\n")
+                except OSError as e:
+                    print(f"[WARNING] Failed to write shadow comparison log: {e}")
+
+    def report(self):
+        """Aggregated primary vs shadow comparison"""
+        with self._lock:
+            deltas = np.array(self._confidence_deltas)
+            return {
+                "shadow_version": self.version,
+                "loaded": self.predictor is not None,
+                "error": self.error,
+                "sample_rate": self.sample_rate,
+                "cpu_fraction": self.cpu_fraction,
+                "sampled": self._sampled,
+                "dropped": self._dropped,
+                "failed": self._failed,
+                "queue_depth": self._queue.qsize(),
+                "compared": self._compared,
+                "agreement_rate": (self._agreed / self._compared) if self._compared else None,
+                "per_class": {
+                    name: {**counts, "agreement_rate": counts["agreed"] / counts["samples"]}
+                    for name, counts in sorted(self._per_class.items())
+                },
+                "top_disagreements": dict(self._disagreements.most_common(10)),
+                "confidence_delta": {
+                    "mean": float(deltas.mean()) if len(deltas) else 0.0,
+                    "mean_abs": float(np.abs(deltas).mean()) if len(deltas) else 0.0,
+                    "p95_abs": float(np.percentile(np.abs(deltas), 95)) if len(deltas) else 0.0
+                },
+                "latency_ms": {
+                    "primary": _latency_summary(self._primary_latency_ms),
+                    "shadow": _latency_summary(self._shadow_latency_ms)
+                }
+            }
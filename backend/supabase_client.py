@@ -1,5 +1,5 @@
 import os
-from supabase import create_client, Client
+import threading
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -8,13 +8,23 @@ load_dotenv()
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_SERVICE_KEY = os.getenv("SUPABASE_SERVICE_KEY")
 
-if not SUPABASE_URL or not SUPABASE_SERVICE_KEY:
-    raise ValueError("Supabase credentials not found in environment variables")
+# Created on first use so importing the API never waits on (or fails because of) Supabase
+_supabase = None
+_lock = threading.Lock()
 
-# Create Supabase client with service role key for admin operations
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_SERVICE_KEY)
+def get_supabase_client():
+    """Get Supabase client instance (created on first call)"""
+    global _supabase
+    if _supabase is not None:
+        return _supabase
 
-def get_supabase_client() -> Client:
-    """Get Supabase client instance"""
-    return supabase
+    with _lock:
+        if _supabase is None:
+            if not SUPABASE_URL or not SUPABASE_SERVICE_KEY:
+                raise ValueError("Supabase credentials not found in environment variables")
 
+            from supabase import create_client
+
+            # Create Supabase client with service role key for admin operations
+            _supabase = create_client(SUPABASE_URL, SUPABASE_SERVICE_KEY)
+    return _supabase
@@ -0,0 +1,111 @@
+import threading
+import numpy as np
+from image_decode import decode_image
+
+# Views mirror the training augmentation in train_model_outdoor_optimized.py
+# (horizontal/vertical flips, rotations, zoom); "crops" adds a centre crop and
+# four corner crops, i.e. a zoom-in that keeps the full input resolution.
+VIEW_NAMES = ("hflip", "vflip", "rot90", "rot270", "crops")
+
+
+class TestTimeAugmentation:
+    """
+    Adaptive test-time augmentation for borderline predictions.
+
+    When the first-pass confidence falls inside `band` (low <= confidence <
+    high), the image is re-decoded into a set of augmented views that are run
+    as one batched forward pass; the first-pass and view probabilities are
+    averaged. Confident predictions (and clearly unidentifiable images below
+    the band) skip the extra pass entirely.
+    """
+
+    def __init__(self, views=VIEW_NAMES, band=(0.5, 0.9), crop_fraction=0.85):
+        """
+        Args:
+            views: Subset of VIEW_NAMES to generate
+            band: (low, high) first-pass confidence range that triggers TTA
+            crop_fraction: Side of each crop relative to the zoomed-out image
+        """
+        unknown = set(views) - set(VIEW_NAMES)
+        if unknown:
+            raise ValueError(f"Unknown TTA views: {', '.join(sorted(unknown))} (choose from {', '.join(VIEW_NAMES)})")
+        self.views = tuple(views)
+        self.band = (float(band[0]), float(band[1]))
+        self.crop_fraction = min(1.0, max(0.5, float(crop_fraction)))
+        self._lock = threading.Lock()
+        self._checked = 0
+        self._triggered = 0
+        self._changed = 0
+        self._total_seconds = 0.0
+        self._total_views = 0
+
+    def should_run(self, probabilities):
+        """True if the first-pass confidence is inside the TTA band"""
+        confidence = float(np.max(probabilities))
+        triggered = self.band[0] <= confidence < self.band[1]
+        with self._lock:
+            self._checked += 1
+            self._triggered += int(triggered)
+        return triggered
+
+    def build_views(self, image_bytes, preprocessor):
+        """
+        Augmented views of an image as one preprocessed batch
+
+        Returns:
+            (n_views, H, W, C) array in the preprocessor's dtype, scaled like the first pass
+        """
+        height, width = preprocessor.input_shape[:2]
+        arrays = []
+
+        base = np.asarray(decode_image(image_bytes, (width, height)))
+        if "hflip" in self.views:
+            arrays.append(base[:, ::-1])
+        if "vflip" in self.views:
+            arrays.append(base[::-1])
+        # Quarter turns only keep the input shape for square inputs
+        if height == width:
+            if "rot90" in self.views:
+                arrays.append(np.rot90(base, 1))
+            if "rot270" in self.views:
+                arrays.append(np.rot90(base, 3))
+
+        if "crops" in self.views:
+            # Decode slightly larger, then cut input-sized windows (no second resize)
+            large_width, large_height = round(width / self.crop_fraction), round(height / self.crop_fraction)
+            large = np.asarray(decode_image(image_bytes, (large_width, large_height)))
+            spare_y, spare_x = large_height - height, large_width - width
+            for top, left in ((spare_y // 2, spare_x // 2), (0, 0), (0, spare_x), (spare_y, 0), (spare_y, spare_x)):
+                arrays.append(large[top:top + height, left:left + width])
+
+        batch = np.empty((len(arrays),) + tuple(preprocessor.input_shape), dtype=preprocessor.dtype)
+        for out, pixels in zip(batch, arrays):
+            np.copyto(out, pixels.reshape(out.shape), casting='unsafe')
+        np.multiply(batch, preprocessor.scale, out=batch)
+        return batch
+
+    def aggregate(self, first_pass, view_probabilities):
+        """Average the first-pass and per-view probability vectors"""
+        stacked = np.vstack([np.asarray(first_pass)[np.newaxis], np.asarray(view_probabilities)])
+        return stacked.mean(axis=0)
+
+    def record(self, first_pass, refined, seconds, n_views):
+        """Count an executed TTA pass and whether it changed the predicted class"""
+        with self._lock:
+            self._changed += int(np.argmax(first_pass) != np.argmax(refined))
+            self._total_seconds += seconds
+            self._total_views += n_views
+
+    def stats(self):
+        """Get trigger rate, changed predictions and added latency"""
+        with self._lock:
+            return {
+                "views": list(self.views),
+                "band": list(self.band),
+                "checked": self._checked,
+                "triggered": self._triggered,
+                "trigger_rate": (self._triggered / self._checked) if self._checked else 0.0,
+                "changed_predictions": self._changed,
+                "avg_views": (self._total_views / self._triggered) if self._triggered else 0.0,
+                "avg_added_ms": (self._total_seconds / self._triggered * 1000.0) if self._triggered else 0.0
+            }
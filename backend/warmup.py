@@ -0,0 +1,88 @@
+import io
+import time
+import threading
+import numpy as np
+from PIL import Image
+import metrics
+
+
+def synthetic_jpeg(size=(640, 480), seed=0):
+    """Random JPEG used to exercise the decode path during warm-up"""
+    rng = np.random.default_rng(seed)
+    pixels = rng.integers(0, 255, (size[1], size[0], 3), dtype=np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, format='JPEG', quality=85)
+    return buffer.getvalue()
+
+
+class ModelWarmup:
+    """
+    Startup warm-up and readiness state.
+
+    Runs synthetic batches at every configured batch size through the serving
+    path (decode + preprocess, then the model's micro-batcher) so graph
+    tracing, kernel selection, the batcher's stacking buffer and allocator
+    growth happen before real traffic. `ready` only turns true once this has
+    finished.
+    """
+
+    def __init__(self, batch_sizes=(1,), iterations=3):
+        """Initialize the warm-up plan"""
+        self.batch_sizes = sorted(set(int(size) for size in batch_sizes if int(size) > 0)) or [1]
+        self.iterations = max(1, int(iterations))
+        self._ready = threading.Event()
+        self.started_at = None
+        self.duration = None
+        self.latency_ms = {}
+        self.error = None
+
+    @property
+    def ready(self):
+        """True once warm-up has completed successfully"""
+        return self._ready.is_set()
+
+    def run(self, predictor, batcher):
+        """
+        Warm up the predictor and its started MicroBatcher (blocking)
+
+        Records the duration and the post-warm-up latency per batch size,
+        which includes the batching window like a real request's.
+        """
+        self.started_at = time.time()
+        started = time.perf_counter()
+        try:
+            with metrics.component("warmup"):
+                self._warm(predictor, batcher)
+            self.duration = time.perf_counter() - started
+            self._ready.set()
+            print(f"[SUCCESS] Model warm-up finished in {self.duration:.2f}s (batch sizes {self.batch_sizes})")
+        except Exception as e:
+            self.error = str(e)
+            print(f"[ERROR] Model warm-up failed: {e}")
+            raise
+
+    def _warm(self, predictor, batcher):
+        """Run the synthetic batches (stage timings go to component="warmup")"""
+        image_bytes = synthetic_jpeg()
+        sample = predictor.preprocess_image(image_bytes)
+
+        for batch_size in self.batch_sizes:
+            batch = np.repeat(sample, batch_size, axis=0)
+            for _ in range(self.iterations):
+                predictor.preprocess_image(image_bytes, reuse_buffer=True)
+                batcher.submit(batch).result()
+
+            # Latency now that the path is warm
+            measured = time.perf_counter()
+            batcher.submit(batch).result()
+            self.latency_ms[str(batch_size)] = (time.perf_counter() - measured) * 1000.0
+
+    def status(self):
+        """Readiness report for the /ready endpoint"""
+        return {
+            "ready": self.ready,
+            "warmup_seconds": self.duration,
+            "batch_sizes": self.batch_sizes,
+            "post_warmup_latency_ms": self.latency_ms,
+            "error": self.error
+        }
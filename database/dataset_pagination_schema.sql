@@ -0,0 +1,15 @@
+-- ============================================================================
+-- FITO - KEYSET PAGINATION FOR THE ADMIN DATASET BROWSER
+-- ============================================================================
+-- GET /api/admin/dataset pages with a cursor on (created_at, id), newest
+-- first. This index turns each page into a range scan that starts at the
+-- cursor instead of scanning and discarding every earlier row.
+-- Run this in Supabase SQL Editor after supabase_schema.sql
+-- ============================================================================
+
+CREATE INDEX IF NOT EXISTS idx_predictions_created_at_id
+ON predictions(created_at DESC, id DESC);
+
+-- count=planned / count=estimated read planner statistics; keep them fresh
+-- after large imports or deletes
+ANALYZE predictions;
@@ -0,0 +1,16 @@
+-- ============================================================================
+-- FITO - MODEL VERSION TRACKING
+-- ============================================================================
+-- Records which model version served each prediction (see backend/model_registry.py)
+-- Run this in Supabase SQL Editor after supabase_schema.sql
+-- Until it is applied, dataset exports still work with an empty model_version column
+-- ============================================================================
+
+ALTER TABLE predictions
+ADD COLUMN IF NOT EXISTS model_version TEXT;
+
+COMMENT ON COLUMN predictions.model_version IS 'Model registry version that produced predicted_label';
+
+-- Index for comparing predictions across model versions
+CREATE INDEX IF NOT EXISTS idx_predictions_model_version
+ON predictions(model_version, created_at DESC);
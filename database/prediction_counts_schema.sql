@@ -0,0 +1,176 @@
+-- ============================================================================
+-- FITO - INCREMENTAL CATEGORY COUNTS
+-- ============================================================================
+-- Keeps per-category prediction counts (final_label if set, otherwise
+-- predicted_label) in a small table maintained by triggers, so the admin
+-- dashboard stats (GET /api/admin/stats) cost the same however large the
+-- predictions table grows.
+-- Run this in Supabase SQL Editor after supabase_schema.sql
+-- ============================================================================
+
+-- ============================================================================
+-- 1. COUNTS TABLE
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS prediction_counts (
+  category TEXT PRIMARY KEY,
+  count BIGINT NOT NULL DEFAULT 0,
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+COMMENT ON TABLE prediction_counts IS 'Predictions per effective label, maintained by triggers on predictions';
+
+-- Only readable through get_prediction_counts()
+ALTER TABLE prediction_counts ENABLE ROW LEVEL SECURITY;
+
+-- ============================================================================
+-- 2. TRIGGERS
+-- ============================================================================
+-- Statement-level triggers with transition tables: a bulk insert, relabel or
+-- delete applies one grouped delta per category instead of one counter update
+-- per row. INSERT ... ON CONFLICT DO UPDATE (the outbox upserts) fires both
+-- the insert and the update trigger with the respective rows.
+
+CREATE OR REPLACE FUNCTION apply_prediction_count_deltas()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+  IF TG_OP = 'INSERT' THEN
+    INSERT INTO prediction_counts (category, count)
+    SELECT COALESCE(final_label, predicted_label), COUNT(*)
+    FROM new_rows
+    GROUP BY 1
+    ON CONFLICT (category) DO UPDATE
+      SET count = prediction_counts.count + EXCLUDED.count,
+          updated_at = NOW();
+
+  ELSIF TG_OP = 'UPDATE' THEN
+    -- Net change per category; rows whose effective label did not change cancel out
+    INSERT INTO prediction_counts (category, count)
+    SELECT category, delta
+    FROM (
+      SELECT category, SUM(delta) AS delta
+      FROM (
+        SELECT COALESCE(final_label, predicted_label) AS category, 1 AS delta FROM new_rows
+        UNION ALL
+        SELECT COALESCE(final_label, predicted_label), -1 FROM old_rows
+      ) changes
+      GROUP BY category
+    ) net
+    WHERE delta <> 0
+    ON CONFLICT (category) DO UPDATE
+      SET count = prediction_counts.count + EXCLUDED.count,
+          updated_at = NOW();
+
+  ELSIF TG_OP = 'DELETE' THEN
+    UPDATE prediction_counts c
+    SET count = c.count - d.removed,
+        updated_at = NOW()
+    FROM (
+      SELECT COALESCE(final_label, predicted_label) AS category, COUNT(*) AS removed
+      FROM old_rows
+      GROUP BY 1
+    ) d
+    WHERE c.category = d.category;
+  END IF;
+
+  RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION reset_prediction_counts()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+  DELETE FROM prediction_counts;
+  RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS prediction_counts_insert ON predictions;
+CREATE TRIGGER prediction_counts_insert
+  AFTER INSERT ON predictions
+  REFERENCING NEW TABLE AS new_rows
+  FOR EACH STATEMENT
+  EXECUTE FUNCTION apply_prediction_count_deltas();
+
+DROP TRIGGER IF EXISTS prediction_counts_update ON predictions;
+CREATE TRIGGER prediction_counts_update
+  AFTER UPDATE ON predictions
+  REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+  FOR EACH STATEMENT
+  EXECUTE FUNCTION apply_prediction_count_deltas();
+
+DROP TRIGGER IF EXISTS prediction_counts_delete ON predictions;
+CREATE TRIGGER prediction_counts_delete
+  AFTER DELETE ON predictions
+  REFERENCING OLD TABLE AS old_rows
+  FOR EACH STATEMENT
+  EXECUTE FUNCTION apply_prediction_count_deltas();
+
+DROP TRIGGER IF EXISTS prediction_counts_truncate ON predictions;
+CREATE TRIGGER prediction_counts_truncate
+  AFTER TRUNCATE ON predictions
+  FOR EACH STATEMENT
+  EXECUTE FUNCTION reset_prediction_counts();
+
+-- ============================================================================
+-- 3. RPC FUNCTIONS
+-- ============================================================================
+
+-- Function: Category counts for the admin dashboard (one row per category)
+CREATE OR REPLACE FUNCTION get_prediction_counts()
+RETURNS TABLE (
+  category TEXT,
+  count BIGINT
+)
+LANGUAGE sql
+STABLE
+SECURITY DEFINER
+SET search_path = public
+AS $$
+  SELECT c.category, c.count
+  FROM prediction_counts c
+  WHERE c.count > 0
+  ORDER BY c.count DESC;
+$$;
+
+COMMENT ON FUNCTION get_prediction_counts IS 'Per-category prediction counts from the trigger-maintained prediction_counts table';
+
+-- Function: Recount from scratch (initial backfill, or to repair drift)
+CREATE OR REPLACE FUNCTION rebuild_prediction_counts()
+RETURNS VOID
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+  -- Block writers while recounting so no delta is lost or applied twice
+  LOCK TABLE predictions IN SHARE MODE;
+  DELETE FROM prediction_counts;
+  INSERT INTO prediction_counts (category, count)
+  SELECT COALESCE(final_label, predicted_label), COUNT(*)
+  FROM predictions
+  GROUP BY 1;
+END;
+$$;
+
+COMMENT ON FUNCTION rebuild_prediction_counts IS 'Recompute prediction_counts from the predictions table';
+
+REVOKE EXECUTE ON FUNCTION rebuild_prediction_counts() FROM PUBLIC;
+
+-- ============================================================================
+-- 4. BACKFILL
+-- ============================================================================
+
+SELECT rebuild_prediction_counts();
+
+-- Verify: both queries should return the same counts
+-- SELECT * FROM get_prediction_counts();
+-- SELECT * FROM category_stats;
@@ -19,6 +19,7 @@ CREATE TABLE IF NOT EXISTS predictions (
   final_label TEXT,
   uploader_id UUID REFERENCES auth.users(id) ON DELETE SET NULL,
   uploader_name TEXT,
+  model_version TEXT,
   created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
   updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
 );
@@ -33,6 +34,7 @@ COMMENT ON COLUMN predictions.confidence IS 'Prediction confidence score (0.0 to
 COMMENT ON COLUMN predictions.final_label IS 'Admin-corrected label (overrides predicted_label)';
 COMMENT ON COLUMN predictions.uploader_id IS 'User ID who uploaded the image (nullable for anonymous)';
 COMMENT ON COLUMN predictions.uploader_name IS 'Display name of uploader';
+COMMENT ON COLUMN predictions.model_version IS 'Model registry version that produced predicted_label';
 COMMENT ON COLUMN predictions.created_at IS 'Timestamp when prediction was created';
 COMMENT ON COLUMN predictions.updated_at IS 'Timestamp when record was last updated';
 
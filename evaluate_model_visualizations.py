@@ -26,10 +26,15 @@ import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 from sklearn.metrics import confusion_matrix, classification_report, precision_recall_fscore_support
-from tensorflow.keras.models import load_model, Model
+from tensorflow.keras.models import load_model
 from tensorflow.keras.preprocessing.image import ImageDataGenerator, load_img, img_to_array
 import tensorflow as tf
 from datetime import datetime
+import sys
+
+# Grad-CAM is shared with the API's /predict/explain endpoint
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+from explain import GradCamExplainer, ExplainerUnavailable
 
 # Set style for better-looking plots
 plt.style.use('seaborn-v0_8-darkgrid')
@@ -335,62 +340,22 @@ print("   • Shows WHICH parts of the image the model focuses on")
 print("   • Validates that model looks at relevant features (leaves, not background)")
 print("   • Builds trust in model decisions")
 
-def make_gradcam_heatmap(img_array, model, last_conv_layer_name, pred_index=None):
-    """Generate Grad-CAM heatmap"""
-    # Create a model that maps the input image to the activations of the last conv layer
-    grad_model = Model(
-        inputs=[model.inputs],
-        outputs=[model.get_layer(last_conv_layer_name).output, model.output]
-    )
-    
-    # Compute gradient of top predicted class for our input image
-    with tf.GradientTape() as tape:
-        last_conv_layer_output, preds = grad_model(img_array)
-        if pred_index is None:
-            pred_index = tf.argmax(preds[0])
-        class_channel = preds[:, pred_index]
-    
-    # Gradient of the output neuron with regard to the output feature map
-    grads = tape.gradient(class_channel, last_conv_layer_output)
-    
-    # Mean intensity of the gradient over a specific feature map channel
-    pooled_grads = tf.reduce_mean(grads, axis=(0, 1, 2))
-    
-    # Multiply each channel by "how important this channel is"
-    last_conv_layer_output = last_conv_layer_output[0]
-    heatmap = last_conv_layer_output @ pooled_grads[..., tf.newaxis]
-    heatmap = tf.squeeze(heatmap)
-    
-    # Normalize heatmap
-    heatmap = tf.maximum(heatmap, 0) / tf.math.reduce_max(heatmap)
-    return heatmap.numpy()
-
-# Find last convolutional layer (usually in the base model)
-last_conv_layer_name = None
-for layer in reversed(model.layers):
-    if 'conv' in layer.name.lower():
-        last_conv_layer_name = layer.name
-        break
-
-if last_conv_layer_name is None:
-    print("⚠️  No convolutional layer found, skipping Grad-CAM")
-else:
-    print(f"   Using layer: {last_conv_layer_name}")
+# The gradient function is built and traced once; all samples run in one batched pass
+try:
+    explainer = GradCamExplainer(model)
+except ExplainerUnavailable as e:
+    explainer = None
+    print(f"⚠️  {e}, skipping Grad-CAM")
+
+if explainer is not None:
+    print(f"   Using layer: {explainer.layer_name}")
     
     # Generate Grad-CAM for 8 random samples
     sample_indices = np.random.choice(len(y_true), min(8, len(y_true)), replace=False)
     
-    fig, axes = plt.subplots(2, 4, figsize=(16, 8))
-    fig.suptitle('Grad-CAM: Model Attention Heatmaps', fontsize=16, fontweight='bold')
-    
-    for idx, ax in enumerate(axes.flat):
-        if idx >= len(sample_indices):
-            ax.axis('off')
-            continue
-        
-        sample_idx = sample_indices[idx]
-        
-        # Get image
+    # Collect the sample images (validation files are ordered by class, then name)
+    samples = []
+    for sample_idx in sample_indices:
         file_idx = sample_idx
         current_count = 0
         img_path = None
@@ -407,27 +372,35 @@ else:
             current_count += len(class_files)
         
         if img_path and os.path.exists(img_path):
-            # Load and preprocess image
-            img = load_img(img_path, target_size=(IMG_SIZE, IMG_SIZE))
-            img_array = img_to_array(img)
-            img_array = np.expand_dims(img_array, axis=0) / 255.0
-            
-            # Generate heatmap
-            heatmap = make_gradcam_heatmap(img_array, model, last_conv_layer_name)
-            
-            # Rescale heatmap to image size
-            heatmap = np.uint8(255 * heatmap)
-            heatmap = tf.image.resize(heatmap[..., np.newaxis], (IMG_SIZE, IMG_SIZE))
-            heatmap = heatmap.numpy().squeeze()
-            
-            # Superimpose heatmap on original image
-            ax.imshow(img)
-            ax.imshow(heatmap, cmap='jet', alpha=0.4)
-            
-            pred_label = class_names[y_pred[sample_idx]]
-            confidence = y_pred_probs[sample_idx][y_pred[sample_idx]] * 100
-            ax.set_title(f"{pred_label}\n{confidence:.1f}%", fontsize=9, fontweight='bold')
+            samples.append((sample_idx, load_img(img_path, target_size=(IMG_SIZE, IMG_SIZE))))
+    
+    heatmaps = []
+    if samples:
+        img_arrays = np.stack([img_to_array(img) for _, img in samples]) / 255.0
+        heatmaps, _, _ = explainer.explain_batch(img_arrays)
+    
+    fig, axes = plt.subplots(2, 4, figsize=(16, 8))
+    fig.suptitle('Grad-CAM: Model Attention Heatmaps', fontsize=16, fontweight='bold')
+    
+    for idx, ax in enumerate(axes.flat):
+        if idx >= len(samples):
+            ax.axis('off')
+            continue
+        
+        sample_idx, img = samples[idx]
+        
+        # Rescale heatmap to image size
+        heatmap = np.uint8(255 * heatmaps[idx])
+        heatmap = tf.image.resize(heatmap[..., np.newaxis], (IMG_SIZE, IMG_SIZE))
+        heatmap = heatmap.numpy().squeeze()
+        
+        # Superimpose heatmap on original image
+        ax.imshow(img)
+        ax.imshow(heatmap, cmap='jet', alpha=0.4)
         
+        pred_label = class_names[y_pred[sample_idx]]
+        confidence = y_pred_probs[sample_idx][y_pred[sample_idx]] * 100
+        ax.set_title(f"{pred_label}\n{confidence:.1f}%", fontsize=9, fontweight='bold')
         ax.axis('off')
     
     plt.tight_layout()
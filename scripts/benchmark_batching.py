@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Load test: single-image inference vs the micro-batching scheduler
+
+Fires concurrent requests from a thread pool (like concurrent /predict calls)
+and reports throughput and latency for both paths.
+
+Usage:
+    python scripts/benchmark_batching.py --requests 256 --concurrency 32
+"""
+import os
+import sys
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+
+from model_handler import TomatoDiseasePredictor
+from batching import MicroBatcher
+import config
+
+SAMPLE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "assets")
+
+
+def load_samples(predictor, limit=16):
+    """Preprocess sample images from assets/ (falls back to random noise)"""
+    samples = []
+    for root, _, files in os.walk(SAMPLE_DIR):
+        for name in sorted(files):
+            if name.lower().endswith(('.jpg', '.jpeg', '.png')) and 'logo' not in name.lower():
+                with open(os.path.join(root, name), 'rb') as f:
+                    samples.append(predictor.preprocess_image(f.read()))
+            if len(samples) >= limit:
+                return samples
+    if not samples:
+        samples = [np.random.rand(1, 224, 224, 3).astype(np.float32) for _ in range(limit)]
+    return samples
+
+
+def run_load(fn, samples, total_requests, concurrency):
+    """Run `fn(sample)` total_requests times with the given concurrency"""
+    latencies = []
+
+    def one(i):
+        started = time.perf_counter()
+        fn(samples[i % len(samples)])
+        latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(total_requests)))
+    elapsed = time.perf_counter() - started
+
+    latencies_ms = np.array(latencies) * 1000.0
+    return {
+        "throughput": total_requests / elapsed,
+        "p50_ms": float(np.percentile(latencies_ms, 50)),
+        "p99_ms": float(np.percentile(latencies_ms, 99))
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-batching load test")
+    parser.add_argument("--model", default=config.MODEL_PATH)
+    parser.add_argument("--requests", type=int, default=256)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--max-batch-size", type=int, default=config.BATCH_MAX_SIZE)
+    parser.add_argument("--window-ms", type=float, default=config.BATCH_WINDOW_MS)
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("MICRO-BATCHING LOAD TEST")
+    print("=" * 60)
+
+    predictor = TomatoDiseasePredictor(args.model)
+    samples = load_samples(predictor)
+
+    # Warm up both paths so tracing is not counted
+    predictor.predict_proba(samples[0])
+    predictor.predict_proba(np.concatenate([samples[0]] * args.max_batch_size))
+
+    single = run_load(predictor.predict_proba, samples, args.requests, args.concurrency)
+
+    batcher = MicroBatcher(predictor.predict_proba, args.max_batch_size, args.window_ms)
+    batcher.start()
+    batched = run_load(lambda x: batcher.submit(x).result(), samples, args.requests, args.concurrency)
+    stats = batcher.stats()
+    batcher.stop()
+
+    print(f"\nRequests: {args.requests}  Concurrency: {args.concurrency}")
+    print(f"{'Path':<16}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    for name, result in (("single-image", single), ("micro-batched", batched)):
+        print(f"{name:<16}{result['throughput']:>10.1f}{result['p50_ms']:>10.1f}{result['p99_ms']:>10.1f}")
+    print(f"\nSpeed-up: {batched['throughput'] / single['throughput']:.2f}x")
+    print(f"Batch-size histogram: {stats['batch_size_histogram']}")
+    print(f"Queue wait (ms): {stats['wait_ms']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Benchmark: buffered vs streaming dataset export
+
+Exports N synthetic prediction rows the way GET /api/admin/dataset/export
+does, without a database in the way (rows come from an in-process source
+that yields keyset-sized pages), and reports time to first byte, total time,
+output size and peak RSS for:
+  - buffered: fetch every row, write the whole CSV into a StringIO and send
+    it at the end (the previous export_csv)
+  - csv / csv.gz: stream one page at a time (dataset_export.export_chunks)
+  - parquet / arrow: the same stream as Parquet (zstd) or Arrow IPC (needs pyarrow)
+  - zip: the /dataset/export/zip archive of --zip-rows images, downloaded
+    from a simulated bucket (--download-ms latency, --image-kb per object)
+    by --workers threads
+
+Each mode runs in its own subprocess so peak RSS is not inherited from the
+previous one.
+
+Usage:
+    python scripts/benchmark_dataset_export.py
+    python scripts/benchmark_dataset_export.py --rows 1000000 --modes buffered csv csv.gz parquet
+    python scripts/benchmark_dataset_export.py --modes zip --zip-rows 5000 --workers 1 8 16
+"""
+import os
+import sys
+import io
+import csv
+import json
+import time
+import argparse
+import resource
+import subprocess
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+sys.path.insert(0, BACKEND_DIR)
+
+from dataset_export import CSV_HEADER, export_chunks, zip_chunks
+
+LABELS = [
+    'Bacterial Spot', 'Early Blight', 'Late Blight', 'Leaf Mold', 'Septoria Leaf Spot', 'Spider Mites',
+    'Target Spot', 'Yellow Leaf Curl Virus', 'Mosaic Virus', 'Healthy'
+]
+
+MODES = ["buffered", "csv", "csv.gz", "parquet", "arrow", "zip"]
+
+
+def make_row(i):
+    """One row shaped like EXPORT_COLUMNS"""
+    return {
+        "id": f"{i:08x}-0000-4000-8000-{i:012x}",
+        "predicted_label": LABELS[(i * 7919) % 10],
+        "confidence": ((i * 2654435761) % 10000) / 10000.0,
+        "final_label": LABELS[(i * 104729) % 10] if i % 20 == 0 else None,
+        "uploader_name": "anonymous",
+        "created_at": f"2026-01-01T00:00:{i % 60:02d}.{i % 1000000:06d}+00:00",
+        "image_url": f"https://example.com/storage/v1/object/public/tomato-leaves/bench/{i}.jpg",
+        "storage_path": f"bench/{i}.jpg",
+        "model_version": "v1"
+    }
+
+
+def pages(rows, page_size):
+    """Keyset-sized pages, built lazily like iter_pages"""
+    for start in range(0, rows, page_size):
+        yield [make_row(i) for i in range(start, min(rows, start + page_size))]
+
+
+def buffered_export(rows, page_size):
+    """The previous export_csv: every row in memory, then one CSV string"""
+    data = [row for page in pages(rows, page_size) for row in page]
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(CSV_HEADER)
+    for item in data:
+        writer.writerow([
+            item.get("id"),
+            item.get("predicted_label"),
+            item.get("confidence"),
+            item.get("final_label", ""),
+            item.get("uploader_name", ""),
+            item.get("created_at"),
+            item.get("image_url", "")
+        ])
+    yield output.getvalue().encode("utf-8")
+
+
+def simulated_download(latency_ms, size_kb):
+    """Storage download stand-in: fixed latency, incompressible payload"""
+    payload = os.urandom(size_kb * 1024)
+
+    def download(path):
+        time.sleep(latency_ms / 1000.0)
+        return payload[:-1] + bytes([len(path) % 256])
+    return download
+
+
+def run_mode(mode, rows, page_size, args):
+    """Consume one export and return its measurements"""
+    if mode == "zip":
+        rows = args.zip_rows
+        chunks = zip_chunks(pages(rows, page_size), simulated_download(args.download_ms, args.image_kb), workers=args.workers)
+    elif mode == "buffered":
+        chunks = buffered_export(rows, page_size)
+    else:
+        fmt, _, suffix = mode.partition(".")
+        chunks = export_chunks(pages(rows, page_size), fmt, compress=suffix == "gz")
+
+    started = time.perf_counter()
+    first_byte, size = None, 0
+    for chunk in chunks:
+        if first_byte is None and chunk:
+            first_byte = time.perf_counter() - started
+        size += len(chunk)
+    total = time.perf_counter() - started
+
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_mb = peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    if mode == "zip":
+        mode = f"zip x{args.workers}"
+    return {"mode": mode, "ttfb_ms": first_byte * 1000.0, "total_s": total, "size_mb": size / 1e6, "peak_rss_mb": peak_mb}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark buffered vs streaming dataset export")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--page-size", type=int, default=1000, help="Rows per keyset page (FITO_EXPORT_PAGE_SIZE)")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=MODES)
+    parser.add_argument("--zip-rows", type=int, default=2000, help="Images in the zip mode")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 8], help="Download threads (FITO_EXPORT_DOWNLOAD_WORKERS)")
+    parser.add_argument("--download-ms", type=float, default=20.0, help="Simulated storage latency per image")
+    parser.add_argument("--image-kb", type=int, default=100)
+    parser.add_argument("--child", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        args.workers = args.workers[0]
+        print(json.dumps(run_mode(args.child, args.rows, args.page_size, args)))
+        return
+
+    runs = [(mode, workers) for mode in args.modes for workers in (args.workers if mode == "zip" else [args.workers[0]])]
+    results = []
+    for mode, workers in runs:
+        label = f"zip x{workers}" if mode == "zip" else mode
+        print(f"⏱️  Exporting {args.zip_rows if mode == 'zip' else args.rows:,} rows ({label})...")
+        proc = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child", mode,
+             "--rows", str(args.rows), "--page-size", str(args.page_size),
+             "--zip-rows", str(args.zip_rows), "--workers", str(workers),
+             "--download-ms", str(args.download_ms), "--image-kb", str(args.image_kb)],
+            capture_output=True, text=True
+        )
+        if proc.returncode != 0:
+            reason = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else f"exit code {proc.returncode}"
+            print(f"⚠️  {label} skipped: {reason}")
+            continue
+        results.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+
+    print("\n" + "=" * 72)
+    print(f"{args.rows:,} rows ({args.zip_rows:,} images for zip), {args.page_size:,} rows per page")
+    print(f"{'mode':<12} {'TTFB ms':>12} {'total s':>10} {'size MB':>10} {'peak RSS MB':>14}")
+    for r in results:
+        print(f"{r['mode']:<12} {r['ttfb_ms']:>12.1f} {r['total_s']:>10.2f} {r['size_mb']:>10.1f} {r['peak_rss_mb']:>14.1f}")
+    print("=" * 72)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Grad-CAM explanation latency
+
+Compares three ways of producing Grad-CAM heatmaps for the sample leaves:
+  - rebuild: a new gradient Model and an eager GradientTape per image
+    (what evaluate_model_visualizations.py used to do)
+  - cached: GradCamExplainer.explain() - gradient function built and traced
+    once, one image per call, including decode and the JPEG overlay
+    (the /predict/explain path)
+  - batched: GradCamExplainer.explain_batch() on the whole set in chunks
+    (the offline evaluation path)
+and checks the cached p95 against the per-request latency target.
+
+Usage:
+    python scripts/benchmark_explain.py --model backend/trained_model_fito_outdoor.h5
+    python scripts/benchmark_explain.py --target-ms 200 --batch-size 16
+"""
+import os
+import sys
+import time
+import argparse
+import numpy as np
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+sys.path.insert(0, BACKEND_DIR)
+
+import config
+from explain import GradCamExplainer, find_target_layer
+from image_decode import decode_image
+
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "assets", "tomato leaf")
+
+
+def load_images(limit):
+    """Sample leaf images as raw bytes"""
+    images = []
+    for root, _, files in os.walk(ASSETS_DIR):
+        for name in sorted(files):
+            if name.lower().endswith(('.jpg', '.jpeg', '.png')):
+                with open(os.path.join(root, name), 'rb') as f:
+                    images.append(f.read())
+    return images[:limit]
+
+
+def rebuild_heatmap(tf, model, layer, image_batch):
+    """Grad-CAM the old way: new gradient model and eager tape on every call"""
+    grad_model = tf.keras.Model(inputs=[model.inputs], outputs=[layer.output, model.output])
+    with tf.GradientTape() as tape:
+        features, predictions = grad_model(image_batch)
+        class_channel = predictions[:, tf.argmax(predictions[0])]
+    grads = tape.gradient(class_channel, features)
+    pooled_grads = tf.reduce_mean(grads, axis=(0, 1, 2))
+    heatmap = tf.squeeze(features[0] @ pooled_grads[..., tf.newaxis])
+    return (tf.maximum(heatmap, 0) / tf.math.reduce_max(heatmap)).numpy()
+
+
+def describe(name, latencies_ms, per_image=1):
+    """One summary line"""
+    latencies_ms = np.array(latencies_ms) / per_image
+    print(f"{name:<10} avg {latencies_ms.mean():8.1f} ms  p50 {np.percentile(latencies_ms, 50):8.1f} ms  "
+          f"p95 {np.percentile(latencies_ms, 95):8.1f} ms  ({1000.0 / latencies_ms.mean():.1f} images/s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Grad-CAM explanations")
+    parser.add_argument("--model", default=config.MODEL_PATH, help="Keras model to explain")
+    parser.add_argument("--target-ms", type=float, default=config.EXPLAIN_TARGET_MS)
+    parser.add_argument("--batch-size", type=int, default=config.BATCH_MAX_SIZE)
+    parser.add_argument("--limit", type=int, default=64, help="Number of sample images")
+    parser.add_argument("--rebuild-runs", type=int, default=10, help="Images for the (slow) rebuild baseline")
+    args = parser.parse_args()
+
+    import tensorflow as tf
+
+    images = load_images(args.limit)
+    if not images:
+        print(f"❌ No sample images in {ASSETS_DIR}")
+        sys.exit(1)
+
+    model = tf.keras.models.load_model(args.model)
+    started = time.perf_counter()
+    explainer = GradCamExplainer(model, target_ms=args.target_ms)
+    print(f"🔧 Explainer built and traced in {(time.perf_counter() - started) * 1000.0:.0f} ms (layer {explainer.layer_name})")
+
+    height, width = explainer.input_shape[:2]
+    batch = np.stack([np.asarray(decode_image(image, (width, height)), dtype=np.float32) / 255.0 for image in images])
+
+    # Baseline only works when the target layer is reachable from the outer graph
+    layers = [layer for layer in model.layers if not isinstance(layer, tf.keras.layers.InputLayer)]
+    layer = layers[find_target_layer(layers)]
+    rebuild = []
+    try:
+        for i in range(min(args.rebuild_runs, len(batch))):
+            started = time.perf_counter()
+            rebuild_heatmap(tf, model, layer, batch[i:i + 1])
+            rebuild.append((time.perf_counter() - started) * 1000.0)
+    except ValueError as e:
+        print(f"⚠️  Rebuild baseline not possible for this model ({e})")
+        rebuild = []
+
+    explainer.explain(images[0])
+    cached = []
+    for image in images:
+        started = time.perf_counter()
+        explainer.explain(image)
+        cached.append((time.perf_counter() - started) * 1000.0)
+
+    explainer.explain_batch(batch[:args.batch_size])
+    batched = []
+    for offset in range(0, len(batch), args.batch_size):
+        chunk = batch[offset:offset + args.batch_size]
+        started = time.perf_counter()
+        explainer.explain_batch(chunk)
+        batched.append((time.perf_counter() - started) * 1000.0 / len(chunk))
+
+    print("\n" + "=" * 84)
+    print(f"Model: {args.model}  |  {len(images)} images, batch size {args.batch_size}")
+    print("-" * 84)
+    if rebuild:
+        describe("rebuild", rebuild)
+    describe("cached", cached)
+    describe("batched", batched)
+    print("-" * 84)
+    p95 = float(np.percentile(cached, 95))
+    status = "✅ within" if p95 <= args.target_ms else "❌ over"
+    print(f"{status} target: cached p95 {p95:.1f} ms vs {args.target_ms:.0f} ms "
+          f"({explainer.stats()['over_target']} of {explainer.stats()['requests']} requests over)")
+    print("=" * 84)
+
+
+if __name__ == "__main__":
+    main()
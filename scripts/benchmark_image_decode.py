@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: full decode + resize vs JPEG draft-mode decode
+
+Runs both decode paths over the sample leaves in `assets/tomato leaf/` plus
+synthetic phone-sized JPEGs, and reports decode time and peak RSS (each
+measured in a fresh subprocess that only reads its group's encoded bytes
+from a temp directory before taking the RSS baseline). If a model file is available, it also checks
+that predictions stay within tolerance.
+
+Usage:
+    python scripts/benchmark_image_decode.py
+    python scripts/benchmark_image_decode.py --model backend/trained_model_fito_outdoor.h5
+"""
+import os
+import io
+import sys
+import json
+import time
+import argparse
+import tempfile
+import resource
+import subprocess
+import numpy as np
+from PIL import Image
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+sys.path.insert(0, BACKEND_DIR)
+
+from image_decode import decode_image
+
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "assets", "tomato leaf")
+TARGET_SIZE = (224, 224)
+PHONE_SIZES = [(4000, 3000), (3024, 4032), (2048, 1536)]
+
+
+def legacy_decode(image_bytes, target_size=TARGET_SIZE):
+    """Decode path used before draft mode: full decode, then resize"""
+    image = Image.open(io.BytesIO(image_bytes))
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+    return image.resize(target_size)
+
+
+DECODERS = {
+    "legacy": legacy_decode,
+    "draft": decode_image
+}
+
+
+def synthetic_phone_jpeg(size, seed):
+    """Smooth random 'photo' at phone resolution (noise-only images compress unrealistically)"""
+    rng = np.random.default_rng(seed)
+    small = rng.integers(0, 255, (size[1] // 64, size[0] // 64, 3), dtype=np.uint8)
+    image = Image.fromarray(small).resize(size, Image.BICUBIC)
+    buffer = io.BytesIO()
+    image.save(buffer, format='JPEG', quality=90)
+    return buffer.getvalue()
+
+
+def load_dataset(include_assets=True):
+    """Sample images as {group: [bytes, ...]}"""
+    groups = {}
+    if include_assets and os.path.isdir(ASSETS_DIR):
+        images = []
+        for root, _, files in os.walk(ASSETS_DIR):
+            for name in sorted(files):
+                if name.lower().endswith(('.jpg', '.jpeg', '.png', '.webp')):
+                    with open(os.path.join(root, name), 'rb') as f:
+                        images.append(f.read())
+        groups["assets (tomato leaf)"] = images
+
+    phone = [synthetic_phone_jpeg(size, i) for i, size in enumerate(PHONE_SIZES)]
+    groups["synthetic phone JPEG"] = phone
+
+    # PNG fallback path (no draft mode)
+    png = []
+    for data in phone[:1]:
+        buffer = io.BytesIO()
+        Image.open(io.BytesIO(data)).save(buffer, format='PNG')
+        png.append(buffer.getvalue())
+    groups["synthetic phone PNG"] = png
+    return groups
+
+
+def write_group(images, group_dir):
+    """Write a group's encoded images to group_dir for a worker subprocess to read"""
+    os.makedirs(group_dir, exist_ok=True)
+    for i, image_bytes in enumerate(images):
+        with open(os.path.join(group_dir, f"{i:05d}.img"), 'wb') as f:
+            f.write(image_bytes)
+
+
+def read_group(group_dir):
+    """Encoded images previously written by write_group"""
+    images = []
+    for name in sorted(os.listdir(group_dir)):
+        with open(os.path.join(group_dir, name), 'rb') as f:
+            images.append(f.read())
+    return images
+
+
+def peak_rss_kb():
+    """Peak RSS of this process in KiB
+
+    VmHWM belongs to the current address space and restarts at exec, whereas
+    ru_maxrss carries over the parent's peak from the fork that spawned us.
+    """
+    try:
+        with open("/proc/self/status", 'r') as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    # ru_maxrss is in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def measure(decoder_name, group_dir, repeats):
+    """Decode every image in a group `repeats` times; report time and peak RSS"""
+    # Only the encoded bytes are loaded before the baseline: building the
+    # dataset here would push the high-water mark past anything the decoders
+    # reach and every delta would read 0
+    images = read_group(group_dir)
+    decoder = DECODERS[decoder_name]
+
+    rss_before = peak_rss_kb()
+    timings = []
+    for _ in range(repeats):
+        for image_bytes in images:
+            started = time.perf_counter()
+            decoder(image_bytes)
+            timings.append(time.perf_counter() - started)
+    rss_after = peak_rss_kb()
+
+    timings_ms = np.array(timings) * 1000.0
+    return {
+        "mean_ms": float(timings_ms.mean()),
+        "p95_ms": float(np.percentile(timings_ms, 95)),
+        "peak_rss_delta_mb": (rss_after - rss_before) / 1024.0
+    }
+
+
+def measure_in_subprocess(decoder_name, group_dir, repeats):
+    """Run `measure` in a fresh interpreter so peak RSS is not shared between runs"""
+    output = subprocess.check_output([
+        sys.executable, os.path.abspath(__file__),
+        "--worker", decoder_name, "--group-dir", group_dir, "--repeats", str(repeats)
+    ])
+    return json.loads(output.decode().strip().splitlines()[-1])
+
+
+def compare_predictions(model_path, groups, tolerance):
+    """Check predictions from both decode paths agree within tolerance"""
+    from model_handler import TomatoDiseasePredictor
+
+    predictor = TomatoDiseasePredictor(model_path)
+    max_diff = 0.0
+    agree = 0
+    total = 0
+    for images in groups.values():
+        for image_bytes in images:
+            legacy = np.array(legacy_decode(image_bytes), dtype=np.float32)[None] / 255.0
+            draft = np.array(decode_image(image_bytes), dtype=np.float32)[None] / 255.0
+            probs = predictor.predict_proba(np.concatenate([legacy, draft]))
+            max_diff = max(max_diff, float(np.abs(probs[0] - probs[1]).max()))
+            agree += int(np.argmax(probs[0]) == np.argmax(probs[1]))
+            total += 1
+
+    print(f"\nPrediction check over {total} images:")
+    print(f"   Top-1 agreement: {agree}/{total}")
+    print(f"   Max probability difference: {max_diff:.4f} (tolerance {tolerance})")
+    print("   ✅ Within tolerance" if max_diff <= tolerance else "   ❌ Exceeds tolerance")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JPEG draft-mode decode benchmark")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--model", default=None, help="Model file for the prediction check")
+    parser.add_argument("--tolerance", type=float, default=0.05)
+    parser.add_argument("--worker", choices=list(DECODERS), help=argparse.SUPPRESS)
+    parser.add_argument("--group-dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(measure(args.worker, args.group_dir, args.repeats)))
+        return
+
+    print("=" * 80)
+    print("IMAGE DECODE BENCHMARK (legacy full decode vs JPEG draft mode)")
+    print("=" * 80)
+
+    groups = load_dataset()
+    print(f"{'Group':<24}{'Path':<8}{'mean ms':>10}{'p95 ms':>10}{'peak RSS +MB':>15}")
+    with tempfile.TemporaryDirectory(prefix="fito-decode-") as scratch_dir:
+        for index, (group, images) in enumerate(groups.items()):
+            group_dir = os.path.join(scratch_dir, str(index))
+            write_group(images, group_dir)
+            results = {name: measure_in_subprocess(name, group_dir, args.repeats) for name in DECODERS}
+            for name, result in results.items():
+                print(f"{group:<24}{name:<8}{result['mean_ms']:>10.2f}{result['p95_ms']:>10.2f}{result['peak_rss_delta_mb']:>15.1f}")
+            speedup = results["legacy"]["mean_ms"] / max(results["draft"]["mean_ms"], 1e-9)
+            print(f"{'':<24}{'':<8}speed-up {speedup:.2f}x over {len(images)} image(s)")
+
+    if args.model:
+        compare_predictions(args.model, groups, args.tolerance)
+    else:
+        print("\n(Pass --model to verify predictions are unchanged within tolerance)")
+
+
+if __name__ == "__main__":
+    main()
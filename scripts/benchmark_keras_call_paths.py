@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Latency benchmark for the Keras call paths
+
+Compares p50/p99 latency of:
+    predict   - model.predict(batch, verbose=0)
+    call      - model(batch, training=False)
+    compiled  - fixed-signature tf.function traced once at load
+    xla       - the same tf.function with jit_compile=True
+
+Usage:
+    python scripts/benchmark_keras_call_paths.py --iterations 200 --batch-sizes 1 8
+"""
+import os
+import sys
+import time
+import argparse
+import numpy as np
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+sys.path.insert(0, BACKEND_DIR)
+
+from inference_backends import KerasBackend
+
+DEFAULT_MODEL = os.path.join(BACKEND_DIR, "trained_model_fito_outdoor.h5")
+
+
+def benchmark(backend, batch, iterations, warmup=10):
+    """p50/p99 latency of backend.predict for one batch"""
+    for _ in range(warmup):
+        backend.predict(batch)
+
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        backend.predict(batch)
+        timings.append(time.perf_counter() - started)
+
+    timings_ms = np.array(timings) * 1000.0
+    return float(np.percentile(timings_ms, 50)), float(np.percentile(timings_ms, 99))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Keras call path latency benchmark")
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8])
+    parser.add_argument("--skip-xla", action="store_true")
+    args = parser.parse_args()
+
+    paths = {
+        "predict": {"call_mode": "predict"},
+        "call": {"call_mode": "call"},
+        "compiled": {"call_mode": "compiled"}
+    }
+    if not args.skip_xla:
+        paths["xla"] = {"call_mode": "compiled", "jit_compile": True}
+
+    print("=" * 60)
+    print("KERAS CALL PATH LATENCY")
+    print("=" * 60)
+
+    backends = {}
+    for name, options in paths.items():
+        started = time.perf_counter()
+        backends[name] = KerasBackend(args.model, **options)
+        print(f"Loaded {name:<9} in {time.perf_counter() - started:.2f}s")
+
+    input_shape = backends["predict"].input_shape
+    rng = np.random.default_rng(0)
+    for batch_size in args.batch_sizes:
+        batch = rng.random((batch_size,) + input_shape, dtype=np.float32)
+        reference = backends["predict"].predict(batch)
+
+        print(f"\nBatch size {batch_size}")
+        print(f"{'Path':<10}{'p50 ms':>10}{'p99 ms':>10}{'max diff':>12}")
+        for name, backend in backends.items():
+            p50, p99 = benchmark(backend, batch, args.iterations)
+            max_diff = float(np.abs(backend.predict(batch) - reference).max())
+            print(f"{name:<10}{p50:>10.2f}{p99:>10.2f}{max_diff:>12.2e}")
+
+
+if __name__ == "__main__":
+    main()
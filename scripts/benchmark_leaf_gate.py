@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Benchmark: leaf gate + main model cascade vs main model only
+
+Runs every image of a mixed leaf / non-leaf set through the leaf gate and the
+main model (decode + preprocess + predict at batch size 1) and reports:
+  - average latency per request with and without the cascade
+  - recall lost: leaves the gate rejects, overall and among leaves the main
+    model would have identified
+  - how many non-leaf images the gate rejects, and how many of those the main
+    model would also have called Unidentified
+
+Usage:
+    python scripts/benchmark_leaf_gate.py --non-leaf-dir "<dataset>/validation/Unidentified"
+    python scripts/benchmark_leaf_gate.py --leaf-dir "<dataset>/validation" --non-leaf-dir "<dataset>/validation/Unidentified" --model backend/trained_model_fito_outdoor.h5
+"""
+import os
+import sys
+import time
+import argparse
+import numpy as np
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+sys.path.insert(0, BACKEND_DIR)
+
+import config
+from leaf_gate import LeafGate
+from model_handler import TomatoDiseasePredictor
+
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "assets", "tomato leaf")
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp', '.bmp')
+
+
+def load_images(directory, exclude_dirs=("Unidentified",), limit=None):
+    """Raw bytes of the images under `directory`, skipping excluded class folders"""
+    images = []
+    for root, dirs, files in os.walk(directory):
+        dirs[:] = [d for d in sorted(dirs) if d not in exclude_dirs]
+        for name in sorted(files):
+            if name.lower().endswith(IMAGE_EXTENSIONS):
+                with open(os.path.join(root, name), 'rb') as f:
+                    images.append(f.read())
+    return images[:limit] if limit else images
+
+
+def time_call(fn, *args):
+    """(result, milliseconds)"""
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, (time.perf_counter() - started) * 1000.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the leaf gate cascade")
+    parser.add_argument("--leaf-dir", default=ASSETS_DIR)
+    parser.add_argument("--non-leaf-dir", required=True)
+    parser.add_argument("--gate", default=config.LEAF_GATE_PATH)
+    parser.add_argument("--threshold", type=float, default=None, help="Override the trained gate threshold")
+    parser.add_argument("--model", default=config.MODEL_PATH)
+    parser.add_argument("--limit", type=int, default=None, help="Max images per group")
+    args = parser.parse_args()
+
+    leaves = load_images(args.leaf_dir, limit=args.limit)
+    non_leaves = load_images(args.non_leaf_dir, exclude_dirs=(), limit=args.limit)
+    print(f"📂 {len(leaves)} leaf images, {len(non_leaves)} non-leaf images")
+    if not leaves or not non_leaves:
+        print("❌ Need both leaf and non-leaf images")
+        sys.exit(1)
+
+    gate = LeafGate(args.gate, threshold=args.threshold)
+    predictor = TomatoDiseasePredictor(args.model)
+
+    def run_model(image_bytes):
+        return predictor.build_result(predictor.predict_proba(predictor.preprocess_image(image_bytes))[0])
+
+    # Warm up both stages so tracing and allocator growth are not timed
+    for image_bytes in leaves[:3]:
+        gate.check(image_bytes)
+        run_model(image_bytes)
+
+    rows = {"leaf": [], "non-leaf": []}
+    for group, images in (("leaf", leaves), ("non-leaf", non_leaves)):
+        for image_bytes in images:
+            (passed, _), gate_ms = time_call(gate.check, image_bytes)
+            result, model_ms = time_call(run_model, image_bytes)
+            rows[group].append((passed, gate_ms, model_ms, result['is_unidentified']))
+
+    all_rows = rows["leaf"] + rows["non-leaf"]
+    gate_ms = np.array([r[1] for r in all_rows])
+    model_ms = np.array([r[2] for r in all_rows])
+    passed = np.array([r[0] for r in all_rows])
+    cascade_ms = gate_ms + np.where(passed, model_ms, 0.0)
+
+    leaf_passed = np.array([r[0] for r in rows["leaf"]])
+    leaf_identified = ~np.array([r[3] for r in rows["leaf"]])
+    non_leaf_rejected = ~np.array([r[0] for r in rows["non-leaf"]])
+    non_leaf_unidentified = np.array([r[3] for r in rows["non-leaf"]])
+
+    print("\n" + "=" * 60)
+    print(f"Gate threshold:            {gate.threshold:.4f}")
+    print(f"Gate latency:              avg {gate_ms.mean():.2f} ms, p95 {np.percentile(gate_ms, 95):.2f} ms")
+    print(f"Main model latency:        avg {model_ms.mean():.2f} ms")
+    print("-" * 60)
+    print(f"Avg latency, model only:   {model_ms.mean():.2f} ms")
+    print(f"Avg latency, cascade:      {cascade_ms.mean():.2f} ms")
+    saved = model_ms.mean() - cascade_ms.mean()
+    print(f"Avg latency saved:         {saved:.2f} ms ({saved / model_ms.mean():.1%})")
+    print("-" * 60)
+    print(f"Leaf recall lost:          {(~leaf_passed).mean():.2%} of leaves rejected by the gate")
+    if leaf_identified.any():
+        print(f"  ...of identified leaves: {(~leaf_passed[leaf_identified]).mean():.2%}")
+    print(f"Non-leaf rejected by gate: {non_leaf_rejected.mean():.2%}")
+    if non_leaf_rejected.any():
+        agree = non_leaf_unidentified[non_leaf_rejected].mean()
+        print(f"  ...main model agreed (Unidentified): {agree:.2%}")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
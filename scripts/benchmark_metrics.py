@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Benchmark: overhead of the /metrics instrumentation
+
+1. Micro: cost of one histogram observation, one stage timer and one
+   counter increment (recording on vs off), single-threaded and with
+   concurrent threads contending for the same series.
+2. Per request: the /predict hot path records about 10 stage timings and
+   4 counter increments; that cost is compared with the measured
+   preprocessing time of the sample leaves (and with full inference when
+   --model is given), with recording switched on and off.
+
+Usage:
+    python scripts/benchmark_metrics.py
+    python scripts/benchmark_metrics.py --model backend/trained_model_fito_outdoor.h5
+"""
+import os
+import sys
+import time
+import argparse
+import threading
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+sys.path.insert(0, BACKEND_DIR)
+
+import metrics
+
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "assets", "tomato leaf")
+
+# Instrumentation calls made by one cache-miss /predict request
+STAGES_PER_REQUEST = 10
+COUNTERS_PER_REQUEST = 4
+
+
+def ns_per_call(fn, iterations):
+    """Average nanoseconds per call of fn()"""
+    started = time.perf_counter_ns()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter_ns() - started) / iterations
+
+
+def timed_block():
+    with metrics.stage("benchmark"):
+        pass
+
+
+def micro_benchmark(iterations, threads):
+    """Per-call cost of each instrumentation primitive"""
+    calls = {
+        "histogram.observe": lambda: metrics.STAGE_SECONDS.observe(0.003, "predict", "benchmark"),
+        "stage() timer": timed_block,
+        "counter.inc": lambda: metrics.OUTCOMES.inc("benchmark"),
+        "empty call (baseline)": lambda: None
+    }
+    results = {}
+    for enabled in (True, False):
+        metrics.set_enabled(enabled)
+        for name, fn in calls.items():
+            results[(name, enabled)] = ns_per_call(fn, iterations)
+    metrics.set_enabled(True)
+
+    print(f"\n⏱️  Per-call cost ({iterations:,} calls)")
+    print(f"   {'call':<24} {'recording on':>14} {'recording off':>14}")
+    for name in calls:
+        print(f"   {name:<24} {results[(name, True)]:>11.0f} ns {results[(name, False)]:>11.0f} ns")
+
+    # Contention: every thread records into the same series
+    def worker():
+        for _ in range(iterations // threads):
+            timed_block()
+
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    started = time.perf_counter_ns()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    contended = (time.perf_counter_ns() - started) / iterations
+    print(f"   stage() timer, {threads} threads: {contended:.0f} ns per call (wall clock, GIL-bound)")
+
+    per_request_ns = STAGES_PER_REQUEST * results[("stage() timer", True)] + COUNTERS_PER_REQUEST * results[("counter.inc", True)]
+    print(f"\n📦 Estimated instrumentation per /predict request: {per_request_ns / 1000:.1f} µs")
+    return per_request_ns
+
+
+def load_assets(limit):
+    """Sample leaf images as bytes"""
+    images = []
+    for root, _, files in os.walk(ASSETS_DIR):
+        for name in sorted(files):
+            if name.lower().endswith(('.jpg', '.jpeg', '.png')):
+                with open(os.path.join(root, name), 'rb') as f:
+                    images.append(f.read())
+    return images[:limit]
+
+
+def path_benchmark(model_path, rounds, per_request_ns):
+    """Preprocess (and optionally predict) the sample leaves with recording on and off"""
+    from preprocessing import ImagePreprocessor
+
+    images = load_assets(limit=50)
+    if not images:
+        print(f"\n⚠️  No sample images in {ASSETS_DIR}; skipping the request-path benchmark")
+        return
+
+    if model_path:
+        from model_handler import TomatoDiseasePredictor
+        predictor = TomatoDiseasePredictor(model_path)
+        run = predictor.predict
+        label = "decode + preprocess + inference"
+    else:
+        preprocessor = ImagePreprocessor()
+        run = preprocessor.preprocess
+        label = "decode + preprocess"
+
+    for image_bytes in images[:3]:
+        run(image_bytes)
+
+    timings = {}
+    for enabled in (False, True, False, True):
+        metrics.set_enabled(enabled)
+        started = time.perf_counter()
+        for _ in range(rounds):
+            for image_bytes in images:
+                run(image_bytes)
+        elapsed = (time.perf_counter() - started) / (rounds * len(images))
+        timings[enabled] = min(timings.get(enabled, elapsed), elapsed)
+    metrics.set_enabled(True)
+
+    off_ms, on_ms = timings[False] * 1000, timings[True] * 1000
+    print(f"\n🍃 {label}, {len(images)} images x {rounds} rounds (best of 2)")
+    print(f"   recording off: {off_ms:.3f} ms/image")
+    print(f"   recording on:  {on_ms:.3f} ms/image ({(on_ms - off_ms) / off_ms:+.2%}, within run-to-run noise if near 0)")
+    print(f"   estimated instrumentation share: {per_request_ns / 1e6 / off_ms:.3%} of {label}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark metrics instrumentation overhead")
+    parser.add_argument("--iterations", type=int, default=200_000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--model", default=None, help="Also time full predictions with this model")
+    parser.add_argument("--micro-only", action="store_true", help="Skip the request-path benchmark (no numpy/PIL needed)")
+    args = parser.parse_args()
+
+    per_request_ns = micro_benchmark(args.iterations, args.threads)
+    if not args.micro_only:
+        path_benchmark(args.model, args.rounds, per_request_ns)
+
+
+if __name__ == "__main__":
+    main()
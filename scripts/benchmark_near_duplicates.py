@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Benchmark: perceptual-hash near-duplicate detection
+
+1. Lookup latency: fills the multi-index Hamming index with --entries random
+   hashes (default 1M), then times lookups for planted near-duplicates and
+   for random misses, against a vectorized numpy brute-force scan.
+2. Dataset report: hashes every image in --data-dir (decoded at the model
+   input size, like the API) and reports
+     - the dedupe rate: images with an earlier image within the threshold
+     - robustness: how often re-compressed, resized and slightly cropped
+       copies of each image stay within the threshold of the original
+     - cross-class false matches: how often an image has an image of a
+       *different* class folder within the threshold, i.e. how often
+       near-duplicate reuse would serve the wrong disease
+   for both dHash and pHash.
+
+Near-duplicate reuse is off by default (FITO_NEAR_DUP_ENABLED=0); run the
+dataset report on the training or validation split and only enable it at a
+distance whose cross-class false-match rate is acceptable.
+
+Usage:
+    python scripts/benchmark_near_duplicates.py
+    python scripts/benchmark_near_duplicates.py --data-dir "<dataset>/training" --max-distance 8
+"""
+import io
+import os
+import sys
+import time
+import random
+import argparse
+import numpy as np
+from PIL import Image
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+sys.path.insert(0, BACKEND_DIR)
+
+import config
+from image_decode import decode_image
+from near_duplicates import HammingIndex, HASH_METHODS, perceptual_hash, hamming
+
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "assets", "tomato leaf")
+INPUT_SIZE = (224, 224)
+
+# Popcount of every byte value, for the brute-force baseline
+POPCOUNT = np.array([bin(value).count('1') for value in range(256)], dtype=np.uint8)
+
+
+def load_images(data_dir, limit):
+    """Image files under data_dir as (raw bytes, class folder)"""
+    images = []
+    for root, _, files in os.walk(data_dir):
+        label = os.path.relpath(root, data_dir)
+        for name in sorted(files):
+            if name.lower().endswith(('.jpg', '.jpeg', '.png')):
+                with open(os.path.join(root, name), 'rb') as f:
+                    images.append((f.read(), label))
+    return images[:limit] if limit else images
+
+
+def flip_bits(hash_value, count, rng):
+    """Hash with `count` random bits flipped"""
+    for bit in rng.sample(range(64), count):
+        hash_value ^= 1 << bit
+    return hash_value
+
+
+def percentiles(latencies_us):
+    """avg / p50 / p95 summary"""
+    latencies_us = np.array(latencies_us)
+    return f"avg {latencies_us.mean():8.1f} us  p50 {np.percentile(latencies_us, 50):8.1f} us  p95 {np.percentile(latencies_us, 95):8.1f} us"
+
+
+def benchmark_lookup(entries, queries, max_distance):
+    """Index vs brute-force lookup latency at `entries` stored hashes"""
+    rng = random.Random(0)
+    hashes = [rng.getrandbits(64) for _ in range(entries)]
+
+    print(f"⏱️  Building index with {entries:,} hashes...")
+    index = HammingIndex(entries)
+    started = time.perf_counter()
+    for hash_value in hashes:
+        index.add(hash_value)
+    build_seconds = time.perf_counter() - started
+    packed = np.array(hashes, dtype=np.uint64)
+
+    planted = [flip_bits(hashes[rng.randrange(entries)], rng.randint(0, max_distance), rng) for _ in range(queries)]
+    misses = [rng.getrandbits(64) for _ in range(queries)]
+
+    results = {}
+    for name, batch in (("planted", planted), ("random", misses)):
+        index_us, brute_us, found, agree = [], [], 0, 0
+        for query in batch:
+            started = time.perf_counter()
+            match = index.nearest(query, max_distance)
+            index_us.append((time.perf_counter() - started) * 1e6)
+
+            started = time.perf_counter()
+            distances = POPCOUNT[(packed ^ np.uint64(query)).view(np.uint8)].reshape(-1, 8).sum(axis=1)
+            best = int(distances.min())
+            brute_us.append((time.perf_counter() - started) * 1e6)
+
+            found += match is not None
+            agree += (match[1] if match else None) == (best if best <= max_distance else None)
+        results[name] = (index_us, brute_us, found, agree)
+
+    print("\n" + "=" * 84)
+    print(f"Lookup at {entries:,} hashes, max distance {max_distance}  |  index built in {build_seconds:.1f}s")
+    print("-" * 84)
+    for name, (index_us, brute_us, found, agree) in results.items():
+        print(f"{name:<8} index   {percentiles(index_us)}  ({found}/{queries} matched)")
+        print(f"{'':<8} brute   {percentiles(brute_us)}  (index agrees on {agree}/{queries})")
+    print("=" * 84)
+
+
+def variants(image_bytes):
+    """Near-duplicate copies of an upload: re-compressed, downscaled, slightly cropped"""
+    image = Image.open(io.BytesIO(image_bytes)).convert('RGB')
+    width, height = image.size
+    copies = {}
+
+    buffer = io.BytesIO()
+    image.save(buffer, format='JPEG', quality=60)
+    copies["jpeg q60"] = buffer.getvalue()
+
+    buffer = io.BytesIO()
+    image.resize((max(1, width // 2), max(1, height // 2))).save(buffer, format='JPEG', quality=90)
+    copies["resize 50%"] = buffer.getvalue()
+
+    dx, dy = width // 20, height // 20
+    buffer = io.BytesIO()
+    image.crop((dx, dy, width - dx, height - dy)).save(buffer, format='JPEG', quality=90)
+    copies["crop 5%"] = buffer.getvalue()
+    return copies
+
+
+def nearest_other_class(hashes, labels):
+    """Per image, the Hamming distance to the closest image of a different class (65 if none)"""
+    packed = np.array(hashes, dtype=np.uint64)
+    labels = np.array(labels)
+    nearest = np.full(len(hashes), 65, dtype=np.int64)
+    for i, hash_value in enumerate(packed):
+        other = labels != labels[i]
+        if other.any():
+            distances = POPCOUNT[(packed[other] ^ hash_value).view(np.uint8)].reshape(-1, 8).sum(axis=1)
+            nearest[i] = int(distances.min())
+    return nearest
+
+
+def dataset_report(images, max_distance):
+    """Dedupe rate, robustness and cross-class false matches per hash method"""
+    labels = [label for _, label in images]
+    images = [image for image, _ in images]
+    classes = len(set(labels))
+    print("\n" + "=" * 84)
+    print(f"Dataset: {len(images)} images in {classes} class folder(s), max distance {max_distance}")
+    for method in HASH_METHODS:
+        started = time.perf_counter()
+        hashes = [perceptual_hash(np.asarray(decode_image(image, INPUT_SIZE)), method) for image in images]
+        hash_ms = (time.perf_counter() - started) * 1000.0 / len(images)
+
+        print("-" * 84)
+        print(f"{method}  (decode + hash {hash_ms:.2f} ms/image)")
+        for threshold in sorted({0, max_distance // 2, max_distance, max_distance + 4}):
+            index = HammingIndex(len(hashes))
+            duplicates = 0
+            for hash_value in hashes:
+                duplicates += index.nearest(hash_value, threshold) is not None
+                index.add(hash_value)
+            print(f"   dedupe rate at <= {threshold:>2} bits: {duplicates / len(hashes):6.2%} ({duplicates} images)")
+
+        if classes > 1:
+            nearest = nearest_other_class(hashes, labels)
+            for threshold in sorted({0, max_distance // 2, max_distance, max_distance + 4}):
+                false_matches = int(np.sum(nearest <= threshold))
+                print(f"   cross-class false matches at <= {threshold:>2} bits: {false_matches / len(hashes):6.2%} ({false_matches} images)")
+        else:
+            print("   cross-class false matches: needs class sub-folders in --data-dir")
+
+        distances = {}
+        for image, original in zip(images, hashes):
+            for name, copy in variants(image).items():
+                distances.setdefault(name, []).append(hamming(original, perceptual_hash(np.asarray(decode_image(copy, INPUT_SIZE)), method)))
+        for name, values in distances.items():
+            values = np.array(values)
+            print(f"   {name:<11} caught {np.mean(values <= max_distance):6.1%}  (median distance {np.median(values):.0f}, max {values.max()})")
+    print("=" * 84)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark perceptual-hash near-duplicate detection")
+    parser.add_argument("--entries", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--max-distance", type=int, default=config.NEAR_DUP_MAX_DISTANCE)
+    parser.add_argument("--data-dir", default=ASSETS_DIR)
+    parser.add_argument("--limit", type=int, default=None, help="Max images for the dataset report")
+    parser.add_argument("--skip-lookup", action="store_true")
+    args = parser.parse_args()
+
+    if not args.skip_lookup:
+        benchmark_lookup(args.entries, args.queries, args.max_distance)
+
+    images = load_images(args.data_dir, args.limit)
+    if not images:
+        print(f"⚠️  No images in {args.data_dir}, skipping the dataset report")
+        return
+    dataset_report(images, args.max_distance)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Benchmark: legacy float64 preprocessing vs the float32 buffer pipeline
+
+Uses tracemalloc to count the memory blocks still allocated after each call
+(before/after snapshots) and the peak traced memory per preprocessed image,
+which captures freed temporaries, plus wall time, for:
+    legacy  - np.array(image) / 255.0 then np.expand_dims (float64, cast by Keras)
+    fresh   - ImagePreprocessor.preprocess (one float32 array per call)
+    buffer  - ImagePreprocessor.preprocess(reuse_buffer=True) (preallocated per worker)
+
+Usage:
+    python scripts/benchmark_preprocessing.py --repeats 50
+"""
+import os
+import sys
+import time
+import argparse
+import tracemalloc
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+
+from image_decode import decode_image
+from preprocessing import ImagePreprocessor
+
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "assets", "tomato leaf")
+INPUT_SHAPE = (224, 224, 3)
+
+
+def legacy_preprocess(image_bytes):
+    """Preprocessing used before this change"""
+    image = decode_image(image_bytes, (224, 224))
+    image_array = np.array(image) / 255.0
+    return np.expand_dims(image_array, axis=0).astype(np.float32)
+
+
+def load_images():
+    """Sample leaf images from assets/"""
+    images = []
+    for root, _, files in os.walk(ASSETS_DIR):
+        for name in sorted(files):
+            if name.lower().endswith(('.jpg', '.jpeg', '.png')):
+                with open(os.path.join(root, name), 'rb') as f:
+                    images.append(f.read())
+    return images
+
+
+def measure(fn, images, repeats):
+    """Retained allocations, peak traced memory and time per image"""
+    fn(images[0])  # first call allocates the per-worker buffer
+
+    allocations = 0
+    peak = 0
+    for image_bytes in images:
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        baseline, _ = tracemalloc.get_traced_memory()
+        result = fn(image_bytes)
+        _, call_peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+
+        # New blocks still alive after the call; freed temporaries only show in the peak
+        allocations += sum(max(stat.count_diff, 0) for stat in after.compare_to(before, 'lineno'))
+        peak = max(peak, call_peak - baseline)
+        del result
+
+    started = time.perf_counter()
+    for _ in range(repeats):
+        for image_bytes in images:
+            fn(image_bytes)
+    elapsed = time.perf_counter() - started
+
+    return {
+        "allocations_per_image": allocations / len(images),
+        "peak_kb": peak / 1024.0,
+        "mean_ms": elapsed * 1000.0 / (repeats * len(images))
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Preprocessing allocation benchmark")
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    images = load_images()
+    if not images:
+        print(f"❌ No images found in {ASSETS_DIR}")
+        return
+
+    preprocessor = ImagePreprocessor(INPUT_SHAPE, np.float32)
+
+    # Sanity check: same values as the legacy path
+    legacy = legacy_preprocess(images[0])
+    current = preprocessor.preprocess(images[0])
+    print(f"Max abs difference vs legacy: {np.abs(legacy - current).max():.2e} (dtype {current.dtype})")
+
+    paths = {
+        "legacy": legacy_preprocess,
+        "fresh": lambda b: preprocessor.preprocess(b),
+        "buffer": lambda b: preprocessor.preprocess(b, reuse_buffer=True)
+    }
+
+    print("=" * 70)
+    print(f"{'Path':<10}{'new blocks':>15}{'peak KB':>15}{'mean ms':>12}")
+    for name, fn in paths.items():
+        result = measure(fn, images, args.repeats)
+        print(f"{name:<10}{result['allocations_per_image']:>15.1f}{result['peak_kb']:>15.1f}{result['mean_ms']:>12.2f}")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
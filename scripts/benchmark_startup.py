@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Benchmark: API startup time
+
+For each run, starts a fresh `uvicorn app:app` process and measures:
+  - import time of backend/app.py (separate process, no server)
+  - time to first byte of GET /health (server accepting requests)
+  - time until POST /predict with a sample leaf stops returning 503
+    (model loaded and serving)
+  - time until GET /ready returns 200 (warm-up finished)
+
+Every server gets its own throwaway outbox, model registry and shadow log,
+no disk cache and blank Supabase credentials, so the /predict probes are
+never uploaded and no run leaves state behind for the next cold start.
+The served model is FITO_MODEL_PATH (or the config default).
+
+Usage:
+    python scripts/benchmark_startup.py
+    python scripts/benchmark_startup.py --runs 5 --workers 2
+"""
+import os
+import sys
+import time
+import uuid
+import argparse
+import statistics
+import tempfile
+import subprocess
+import urllib.error
+import urllib.request
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "assets", "tomato leaf")
+
+
+def sample_image():
+    """First sample leaf as (filename, bytes)"""
+    for root, _, files in os.walk(ASSETS_DIR):
+        for name in sorted(files):
+            if name.lower().endswith(('.jpg', '.jpeg', '.png')):
+                with open(os.path.join(root, name), 'rb') as f:
+                    return name, f.read()
+    raise FileNotFoundError(f"No sample images in {ASSETS_DIR}")
+
+
+def multipart(filename, content):
+    """(body, content type) for a single-file multipart upload"""
+    boundary = uuid.uuid4().hex
+    body = (
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+        "Content-Type: image/jpeg\r\n\r\n"
+    ).encode() + content + f"\r\n--{boundary}--\r\n".encode()
+    return body, f"multipart/form-data; boundary={boundary}"
+
+
+def status_of(request):
+    """HTTP status of a request, or None if the server is not accepting connections yet"""
+    try:
+        with urllib.request.urlopen(request, timeout=30) as response:
+            response.read()
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+    except (urllib.error.URLError, ConnectionError, OSError):
+        return None
+
+
+def wait_for(check, started, timeout, interval=0.02):
+    """Seconds from `started` until check() is true, or None on timeout"""
+    while time.perf_counter() - started < timeout:
+        if check():
+            return time.perf_counter() - started
+        time.sleep(interval)
+    return None
+
+
+def measure_import():
+    """Seconds to import app.py in a fresh interpreter"""
+    code = "import time; t = time.perf_counter(); import app; print(time.perf_counter() - t)"
+    output = subprocess.run(
+        [sys.executable, "-c", code], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    ).stdout.strip().splitlines()
+    return float(output[-1])
+
+
+def isolated_env(scratch_dir):
+    """Server environment that keeps all persistent state in scratch_dir and never reaches Supabase"""
+    return dict(
+        os.environ,
+        FITO_OUTBOX_PATH=os.path.join(scratch_dir, "outbox.db"),
+        FITO_MODEL_REGISTRY_DIR=os.path.join(scratch_dir, "models"),
+        FITO_SHADOW_LOG_PATH=os.path.join(scratch_dir, "shadow.jsonl"),
+        FITO_CACHE_DIR="",
+        # Set (not just unset) so load_dotenv cannot fill them back in from .env
+        SUPABASE_URL="",
+        SUPABASE_SERVICE_KEY=""
+    )
+
+
+def measure_startup(port, workers, timeout, image, scratch_dir):
+    """(ttfb /health, ready /predict, ready /ready) in seconds for one server start"""
+    base_url = f"http://127.0.0.1:{port}"
+    body, content_type = multipart(*image)
+    command = [sys.executable, "-m", "uvicorn", "app:app", "--port", str(port), "--workers", str(workers), "--log-level", "warning"]
+    env = isolated_env(scratch_dir)
+
+    started = time.perf_counter()
+    server = subprocess.Popen(command, cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        health = wait_for(lambda: status_of(f"{base_url}/health") == 200, started, timeout, interval=0.005)
+
+        def predict_ready():
+            request = urllib.request.Request(f"{base_url}/predict", data=body, headers={"Content-Type": content_type})
+            return status_of(request) not in (None, 503)
+
+        predict = wait_for(predict_ready, started, timeout)
+        ready = wait_for(lambda: status_of(f"{base_url}/ready") == 200, started, timeout)
+        return health, predict, ready
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+
+def seconds(value):
+    """Format a duration that may have timed out"""
+    return f"{value:.2f}s" if value is not None else "timed out"
+
+
+def summary(values):
+    """Median / min / max of the successful runs"""
+    values = [v for v in values if v is not None]
+    if not values:
+        return "timed out"
+    return f"median {statistics.median(values):.2f}s (min {min(values):.2f}s, max {max(values):.2f}s)"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark API startup")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--timeout", type=float, default=300.0)
+    args = parser.parse_args()
+
+    image = sample_image()
+    imports, healths, predicts, readies = [], [], [], []
+    for run in range(args.runs):
+        imports.append(measure_import())
+        with tempfile.TemporaryDirectory(prefix="fito-startup-") as scratch_dir:
+            health, predict, ready = measure_startup(args.port, args.workers, args.timeout, image, scratch_dir)
+        healths.append(health)
+        predicts.append(predict)
+        readies.append(ready)
+        print(f"   run {run + 1}: import {seconds(imports[-1])}, /health {seconds(health)}, /predict {seconds(predict)}, /ready {seconds(ready)}")
+
+    print("\n" + "=" * 60)
+    print(f"🚀 Startup ({args.runs} runs, {args.workers} worker(s))")
+    print(f"   import app.py:             {summary(imports)}")
+    print(f"   /health first byte:        {summary(healths)}")
+    print(f"   /predict ready (non-503):  {summary(predicts)}")
+    print(f"   /ready 200 (warmed up):    {summary(readies)}")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Benchmark: adaptive test-time augmentation (TTA)
+
+Runs every image of a labelled validation set (one folder per class) through
+the predictor and compares three modes:
+  - single pass (no TTA)
+  - adaptive TTA (views only when first-pass confidence is inside the band)
+  - TTA on every image
+Reports accuracy, how often TTA triggers, how many predictions it fixes and
+breaks, and the added latency per request.
+
+The validation set defaults to the `validation` split of the training
+dataset (--data-dir or FITO_DATASET_PATH).
+
+Usage:
+    python scripts/benchmark_tta.py --model backend/trained_model_fito_outdoor.h5
+    python scripts/benchmark_tta.py --data-dir "<dataset>/validation" --band 0.5 0.9 --views hflip vflip crops
+"""
+import os
+import sys
+import time
+import argparse
+import numpy as np
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+sys.path.insert(0, BACKEND_DIR)
+
+import config
+from model_handler import TomatoDiseasePredictor
+from tta import TestTimeAugmentation, VIEW_NAMES
+
+# Same dataset as train_model.py (class sub-folders under validation/)
+DATASET_PATH = os.getenv("FITO_DATASET_PATH", r"C:\Users\HYUDADDY\Desktop\DATASET\tomato leaf diseases dataset(augmented)")
+DEFAULT_DATASET = os.path.join(DATASET_PATH, "validation")
+
+# Dataset folder names that differ from the API class names
+FOLDER_ALIASES = {
+    "yellow curl virus": "Yellow Leaf Curl Virus",
+    "yellow leaf curl virus": "Yellow Leaf Curl Virus"
+}
+
+
+def normalize(name):
+    """Compare class names ignoring case, underscores and extra spaces"""
+    return " ".join(name.replace("_", " ").lower().split())
+
+
+def load_dataset(data_dir, class_names, limit=None):
+    """[(image_bytes, class index)] for every class folder that maps to a model class"""
+    lookup = {normalize(name): i for i, name in enumerate(class_names)}
+    lookup.update({alias: class_names.index(name) for alias, name in FOLDER_ALIASES.items() if name in class_names})
+
+    samples = []
+    for folder in sorted(os.listdir(data_dir)):
+        path = os.path.join(data_dir, folder)
+        if not os.path.isdir(path):
+            continue
+        label = lookup.get(normalize(folder))
+        if label is None:
+            print(f"⚠️  Skipping folder without a matching class: {folder}")
+            continue
+        files = sorted(f for f in os.listdir(path) if f.lower().endswith(('.jpg', '.jpeg', '.png')))
+        for name in files[:limit]:
+            with open(os.path.join(path, name), 'rb') as f:
+                samples.append((f.read(), label))
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark adaptive test-time augmentation")
+    parser.add_argument("--model", default=config.MODEL_PATH)
+    parser.add_argument("--data-dir", default=DEFAULT_DATASET, help="Validation set with one folder per class")
+    parser.add_argument("--band", type=float, nargs=2, default=list(config.TTA_BAND), metavar=("LOW", "HIGH"))
+    parser.add_argument("--views", nargs="+", default=config.TTA_VIEWS, choices=VIEW_NAMES)
+    parser.add_argument("--crop-fraction", type=float, default=config.TTA_CROP_FRACTION)
+    parser.add_argument("--limit", type=int, default=None, help="Max images per class")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.data_dir):
+        print(f"❌ Validation set not found: {args.data_dir}")
+        print("   Pass --data-dir or set FITO_DATASET_PATH to the dataset holding training/ and validation/")
+        sys.exit(1)
+
+    predictor = TomatoDiseasePredictor(args.model)
+    samples = load_dataset(args.data_dir, predictor.class_names, args.limit)
+    if not samples:
+        print(f"❌ No labelled images found in {args.data_dir}")
+        sys.exit(1)
+    print(f"📂 {len(samples)} labelled images")
+
+    tta = TestTimeAugmentation(args.views, band=args.band, crop_fraction=args.crop_fraction)
+
+    # Warm up single-image and view-sized batches
+    for image_bytes, _ in samples[:3]:
+        predictor.predict_proba(predictor.preprocess_image(image_bytes))
+        predictor.predict_proba(tta.build_views(image_bytes, predictor.preprocessor))
+
+    rows = []
+    for image_bytes, label in samples:
+        started = time.perf_counter()
+        first_pass = predictor.predict_proba(predictor.preprocess_image(image_bytes))[0]
+        single_ms = (time.perf_counter() - started) * 1000.0
+
+        started = time.perf_counter()
+        views = tta.build_views(image_bytes, predictor.preprocessor)
+        refined = tta.aggregate(first_pass, predictor.predict_proba(views))
+        tta_ms = (time.perf_counter() - started) * 1000.0
+
+        triggered = tta.should_run(first_pass)
+        rows.append((label, int(np.argmax(first_pass)), int(np.argmax(refined)), triggered, single_ms, tta_ms))
+
+    labels = np.array([r[0] for r in rows])
+    single = np.array([r[1] for r in rows])
+    always = np.array([r[2] for r in rows])
+    triggered = np.array([r[3] for r in rows])
+    adaptive = np.where(triggered, always, single)
+    single_ms = np.array([r[4] for r in rows])
+    tta_ms = np.array([r[5] for r in rows])
+    adaptive_ms = single_ms + np.where(triggered, tta_ms, 0.0)
+
+    def describe(predicted):
+        fixed = int(((single != labels) & (predicted == labels)).sum())
+        broken = int(((single == labels) & (predicted != labels)).sum())
+        return f"{(predicted == labels).mean():.2%}  (fixed {fixed}, broken {broken})"
+
+    print("\n" + "=" * 64)
+    print(f"Views: {', '.join(args.views)} ({len(views)} per image)  |  band [{args.band[0]}, {args.band[1]})")
+    print("-" * 64)
+    print(f"Accuracy, single pass:   {(single == labels).mean():.2%}")
+    print(f"Accuracy, adaptive TTA:  {describe(adaptive)}")
+    print(f"Accuracy, TTA always:    {describe(always)}")
+    print(f"TTA triggered on:        {triggered.mean():.1%} of images")
+    print("-" * 64)
+    print(f"Latency, single pass:    avg {single_ms.mean():.1f} ms, p95 {np.percentile(single_ms, 95):.1f} ms")
+    print(f"Latency, adaptive TTA:   avg {adaptive_ms.mean():.1f} ms, p95 {np.percentile(adaptive_ms, 95):.1f} ms "
+          f"(+{adaptive_ms.mean() - single_ms.mean():.1f} ms avg)")
+    print(f"Latency, TTA always:     avg {(single_ms + tta_ms).mean():.1f} ms (+{tta_ms.mean():.1f} ms avg)")
+    print("=" * 64)
+
+
+if __name__ == "__main__":
+    main()
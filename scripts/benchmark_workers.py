@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Benchmark: memory and throughput of multi-worker serving
+
+For each worker count, starts backend/serve.py, drives /predict with
+concurrent clients over the sample leaves, and reports:
+  - throughput (requests/s) and client-side p50/p95 latency
+  - total RSS of the server process tree, which counts shared pages once
+    per worker
+  - total PSS, which splits shared pages between the processes mapping
+    them; this is the real memory cost
+  - shared file-backed memory (e.g. the mmapped .tflite weights)
+
+For .tflite models, --xnnpack on off repeats every worker count with and
+without TFLite's XNNPACK delegate: XNNPACK repacks weights into private
+per-worker buffers, so only the PSS column shows how much is really shared.
+
+The prediction cache and near-duplicate reuse are disabled, so every request
+runs inference. The outbox writes to a throwaway journal and the Supabase
+credentials are blanked, so nothing is ever uploaded.
+
+Usage:
+    python scripts/benchmark_workers.py --model backend/trained_model_fito_outdoor.int8.tflite
+    python scripts/benchmark_workers.py --model backend/trained_model_fito_outdoor.float16.tflite --xnnpack on off
+    python scripts/benchmark_workers.py --model backend/trained_model_fito_outdoor.h5 --workers 1 2
+"""
+import os
+import sys
+import time
+import uuid
+import argparse
+import tempfile
+import threading
+import subprocess
+import urllib.error
+import urllib.request
+import numpy as np
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "assets", "tomato leaf")
+
+
+def load_images():
+    """Sample leaves as (filename, bytes)"""
+    images = []
+    for root, _, files in os.walk(ASSETS_DIR):
+        for name in sorted(files):
+            if name.lower().endswith(('.jpg', '.jpeg', '.png')):
+                with open(os.path.join(root, name), 'rb') as f:
+                    images.append((name, f.read()))
+    return images
+
+
+def multipart(filename, content):
+    """(body, content type) for a single-file multipart upload"""
+    boundary = uuid.uuid4().hex
+    body = (
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+        "Content-Type: image/jpeg\r\n\r\n"
+    ).encode() + content + f"\r\n--{boundary}--\r\n".encode()
+    return body, f"multipart/form-data; boundary={boundary}"
+
+
+def post(url, body, content_type):
+    """HTTP status of a POST (None on connection errors)"""
+    request = urllib.request.Request(url, data=body, headers={"Content-Type": content_type})
+    try:
+        with urllib.request.urlopen(request, timeout=60) as response:
+            response.read()
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+    except (urllib.error.URLError, ConnectionError, OSError):
+        return None
+
+
+def process_tree(root_pid):
+    """PIDs of a process and all its descendants"""
+    children = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", 'r') as f:
+                stat = f.read()
+        except OSError:
+            continue
+        ppid = int(stat.rsplit(")", 1)[1].split()[1])
+        children.setdefault(ppid, []).append(int(entry))
+
+    pids, stack = [], [root_pid]
+    while stack:
+        pid = stack.pop()
+        pids.append(pid)
+        stack.extend(children.get(pid, []))
+    return pids
+
+
+def memory_mb(root_pid):
+    """(total RSS, total PSS, total shared clean) in MB across the process tree"""
+    totals = {"Rss": 0, "Pss": 0, "Shared_Clean": 0}
+    for pid in process_tree(root_pid):
+        try:
+            with open(f"/proc/{pid}/smaps_rollup", 'r') as f:
+                for line in f:
+                    key, _, rest = line.partition(":")
+                    if key in totals:
+                        totals[key] += int(rest.split()[0])
+        except OSError:
+            continue
+    return totals["Rss"] / 1024, totals["Pss"] / 1024, totals["Shared_Clean"] / 1024
+
+
+def wait_ready(base_url, workers, timeout):
+    """Wait until /ready is 200 on enough consecutive calls to have likely hit every worker"""
+    deadline = time.time() + timeout
+    streak = 0
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(f"{base_url}/ready", timeout=5) as response:
+                streak = streak + 1 if response.status == 200 else 0
+        except (urllib.error.URLError, ConnectionError, OSError):
+            streak = 0
+        if streak >= 4 * workers:
+            return True
+        time.sleep(0.1)
+    return False
+
+
+def load_test(url, requests, concurrency, duration):
+    """(completed, errors, latencies in ms) from `concurrency` clients over `duration` seconds"""
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + duration
+
+    def client(offset):
+        i = offset
+        while time.perf_counter() < stop_at:
+            body, content_type = requests[i % len(requests)]
+            started = time.perf_counter()
+            status = post(url, body, content_type)
+            elapsed = (time.perf_counter() - started) * 1000.0
+            with lock:
+                if status in (200, 400):
+                    latencies.append(elapsed)
+                else:
+                    errors[0] += 1
+            i += concurrency
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return len(latencies), errors[0], np.array(latencies)
+
+
+def run(workers, xnnpack, args, requests, scratch_dir):
+    """Benchmark one worker count with XNNPACK on or off"""
+    base_url = f"http://127.0.0.1:{args.port}"
+    env = dict(
+        os.environ,
+        FITO_MODEL_PATH=os.path.abspath(args.model),
+        FITO_CACHE_MAX_ENTRIES="0",
+        FITO_CACHE_DIR="",
+        FITO_NEAR_DUP_ENABLED="0",
+        FITO_TFLITE_XNNPACK="1" if xnnpack == "on" else "0",
+        FITO_OUTBOX_PATH=os.path.join(scratch_dir, f"outbox-{workers}-{xnnpack}.db"),
+        FITO_MODEL_REGISTRY_DIR=os.path.join(scratch_dir, "models"),
+        # Set (not just unset) so load_dotenv cannot fill them back in from .env
+        SUPABASE_URL="",
+        SUPABASE_SERVICE_KEY=""
+    )
+    server = subprocess.Popen(
+        [sys.executable, "serve.py", "--workers", str(workers), "--port", str(args.port), "--host", "127.0.0.1"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        if not wait_ready(base_url, workers, args.timeout):
+            print(f"❌ {workers} worker(s): server did not become ready")
+            return None
+        load_test(f"{base_url}/predict", requests, args.concurrency, args.warmup)
+        completed, errors, latencies = load_test(f"{base_url}/predict", requests, args.concurrency, args.duration)
+        rss, pss, shared = memory_mb(server.pid)
+        return {
+            "workers": workers,
+            "xnnpack": xnnpack,
+            "throughput": completed / args.duration,
+            "p50": float(np.percentile(latencies, 50)) if len(latencies) else 0.0,
+            "p95": float(np.percentile(latencies, 95)) if len(latencies) else 0.0,
+            "errors": errors,
+            "rss": rss,
+            "pss": pss,
+            "shared": shared
+        }
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark multi-worker serving")
+    parser.add_argument("--model", required=True, help="Model to serve (.tflite shares weights between workers)")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--warmup", type=float, default=5.0)
+    parser.add_argument("--timeout", type=float, default=300.0)
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--xnnpack", nargs="+", choices=["on", "off"], default=["on"],
+                        help="TFLite XNNPACK delegate settings to compare (FITO_TFLITE_XNNPACK)")
+    args = parser.parse_args()
+
+    images = load_images()
+    if not images:
+        print(f"❌ No sample images in {ASSETS_DIR}")
+        sys.exit(1)
+    requests = [multipart(name, content) for name, content in images]
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="fito-workers-") as scratch_dir:
+        for xnnpack in args.xnnpack:
+            for workers in args.workers:
+                print(f"⏱️  {workers} worker(s), XNNPACK {xnnpack}...")
+                result = run(workers, xnnpack, args, requests, scratch_dir)
+                if result:
+                    results.append(result)
+
+    print("\n" + "=" * 93)
+    print(f"Model: {args.model}  |  {args.concurrency} concurrent clients, {args.duration:.0f}s per run")
+    print(f"{'workers':>7} {'xnnpack':>8} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'errors':>7} {'RSS MB':>9} {'PSS MB':>9} {'shared MB':>10}")
+    for r in results:
+        print(f"{r['workers']:>7} {r['xnnpack']:>8} {r['throughput']:>9.1f} {r['p50']:>9.1f} {r['p95']:>9.1f} {r['errors']:>7} "
+              f"{r['rss']:>9.0f} {r['pss']:>9.0f} {r['shared']:>10.0f}")
+    print("=" * 93)
+    print("PSS is the real footprint: pages shared between workers (mmapped weights, libraries) count once.")
+    print("If PSS grows with the worker count by about the model size, the weights are not shared (e.g. XNNPACK repacking).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Export the trained Keras model as a SavedModel and as ONNX
+
+The SavedModel gets an explicit `serving_default` tf.function signature with a
+fixed [None, H, W, C] float32 input, so the savedmodel backend can call it
+directly. ONNX export needs the optional `tf2onnx` package.
+
+Artifacts are written next to the Keras model:
+    <model>.savedmodel/   (FITO_INFERENCE_BACKEND=savedmodel)
+    <model>.onnx          (FITO_INFERENCE_BACKEND=onnx, needs onnxruntime)
+
+Usage:
+    python scripts/export_model_formats.py --model backend/trained_model_fito_outdoor.h5
+"""
+import os
+import sys
+import argparse
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+sys.path.insert(0, BACKEND_DIR)
+
+import tensorflow as tf
+from preprocessing import model_input_spec
+
+DEFAULT_MODEL = os.path.join(BACKEND_DIR, "trained_model_fito_outdoor.h5")
+
+
+def export_savedmodel(model, output_dir):
+    """Save the model with a fixed-signature serving function"""
+    input_shape, _ = model_input_spec(model)
+
+    @tf.function(input_signature=[tf.TensorSpec([None, *input_shape], tf.float32, name="image")])
+    def serve(image):
+        return {"probabilities": model(image, training=False)}
+
+    tf.saved_model.save(model, output_dir, signatures={"serving_default": serve})
+    print(f"✅ SavedModel written to {output_dir}")
+
+
+def export_onnx(model, output_path):
+    """Convert the model to ONNX with tf2onnx"""
+    try:
+        import tf2onnx
+    except ImportError:
+        print("⚠️  tf2onnx is not installed, skipping ONNX export (pip install tf2onnx)")
+        return
+
+    input_shape, _ = model_input_spec(model)
+    spec = (tf.TensorSpec([None, *input_shape], tf.float32, name="image"),)
+    tf2onnx.convert.from_keras(model, input_signature=spec, opset=13, output_path=output_path)
+    print(f"✅ ONNX model written to {output_path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export SavedModel and ONNX artifacts")
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--formats", nargs="+", default=["savedmodel", "onnx"], choices=["savedmodel", "onnx"])
+    args = parser.parse_args()
+
+    model = tf.keras.models.load_model(args.model)
+    base = os.path.splitext(args.model)[0]
+
+    if "savedmodel" in args.formats:
+        export_savedmodel(model, f"{base}.savedmodel")
+    if "onnx" in args.formats:
+        export_onnx(model, f"{base}.onnx")
+
+
+if __name__ == "__main__":
+    main()
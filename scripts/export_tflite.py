@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Export the trained Keras model to TFLite (float32, float16 and int8)
+
+The int8 variant uses post-training quantization calibrated on a representative
+sample of images from the dataset directory (class sub-folders, the same layout
+`flow_from_directory` uses). Each exported variant is then checked against the
+Keras model for top-1 agreement, per-image latency and peak RSS (measured in a
+fresh subprocess per variant).
+
+Serve a variant with:
+    FITO_MODEL_PATH=backend/trained_model_fito_outdoor.int8.tflite FITO_INFERENCE_THREADS=4 python backend/app.py
+
+Calibration and evaluation use disjoint random samples, so top-1 agreement
+is never measured on the images int8 was calibrated with. The dataset
+defaults to the training split the training scripts use (override with
+--dataset or FITO_DATASET_PATH).
+
+Usage:
+    python scripts/export_tflite.py
+    python scripts/export_tflite.py --dataset "path/to/dataset/training" --calibration-size 300 --eval-size 500
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import resource
+import subprocess
+import numpy as np
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+sys.path.insert(0, BACKEND_DIR)
+
+import tensorflow as tf
+from inference_backends import load_backend
+from preprocessing import ImagePreprocessor, model_input_spec
+
+DEFAULT_MODEL = os.path.join(BACKEND_DIR, "trained_model_fito_outdoor.h5")
+# Same dataset as train_model.py (class sub-folders under training/)
+DATASET_PATH = os.getenv("FITO_DATASET_PATH", r"C:\Users\HYUDADDY\Desktop\DATASET\tomato leaf diseases dataset(augmented)")
+DEFAULT_DATASET = os.path.join(DATASET_PATH, "training")
+VARIANTS = ["float32", "float16", "int8"]
+
+
+def sample_images(dataset_dir, sizes, seed=42):
+    """Disjoint random samples of image paths (one list per size) across all class folders"""
+    paths = []
+    for root, _, files in os.walk(dataset_dir):
+        for name in files:
+            if name.lower().endswith(('.jpg', '.jpeg', '.png')):
+                paths.append(os.path.join(root, name))
+    if len(paths) < sum(sizes):
+        raise ValueError(f"{dataset_dir} has {len(paths)} images, need {sum(sizes)} "
+                         f"({' + '.join(str(size) for size in sizes)}) for disjoint splits")
+    random.Random(seed).shuffle(paths)
+    samples, start = [], 0
+    for size in sizes:
+        samples.append(sorted(paths[start:start + size]))
+        start += size
+    return samples
+
+
+def load_batch(paths, input_shape):
+    """Preprocess image files exactly like the API does"""
+    preprocessor = ImagePreprocessor(input_shape, np.float32, max_batch_size=len(paths))
+    images = []
+    for path in paths:
+        with open(path, 'rb') as f:
+            images.append(f.read())
+    return np.array(preprocessor.preprocess_many(images))
+
+
+def convert(model, variant, calibration):
+    """Convert the Keras model to a TFLite flatbuffer"""
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    if variant == "float16":
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.target_spec.supported_types = [tf.float16]
+    elif variant == "int8":
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+
+        def representative_dataset():
+            for image in calibration:
+                yield [image[np.newaxis].astype(np.float32)]
+
+        converter.representative_dataset = representative_dataset
+        # Integer kernels inside, float32 input/output so preprocessing is unchanged
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+    return converter.convert()
+
+
+def reset_peak_rss():
+    """Restart this process's peak RSS at its current RSS (Linux 4.0+; no-op elsewhere)"""
+    try:
+        with open("/proc/self/clear_refs", 'w') as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def peak_rss_kb():
+    """Peak RSS of this process in KiB
+
+    VmHWM belongs to the current address space and can be reset, whereas
+    ru_maxrss carries over the parent's peak (here: TensorFlow and the Keras
+    model) from the fork that spawned us.
+    """
+    try:
+        with open("/proc/self/status", 'r') as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    # ru_maxrss is in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def measure(model_path, images_path, num_threads):
+    """Latency and peak RSS for one model file (run in a subprocess)"""
+    reset_peak_rss()
+    rss_before = peak_rss_kb()
+    backend = load_backend(model_path, num_threads=num_threads)
+    images = np.load(images_path)
+
+    backend.predict(images[:1])  # warm-up
+    timings = []
+    predictions = []
+    for image in images:
+        started = time.perf_counter()
+        predictions.append(backend.predict(image[np.newaxis])[0])
+        timings.append(time.perf_counter() - started)
+    rss_after = peak_rss_kb()
+
+    timings_ms = np.array(timings) * 1000.0
+    return {
+        "p50_ms": float(np.percentile(timings_ms, 50)),
+        "p99_ms": float(np.percentile(timings_ms, 99)),
+        "peak_rss_mb": rss_after / 1024.0,
+        "load_rss_mb": (rss_after - rss_before) / 1024.0,
+        "top1": [int(np.argmax(p)) for p in predictions]
+    }
+
+
+def measure_in_subprocess(model_path, images_path, num_threads):
+    """Run `measure` in a fresh interpreter so RSS is per variant"""
+    output = subprocess.check_output([
+        sys.executable, os.path.abspath(__file__),
+        "--worker", model_path, "--images", images_path, "--threads", str(num_threads or 0)
+    ])
+    return json.loads(output.decode().strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the Keras model to TFLite")
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--dataset", default=DEFAULT_DATASET, help="Directory with class sub-folders")
+    parser.add_argument("--calibration-size", type=int, default=200)
+    parser.add_argument("--eval-size", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=0, help="TFLite interpreter threads (0 = default)")
+    parser.add_argument("--variants", nargs="+", default=VARIANTS, choices=VARIANTS)
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--images", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(measure(args.worker, args.images, args.threads or None)))
+        return
+
+    print("=" * 80)
+    print("TFLITE EXPORT")
+    print("=" * 80)
+
+    model = tf.keras.models.load_model(args.model)
+    input_shape, _ = model_input_spec(model)
+
+    if args.calibration_size < 1 or args.eval_size < 1:
+        print("❌ --calibration-size and --eval-size must be at least 1")
+        sys.exit(1)
+    try:
+        calibration_paths, eval_paths = sample_images(args.dataset, [args.calibration_size, args.eval_size])
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    calibration = load_batch(calibration_paths, input_shape)
+    evaluation = load_batch(eval_paths, input_shape)
+    print(f"📊 Calibration images: {len(calibration)}  Evaluation images: {len(evaluation)}")
+
+    images_path = os.path.splitext(args.model)[0] + ".eval_images.npy"
+    np.save(images_path, evaluation)
+
+    base = os.path.splitext(args.model)[0]
+    results = {"keras": measure_in_subprocess(args.model, images_path, args.threads)}
+    sizes = {"keras": os.path.getsize(args.model)}
+
+    for variant in args.variants:
+        output_path = f"{base}.{variant}.tflite"
+        print(f"\n🔄 Converting {variant}...")
+        with open(output_path, 'wb') as f:
+            f.write(convert(model, variant, calibration))
+        sizes[variant] = os.path.getsize(output_path)
+        print(f"✅ Saved {output_path} ({sizes[variant] / 1024 / 1024:.1f} MB)")
+        results[variant] = measure_in_subprocess(output_path, images_path, args.threads)
+
+    os.remove(images_path)
+
+    reference = np.array(results["keras"]["top1"])
+    print("\n" + "=" * 80)
+    print(f"{'Variant':<10}{'size MB':>10}{'top-1 agree':>14}{'p50 ms':>10}{'p99 ms':>10}{'peak RSS MB':>14}")
+    for name, result in results.items():
+        agreement = float(np.mean(np.array(result["top1"]) == reference))
+        print(f"{name:<10}{sizes[name] / 1024 / 1024:>10.1f}{agreement:>13.1%}"
+              f"{result['p50_ms']:>10.2f}{result['p99_ms']:>10.2f}{result['peak_rss_mb']:>14.1f}")
+    print("=" * 80)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Register a trained model in the versioned model registry
+
+Copies the artifact (e.g. the .h5 written by train_model_outdoor_optimized.py)
+into backend/models/<version>/ with a manifest holding the class order, input
+size and checksum. Activate it without a restart via:
+    curl -X POST http://localhost:8000/api/admin/models/<version>/activate
+
+Usage:
+    python scripts/register_model.py trained_model_fito_outdoor.h5 --version 2026-10-16-outdoor
+"""
+import os
+import sys
+import argparse
+import numpy as np
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+sys.path.insert(0, BACKEND_DIR)
+
+import config
+from model_registry import ModelRegistry
+from inference_backends import load_backend
+from model_handler import DEFAULT_CLASS_NAMES
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Register a model version")
+    parser.add_argument("model", help="Model file (.h5, .tflite, .onnx) or SavedModel directory")
+    parser.add_argument("--version", required=True)
+    parser.add_argument("--backend", default=None, help="Inference backend (inferred when omitted)")
+    parser.add_argument("--class-names", nargs="+", default=None, help="Class order (defaults to the API's order)")
+    parser.add_argument("--notes", default=None)
+    parser.add_argument("--registry", default=config.MODEL_REGISTRY_DIR)
+    parser.add_argument("--activate", action="store_true", help="Also mark it active for the next restart")
+    args = parser.parse_args()
+
+    # Load once to validate the artifact and read its input size
+    backend = load_backend(args.model, args.backend)
+    class_names = args.class_names or DEFAULT_CLASS_NAMES
+
+    probabilities = backend.predict(np.zeros((1,) + backend.input_shape, dtype=backend.input_dtype))
+    if probabilities.shape[1] != len(class_names):
+        print(f"❌ Model has {probabilities.shape[1]} outputs but {len(class_names)} class names were given")
+        sys.exit(1)
+
+    registry = ModelRegistry(args.registry)
+    manifest = registry.register(
+        args.model,
+        args.version,
+        class_names,
+        backend.input_shape,
+        backend=args.backend,
+        notes=args.notes
+    )
+    print(f"✅ Registered {manifest['version']} ({manifest['artifact']}, sha256 {manifest['sha256'][:12]})")
+
+    if args.activate:
+        registry.set_active(args.version)
+        print(f"✅ Marked {args.version} as active")
+
+
+if __name__ == "__main__":
+    main()
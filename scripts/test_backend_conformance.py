@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Conformance test: every inference backend must agree on the sample images
+
+Runs the leaf images in assets/ through each available model artifact
+(Keras .h5, SavedModel, TFLite variants, ONNX) and compares the normalized
+probability vectors against the Keras reference.
+
+Usage:
+    python scripts/test_backend_conformance.py
+    python scripts/test_backend_conformance.py --model backend/trained_model_fito_outdoor.h5
+"""
+import os
+import sys
+import argparse
+import numpy as np
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+sys.path.insert(0, BACKEND_DIR)
+
+from model_handler import TomatoDiseasePredictor
+
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "assets", "tomato leaf")
+DEFAULT_MODEL = os.path.join(BACKEND_DIR, "trained_model_fito_outdoor.h5")
+
+# Quantized variants are allowed to drift more than exact float32 conversions
+TOLERANCES = {
+    "float16.tflite": 0.02,
+    "int8.tflite": 0.10
+}
+DEFAULT_TOLERANCE = 1e-3
+
+
+def find_artifacts(model_path):
+    """Exported artifacts that sit next to the Keras model"""
+    base = os.path.splitext(model_path)[0]
+    candidates = [
+        f"{base}.savedmodel",
+        f"{base}.float32.tflite",
+        f"{base}.float16.tflite",
+        f"{base}.int8.tflite",
+        f"{base}.onnx"
+    ]
+    return [path for path in candidates if os.path.exists(path)]
+
+
+def load_images():
+    """Sample leaf images from assets/"""
+    images = []
+    for root, _, files in os.walk(ASSETS_DIR):
+        for name in sorted(files):
+            if name.lower().endswith(('.jpg', '.jpeg', '.png')):
+                with open(os.path.join(root, name), 'rb') as f:
+                    images.append(f.read())
+    return images
+
+
+def run(predictor, images):
+    """Probability vectors for all images"""
+    batch = np.concatenate([predictor.preprocess_image(image) for image in images])
+    return predictor.predict_proba(batch)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inference backend conformance test")
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    args = parser.parse_args()
+
+    print("🧪 Inference backend conformance test")
+    print("=" * 70)
+
+    images = load_images()
+    reference_predictor = TomatoDiseasePredictor(args.model)
+    reference = run(reference_predictor, images)
+    print(f"Reference: {os.path.basename(args.model)} (keras) on {len(images)} images")
+
+    artifacts = find_artifacts(args.model)
+    if not artifacts:
+        print("⚠️  No exported artifacts found; run scripts/export_tflite.py and scripts/export_model_formats.py")
+        return
+
+    failures = 0
+    for path in artifacts:
+        try:
+            predictor = TomatoDiseasePredictor(path)
+            probabilities = run(predictor, images)
+        except ImportError as e:
+            print(f"⚠️  {os.path.basename(path)}: runtime not installed ({e})")
+            continue
+
+        tolerance = next((tol for suffix, tol in TOLERANCES.items() if path.endswith(suffix)), DEFAULT_TOLERANCE)
+        max_diff = float(np.abs(probabilities - reference).max())
+        agreement = float(np.mean(np.argmax(probabilities, axis=1) == np.argmax(reference, axis=1)))
+        sums_ok = np.allclose(probabilities.sum(axis=1), 1.0, atol=1e-5)
+        passed = max_diff <= tolerance and agreement == 1.0 and sums_ok
+
+        failures += int(not passed)
+        status = "✅" if passed else "❌"
+        print(f"{status} {os.path.basename(path):<45} {predictor.backend.name:<11}"
+              f"top-1 {agreement:.0%}  max diff {max_diff:.2e} (tol {tolerance:g})")
+
+    print("=" * 70)
+    if failures:
+        print(f"❌ {failures} backend(s) disagree with the Keras reference")
+        sys.exit(1)
+    print("✅ All backends agree")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Test: bulk relabel / bulk delete with a mix of valid and invalid ids
+
+Runs the admin bulk endpoints against an in-memory stand-in for the Supabase
+client that, like PostgREST, rejects a whole `id IN (...)` filter if any
+value is not a UUID. Checks that invalid ids come back as per-item
+invalid_id results while the valid ids in the same request are still
+updated / deleted (or reported not_found), instead of the call failing.
+
+Usage:
+    python scripts/test_bulk_admin.py
+"""
+import os
+import sys
+import uuid
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+sys.path.insert(0, BACKEND_DIR)
+
+import admin_routes
+from admin_routes import BulkRelabelRequest, BulkSelection, bulk_relabel, bulk_delete
+
+
+class FakeQuery:
+    """update()/delete()/select() ... .in_("id", ids).execute() over a dict of rows"""
+
+    def __init__(self, rows, action, values=None):
+        self.rows = rows
+        self.action = action
+        self.values = values
+        self.ids = []
+
+    def in_(self, column, ids):
+        for value in ids:
+            uuid.UUID(value)  # PostgREST: invalid input syntax for type uuid -> whole request fails
+        self.ids = list(ids)
+        return self
+
+    def execute(self):
+        matched = [self.rows[row_id] for row_id in self.ids if row_id in self.rows]
+        if self.action == "update":
+            for row in matched:
+                row.update(self.values)
+        elif self.action == "delete":
+            for row in matched:
+                del self.rows[row["id"]]
+        return type("Response", (), {"data": [dict(row) for row in matched]})()
+
+
+class FakeTable:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def update(self, values):
+        return FakeQuery(self.rows, "update", values)
+
+    def delete(self):
+        return FakeQuery(self.rows, "delete")
+
+    def select(self, columns):
+        return FakeQuery(self.rows, "select")
+
+
+class FakeBucket:
+    def __init__(self):
+        self.removed = []
+
+    def remove(self, paths):
+        self.removed.extend(paths)
+
+
+class FakeSupabase:
+    def __init__(self, rows):
+        self.rows = rows
+        self.bucket = FakeBucket()
+        self.storage = type("Storage", (), {"from_": lambda _, name: self.bucket})()
+
+    def table(self, name):
+        return FakeTable(self.rows)
+
+
+def make_rows(count):
+    """{id: row} with canonical UUID ids"""
+    rows = {}
+    for i in range(count):
+        row_id = str(uuid.uuid4())
+        rows[row_id] = {"id": row_id, "storage_path": f"uploads/{row_id}.jpg", "final_label": None}
+    return rows
+
+
+def statuses(response):
+    """{id as sent: status}"""
+    return {item["id"]: item["status"] for item in response["results"]}
+
+
+def check(name, condition, failures):
+    print(f"{'✅' if condition else '❌'} {name}")
+    return failures + int(not condition)
+
+
+def main():
+    print("🧪 Testing bulk admin endpoints with mixed valid/invalid ids...")
+    print("=" * 50)
+    failures = 0
+
+    rows = make_rows(3)
+    existing = list(rows)
+    missing = str(uuid.uuid4())
+    invalid = ["not-a-uuid", "1; drop table predictions", ""]
+    supabase = FakeSupabase(rows)
+    admin_routes.get_supabase_client = lambda: supabase
+
+    # Relabel: an upper-case id is still a valid UUID and is reported as sent
+    requested = [existing[0].upper(), existing[1], missing] + invalid
+    result = statuses(bulk_relabel(BulkRelabelRequest(ids=requested, label="Healthy")))
+    failures = check("relabel: valid ids updated", result[existing[0].upper()] == "updated" and result[existing[1]] == "updated", failures)
+    failures = check("relabel: unknown UUID is not_found", result[missing] == "not_found", failures)
+    failures = check("relabel: invalid ids are per-item invalid_id", all(result[row_id] == "invalid_id" for row_id in invalid), failures)
+    failures = check("relabel: rows were changed", rows[existing[0]]["final_label"] == "Healthy" and rows[existing[2]]["final_label"] is None, failures)
+
+    # Delete: same mix
+    response = bulk_delete(BulkSelection(ids=[existing[2], missing, "xyz"]))
+    result = statuses(response)
+    failures = check("delete: valid id deleted", result[existing[2]] == "deleted" and existing[2] not in rows, failures)
+    failures = check("delete: image removed", supabase.bucket.removed == [f"uploads/{existing[2]}.jpg"], failures)
+    failures = check("delete: unknown UUID is not_found", result[missing] == "not_found", failures)
+    failures = check("delete: invalid id is invalid_id", result["xyz"] == "invalid_id", failures)
+    failures = check("delete: summary counts every item", response["summary"] == {"deleted": 1, "not_found": 1, "invalid_id": 1}, failures)
+
+    print("=" * 50)
+    if failures:
+        print(f"❌ {failures} check(s) failed")
+        sys.exit(1)
+    print("✅ Invalid ids are reported per item and valid ids still go through")
+
+
+if __name__ == "__main__":
+    main()
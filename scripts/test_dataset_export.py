@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Path safety test for the bulk ZIP dataset export
+
+Labels come from free-form relabel input, so a label such as '..' or one
+containing '/' or '\\' must never produce an archive entry that escapes its
+class folder. Builds entry names for hostile labels, then streams a real
+archive through zip_chunks with an in-memory "storage" and checks every
+entry stays under training/<label>/.
+
+Usage:
+    python scripts/test_dataset_export.py
+"""
+import io
+import os
+import sys
+import zipfile
+import posixpath
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+sys.path.insert(0, BACKEND_DIR)
+
+from dataset_export import zip_entry_name, zip_chunks
+
+HOSTILE_LABELS = ["..", ".", "../../etc", "..\\..\\Windows", "a/../b", "C:evil", " .. ", "Early\x00Blight"]
+
+
+def entry_problems(name, root="training"):
+    """Reasons an archive entry name is unsafe (empty if it is fine)"""
+    problems = []
+    parts = name.split("/")
+    if "\\" in name:
+        problems.append("contains a backslash")
+    if name.startswith("/") or ":" in name:
+        problems.append("is absolute or has a drive")
+    if any(part in ("", ".", "..") for part in parts):
+        problems.append("has an empty, '.' or '..' component")
+    if len(parts) != 3 or parts[0] != root:
+        problems.append(f"is not <{root}>/<label>/<file>")
+    if posixpath.normpath(name) != name:
+        problems.append("is not normalized")
+    return problems
+
+
+def main():
+    print("🧪 Testing ZIP export entry names...")
+    print("=" * 50)
+    failures = 0
+
+    normal = zip_entry_name({"id": "abc", "final_label": "Early Blight", "storage_path": "x/abc.png"})
+    if normal != "training/Early Blight/abc.png":
+        print(f"❌ Plain label changed: {normal}")
+        failures += 1
+
+    dotdot = zip_entry_name({"id": "abc", "final_label": "..", "storage_path": "abc.jpg"})
+    if dotdot != "training/Unlabeled/abc.jpg":
+        print(f"❌ '..' label: {dotdot}")
+        failures += 1
+
+    rows = [
+        {"id": f"id{i}", "final_label": label, "storage_path": f"uploads/id{i}.jpg"}
+        for i, label in enumerate(HOSTILE_LABELS)
+    ]
+    rows.append({"id": "ext", "final_label": "Healthy", "storage_path": "uploads/ext.jpg\\..\\..\\x"})
+    for row in rows:
+        name = zip_entry_name(row)
+        problems = entry_problems(name)
+        if problems:
+            print(f"❌ {row['final_label']!r} -> {name!r}: {', '.join(problems)}")
+            failures += 1
+
+    archive_bytes = b"".join(zip_chunks([rows], lambda path: b"image", workers=2))
+    with zipfile.ZipFile(io.BytesIO(archive_bytes)) as archive:
+        names = archive.namelist()
+    for name in names:
+        problems = entry_problems(name)
+        if problems:
+            print(f"❌ Archive entry {name!r}: {', '.join(problems)}")
+            failures += 1
+    if len(names) != len(rows):
+        print(f"❌ Expected {len(rows)} archive entries, got {len(names)}")
+        failures += 1
+
+    print("=" * 50)
+    if failures:
+        print(f"❌ {failures} unsafe or unexpected entry name(s)")
+        sys.exit(1)
+    print(f"✅ {len(rows)} hostile rows stay inside training/<label>/")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Local scrape test for the Prometheus /metrics endpoint
+
+Without arguments, records sample observations, serves the metrics registry
+on a local HTTP port and scrapes it like Prometheus would, so the exposition
+format can be checked without the API, the model or Supabase. With --url it
+scrapes a running API instead.
+
+Checks: content type, every line is a valid HELP/TYPE comment or sample,
+each sample belongs to a declared metric, histogram buckets are cumulative
+and end with +Inf equal to _count, and the expected metric families exist.
+
+Usage:
+    python scripts/test_metrics_scrape.py
+    python scripts/test_metrics_scrape.py --url http://localhost:8000/metrics
+"""
+import os
+import re
+import sys
+import argparse
+import threading
+import urllib.request
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+sys.path.insert(0, BACKEND_DIR)
+
+import metrics
+
+EXPECTED_FAMILIES = [
+    "fito_stage_duration_seconds",
+    "fito_request_duration_seconds",
+    "fito_predictions_total",
+    "fito_prediction_outcomes_total",
+    "fito_cache_lookups_total",
+    "fito_errors_total"
+]
+
+COMMENT_RE = re.compile(r'^# (HELP|TYPE) ([a-zA-Z_:][a-zA-Z0-9_:]*) (.*)$')
+SAMPLE_RE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{(.*)\})? (\S+)$')
+LABEL_RE = re.compile(r'([a-zA-Z_][a-zA-Z0-9_]*)="((?:[^"\\]|\\.)*)"(,|$)')
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    """Serves the metrics registry the same way the API's /metrics does"""
+
+    def do_GET(self):
+        body = metrics.REGISTRY.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header("Content-Type", metrics.CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def record_samples():
+    """Exercise every metric family like a few /predict requests would"""
+    for stage in ("upload_read", "cache_lookup", "decode", "resize", "normalize", "batch", "inference", "postprocess"):
+        metrics.STAGE_SECONDS.observe(0.004, "predict", stage)
+        metrics.STAGE_SECONDS.observe(0.2, "predict", stage)
+    with metrics.component("outbox"), metrics.stage("storage_upload"):
+        pass
+    metrics.REQUEST_SECONDS.observe(0.05, "/predict", "success")
+    metrics.PREDICTIONS.inc("Early Blight")
+    metrics.PREDICTIONS.inc('Label "with" quotes\\and\nnewline')
+    metrics.OUTCOMES.inc("success")
+    metrics.OUTCOMES.inc("unidentified")
+    metrics.CACHE_LOOKUPS.inc("miss")
+    metrics.ERRORS.inc("outbox", "storage_upload")
+    metrics.REGISTRY.gauge("fito_test_gauge", "Gauge registered by the scrape test", lambda: 3)
+
+
+def scrape(url):
+    """(content type, body)"""
+    with urllib.request.urlopen(url, timeout=10) as response:
+        return response.headers.get("Content-Type", ""), response.read().decode('utf-8')
+
+
+def parse_labels(text):
+    """Parse a label set; returns None if it is malformed"""
+    labels = {}
+    position = 0
+    while position < len(text):
+        match = LABEL_RE.match(text, position)
+        if not match:
+            return None
+        labels[match.group(1)] = match.group(2)
+        position = match.end()
+    return labels
+
+
+def validate(content_type, body):
+    """List of problems found in a scrape"""
+    problems = []
+    if not content_type.startswith("text/plain") or "version=0.0.4" not in content_type:
+        problems.append(f"Unexpected content type: {content_type}")
+
+    types = {}
+    histograms = defaultdict(lambda: {"buckets": [], "count": None})
+    for number, line in enumerate(body.splitlines(), 1):
+        if not line:
+            continue
+        if line.startswith("#"):
+            match = COMMENT_RE.match(line)
+            if not match:
+                problems.append(f"line {number}: malformed comment: {line}")
+            elif match.group(1) == "TYPE":
+                types[match.group(2)] = match.group(3)
+            continue
+
+        match = SAMPLE_RE.match(line)
+        if not match:
+            problems.append(f"line {number}: malformed sample: {line}")
+            continue
+        name, _, label_text, value = match.groups()
+        labels = parse_labels(label_text or "")
+        if labels is None:
+            problems.append(f"line {number}: malformed labels: {line}")
+            continue
+        try:
+            value = float(value)
+        except ValueError:
+            problems.append(f"line {number}: bad value: {line}")
+            continue
+
+        family = re.sub(r'_(bucket|sum|count)$', '', name)
+        if name not in types and family not in types:
+            problems.append(f"line {number}: sample without a TYPE declaration: {name}")
+            continue
+
+        if types.get(family) == "histogram":
+            key = (family, tuple(sorted((k, v) for k, v in labels.items() if k != "le")))
+            if name.endswith("_bucket"):
+                histograms[key]["buckets"].append((labels.get("le"), value))
+            elif name.endswith("_count"):
+                histograms[key]["count"] = value
+
+    for (family, labels), series in histograms.items():
+        values = [value for _, value in series["buckets"]]
+        if values != sorted(values):
+            problems.append(f"{family}{dict(labels)}: buckets are not cumulative")
+        if not series["buckets"] or series["buckets"][-1][0] != "+Inf":
+            problems.append(f"{family}{dict(labels)}: missing +Inf bucket")
+        elif series["buckets"][-1][1] != series["count"]:
+            problems.append(f"{family}{dict(labels)}: +Inf bucket != _count")
+
+    for family in EXPECTED_FAMILIES:
+        if family not in types:
+            problems.append(f"Missing metric family: {family}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scrape and validate /metrics")
+    parser.add_argument("--url", default=None, help="Scrape a running API instead of a local test server")
+    args = parser.parse_args()
+
+    print("🧪 Testing Prometheus /metrics...")
+    print("=" * 50)
+
+    server = None
+    url = args.url
+    if url is None:
+        record_samples()
+        server = ThreadingHTTPServer(("127.0.0.1", 0), MetricsHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+
+    try:
+        content_type, body = scrape(url)
+    except Exception as e:
+        print(f"❌ Scrape of {url} failed: {e}")
+        sys.exit(1)
+    finally:
+        if server is not None:
+            server.shutdown()
+
+    print(f"✅ Scraped {url} ({len(body.splitlines())} lines)")
+    problems = validate(content_type, body)
+    if problems:
+        for problem in problems:
+            print(f"❌ {problem}")
+        sys.exit(1)
+    print("✅ Exposition format is valid")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Train the leaf gate (first stage of the prediction cascade)
+
+Fits a logistic regression on the colour/texture features from
+backend/leaf_gate.py, with the tomato leaf classes as positives and the
+Unidentified folder (selfies, screenshots, random photos) as negatives. The
+rejection threshold is the highest leaf score that still keeps
+`--target-recall` of the held-out leaves, so the gate only rejects images
+that are clearly not leaves.
+
+Usage:
+    python scripts/train_leaf_gate.py --non-leaf-dir "<dataset>/training/Unidentified"
+    python scripts/train_leaf_gate.py --leaf-dir "<dataset>/training" --non-leaf-dir "<dataset>/training/Unidentified" --target-recall 0.998
+"""
+import os
+import sys
+import json
+import argparse
+from datetime import datetime
+import numpy as np
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+sys.path.insert(0, BACKEND_DIR)
+
+from leaf_gate import extract_features, FEATURE_NAMES
+
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "assets", "tomato leaf")
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp', '.bmp')
+
+
+def list_images(directory, exclude_dirs=("Unidentified",)):
+    """Image files under `directory`, skipping excluded class folders"""
+    paths = []
+    for root, dirs, files in os.walk(directory):
+        dirs[:] = [d for d in sorted(dirs) if d not in exclude_dirs]
+        paths.extend(os.path.join(root, name) for name in sorted(files) if name.lower().endswith(IMAGE_EXTENSIONS))
+    return paths
+
+
+def featurize(paths):
+    """Feature matrix for a list of image files (unreadable files are skipped)"""
+    rows = []
+    for i, path in enumerate(paths):
+        try:
+            with open(path, 'rb') as f:
+                rows.append(extract_features(f.read()))
+        except Exception as e:
+            print(f"⚠️  Skipping {path}: {e}")
+        if (i + 1) % 500 == 0:
+            print(f"   {i + 1}/{len(paths)} images")
+    return np.array(rows, dtype=np.float32)
+
+
+def fit_logistic(x, y, iterations=3000, learning_rate=0.5, l2=1e-3):
+    """Class-balanced L2-regularized logistic regression (full-batch gradient descent)"""
+    sample_weight = np.where(y == 1, 0.5 / max(y.mean(), 1e-6), 0.5 / max(1 - y.mean(), 1e-6))
+    weights = np.zeros(x.shape[1], dtype=np.float64)
+    bias = 0.0
+    for _ in range(iterations):
+        p = 1.0 / (1.0 + np.exp(-(x @ weights + bias)))
+        error = (p - y) * sample_weight
+        weights -= learning_rate * (x.T @ error / len(y) + l2 * weights)
+        bias -= learning_rate * error.mean()
+    return weights, bias
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the leaf gate")
+    parser.add_argument("--leaf-dir", default=ASSETS_DIR, help="Folder of leaf class folders (Unidentified is skipped)")
+    parser.add_argument("--non-leaf-dir", required=True, help="Folder of non-leaf images (the Unidentified class)")
+    parser.add_argument("--output", default=os.path.join(BACKEND_DIR, "leaf_gate.json"))
+    parser.add_argument("--target-recall", type=float, default=0.995, help="Share of leaves the gate must let through")
+    parser.add_argument("--validation-split", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    leaf_paths = list_images(args.leaf_dir)
+    non_leaf_paths = list_images(args.non_leaf_dir, exclude_dirs=())
+    print(f"📂 {len(leaf_paths)} leaf images, {len(non_leaf_paths)} non-leaf images")
+    if not leaf_paths or not non_leaf_paths:
+        print("❌ Need both leaf and non-leaf images")
+        sys.exit(1)
+
+    print("🔍 Extracting features...")
+    x = np.concatenate([featurize(leaf_paths), featurize(non_leaf_paths)])
+    y = np.concatenate([np.ones(len(leaf_paths)), np.zeros(len(non_leaf_paths))])
+
+    rng = np.random.default_rng(args.seed)
+    order = rng.permutation(len(y))
+    n_val = max(1, int(len(y) * args.validation_split))
+    val_idx, train_idx = order[:n_val], order[n_val:]
+
+    mean = x[train_idx].mean(axis=0)
+    std = x[train_idx].std(axis=0) + 1e-6
+    x_std = (x - mean) / std
+
+    print("🏋️  Training logistic regression...")
+    weights, bias = fit_logistic(x_std[train_idx], y[train_idx])
+
+    scores = 1.0 / (1.0 + np.exp(-(x_std[val_idx] @ weights + bias)))
+    val_leaf = scores[y[val_idx] == 1]
+    val_non_leaf = scores[y[val_idx] == 0]
+    if not len(val_leaf) or not len(val_non_leaf):
+        print("❌ Validation split has no leaf or no non-leaf images; add more data or raise --validation-split")
+        sys.exit(1)
+
+    # Highest threshold that still passes target_recall of the validation leaves
+    threshold = float(np.quantile(val_leaf, 1.0 - args.target_recall, method="lower"))
+    metrics = {
+        "validation_leaf_recall": float((val_leaf >= threshold).mean()),
+        "validation_non_leaf_rejection": float((val_non_leaf < threshold).mean()),
+        "validation_leaf_images": int(len(val_leaf)),
+        "validation_non_leaf_images": int(len(val_non_leaf))
+    }
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump({
+            "features": FEATURE_NAMES,
+            "mean": mean.tolist(),
+            "std": std.tolist(),
+            "weights": weights.tolist(),
+            "bias": float(bias),
+            "threshold": threshold,
+            "target_recall": args.target_recall,
+            "metrics": metrics,
+            "trained_at": datetime.utcnow().isoformat()
+        }, f, indent=2)
+
+    print(f"✅ Leaf gate saved to {args.output}")
+    print(f"   Threshold:              {threshold:.4f}")
+    print(f"   Leaf recall (val):      {metrics['validation_leaf_recall']:.2%}")
+    print(f"   Non-leaf rejected (val): {metrics['validation_non_leaf_rejection']:.2%}")
+
+
+if __name__ == "__main__":
+    main()